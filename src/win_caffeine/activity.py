@@ -0,0 +1,224 @@
+"""Activity-aware holds driven by CPU, disk and network load sampling.
+
+An `ActivityMonitor` samples cumulative counters at a fixed period and turns
+them into rates. The hold lasts while the machine is busy and ends once the
+rates stayed quiet for `settings.ACTIVITY_IDLE_SECONDS`. Two thresholds give
+hysteresis: any rate above the high threshold makes the machine busy, and it
+only turns quiet once all rates drop below the low one, so load hovering
+around a threshold does not restart the idle countdown on every sample.
+"""
+import collections
+import ctypes
+import dataclasses
+import logging
+import os
+import sys
+import typing
+
+from win_caffeine import settings
+from win_caffeine.clock import Clock, system_clock
+
+logger = logging.getLogger(__name__)
+
+SECTOR_BYTES = 512
+
+Counters = collections.namedtuple(
+    "Counters", ["cpu_busy", "cpu_total", "disk_bytes", "net_bytes"]
+)
+Rates = collections.namedtuple(
+    "Rates", ["cpu_percent", "disk_bytes_per_second", "net_bytes_per_second"]
+)
+
+
+class Provider(typing.Protocol):
+    def sample(self) -> Counters:
+        """Reads the cumulative activity counters."""
+        ...
+
+
+class ProcProvider:
+    """Reads Linux counters from /proc: stat, diskstats and net/dev."""
+
+    def __init__(self, proc: str = "/proc", sys_block: str = "/sys/block") -> None:
+        """Proc provider.
+
+        Args:
+            proc: Mount point of procfs.
+            sys_block: Directory listing whole disks, partitions are skipped
+                so that their bytes are not counted twice.
+        """
+        self.proc = proc
+        try:
+            self.disks: set[str] | None = {
+                name
+                for name in os.listdir(sys_block)
+                if not name.startswith(("loop", "ram"))
+            }
+        except OSError:
+            self.disks = None
+        # Fail early if the counters are not readable.
+        self.sample()
+
+    def sample(self) -> Counters:
+        with open(os.path.join(self.proc, "stat")) as f:
+            cpu = [int(field) for field in f.readline().split()[1:9]]
+        # idle and iowait
+        cpu_idle = cpu[3] + cpu[4]
+
+        disk_sectors = 0
+        with open(os.path.join(self.proc, "diskstats")) as f:
+            for line in f:
+                fields = line.split()
+                if self.disks is None or fields[2] in self.disks:
+                    disk_sectors += int(fields[5]) + int(fields[9])
+
+        net_bytes = 0
+        with open(os.path.join(self.proc, "net", "dev")) as f:
+            for line in f.readlines()[2:]:
+                name, _, data = line.partition(":")
+                if name.strip() != "lo":
+                    fields = data.split()
+                    net_bytes += int(fields[0]) + int(fields[8])
+
+        return Counters(
+            sum(cpu) - cpu_idle, sum(cpu), disk_sectors * SECTOR_BYTES, net_bytes
+        )
+
+
+class WindowsProvider:
+    """Reads CPU times with GetSystemTimes, disk and network are not sampled."""
+
+    def sample(self) -> Counters:
+        idle, kernel, user = (ctypes.c_ulonglong() for _ in range(3))
+        ctypes.windll.kernel32.GetSystemTimes(
+            ctypes.byref(idle), ctypes.byref(kernel), ctypes.byref(user)
+        )
+        # Kernel time includes idle time.
+        total = kernel.value + user.value
+        return Counters(total - idle.value, total, 0, 0)
+
+
+def default_provider() -> Provider:
+    """Counter provider of this platform.
+
+    Raises:
+        OSError: No counters available.
+    """
+    if sys.platform == "win32":
+        return WindowsProvider()
+    return ProcProvider()
+
+
+@dataclasses.dataclass
+class Thresholds:
+    """Rates above which the machine counts as busy."""
+
+    cpu_percent: float = settings.ACTIVITY_CPU_PERCENT
+    disk_bytes_per_second: float = settings.ACTIVITY_DISK_BYTES_PER_SECOND
+    net_bytes_per_second: float = settings.ACTIVITY_NET_BYTES_PER_SECOND
+
+    @classmethod
+    def parse(cls, spec: str) -> "Thresholds":
+        """Parses e.g. `cpu=20,disk=1000000,net=100000`, missing keys default.
+
+        Raises:
+            ValueError: Unknown key or malformed value.
+        """
+        keys = dict(
+            cpu="cpu_percent", disk="disk_bytes_per_second", net="net_bytes_per_second"
+        )
+        values = {}
+        for item in filter(None, spec.split(",")):
+            key, _, value = item.partition("=")
+            if key.strip() not in keys:
+                raise ValueError(f"Unknown activity threshold {key!r}.")
+            values[keys[key.strip()]] = float(value)
+        return cls(**values)
+
+    def exceeded(self, rates: Rates, scale: float = 1.0) -> bool:
+        """Returns True if any rate is above its threshold times `scale`."""
+        return (
+            rates.cpu_percent > self.cpu_percent * scale
+            or rates.disk_bytes_per_second > self.disk_bytes_per_second * scale
+            or rates.net_bytes_per_second > self.net_bytes_per_second * scale
+        )
+
+    def __str__(self) -> str:
+        return (
+            f"cpu={self.cpu_percent:g},disk={self.disk_bytes_per_second:g},"
+            f"net={self.net_bytes_per_second:g}"
+        )
+
+
+class ActivityMonitor:
+    """Samples activity and tracks the busy or quiet state with hysteresis."""
+
+    def __init__(
+        self,
+        thresholds: Thresholds | None = None,
+        provider: Provider | None = None,
+        clock: Clock | None = None,
+    ) -> None:
+        """Activity monitor, the machine starts out busy.
+
+        Args:
+            thresholds: High thresholds, the low ones are scaled by
+                `settings.ACTIVITY_HYSTERESIS`.
+            provider: Counter source, defaults to the platform one.
+            clock: Time source, defaults to the system clock.
+
+        Raises:
+            OSError: No counters available.
+        """
+        self.thresholds = thresholds or Thresholds()
+        self.provider = provider or default_provider()
+        self.clock = clock or system_clock
+        self.busy = True
+        self.quiet_since: float | None = None
+        self._time = self.clock.monotonic()
+        self._counters = self.provider.sample()
+
+    def update(self) -> Rates:
+        """Samples and updates the busy state.
+
+        Returns:
+            Rates since the previous sample.
+        """
+        now = self.clock.monotonic()
+        counters = self.provider.sample()
+        elapsed = max(now - self._time, 1e-9)
+        previous, self._time, self._counters = self._counters, now, counters
+        cpu_total = counters.cpu_total - previous.cpu_total
+        rates = Rates(
+            100 * (counters.cpu_busy - previous.cpu_busy) / cpu_total
+            if cpu_total
+            else 0.0,
+            (counters.disk_bytes - previous.disk_bytes) / elapsed,
+            (counters.net_bytes - previous.net_bytes) / elapsed,
+        )
+        if self.thresholds.exceeded(rates):
+            self.busy = True
+        elif not self.thresholds.exceeded(rates, settings.ACTIVITY_HYSTERESIS):
+            self.busy = False
+        if self.busy:
+            self.quiet_since = None
+        elif self.quiet_since is None:
+            self.quiet_since = now
+        return rates
+
+    def quiet_seconds(self) -> float:
+        """Seconds the machine has been quiet, 0 while busy."""
+        if self.quiet_since is None:
+            return 0.0
+        return self.clock.monotonic() - self.quiet_since
+
+    def wait_idle(
+        self,
+        idle_seconds: float = settings.ACTIVITY_IDLE_SECONDS,
+        sample_seconds: float = settings.ACTIVITY_SAMPLE_SECONDS,
+    ):
+        """Samples every `sample_seconds` until quiet for `idle_seconds`."""
+        while self.quiet_seconds() < idle_seconds:
+            self.clock.sleep(sample_seconds)
+            rates = self.update()
+            logger.debug("Activity %s, busy: %s", rates, self.busy)
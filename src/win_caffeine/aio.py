@@ -0,0 +1,128 @@
+"""asyncio API for holding the system awake from coroutines.
+
+    async with aio.keep_awake("Inhibitor"):
+        await run_job()
+
+Holds run on `engine.TimerEngine` with the running event loop as its loop, so
+refresh ticks are loop timers. Only the Inhibitor, whose backend may block
+while e.g. `systemd-inhibit` starts, is taken and dropped on a worker thread.
+All coroutines of a loop asking for the same strategy share one activation,
+released after the last of them exits.
+"""
+import asyncio
+import concurrent.futures
+import contextlib
+import functools
+import logging
+import typing
+import weakref
+
+from win_caffeine import engine
+from win_caffeine import screen_lock
+from win_caffeine import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncHold:
+    """Reference-counted hold shared by the coroutines of one event loop."""
+
+    def __init__(
+        self, strategy: screen_lock.Strategy, loop: asyncio.AbstractEventLoop
+    ) -> None:
+        """Async hold.
+
+        Args:
+            strategy: Strategy to activate, the hold uses its own instance.
+            loop: Loop running the refresh timers.
+        """
+        impl = type(strategy.impl)(strategy.impl.backend)
+        self.model = screen_lock.Model()
+        self.model.strategy = screen_lock.Strategy(strategy.ndx, strategy.name, impl)
+        self.users = 0
+        self.loop = loop
+        self._lock = asyncio.Lock()
+        self._ended = asyncio.Event()
+        self.engine = engine.TimerEngine(self.model, loop, self._on_finished)
+        # The Inhibitor is taken and dropped on a single worker, since the
+        # execution state is per thread, started for the first user and shut
+        # down after the last one. The untimed hold has no timers, so only
+        # the end of the session is posted back to the loop from it.
+        self._threaded = isinstance(impl, screen_lock.Inhibitor)
+        self._executor: concurrent.futures.ThreadPoolExecutor | None = None
+
+    async def acquire(self):
+        """Joins the hold, activating the strategy for the first user."""
+        async with self._lock:
+            if self.users == 0:
+                self._ended.clear()
+                if self._threaded:
+                    self._executor = concurrent.futures.ThreadPoolExecutor(
+                        1, thread_name_prefix="inhibitor"
+                    )
+                await self._run(functools.partial(self.engine.start, timed=False))
+            self.users += 1
+
+    async def release(self):
+        """Leaves the hold, waiting for the release after the last user."""
+        async with self._lock:
+            self.users -= 1
+            if self.users > 0:
+                return
+            if self.model.is_suspend_screen_lock_on:
+                await self._run(self.model.release_screen_lock_suspend)
+            await self._ended.wait()
+            if self._executor is not None:
+                # Idle by now, the worker exits without blocking the loop.
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    def _on_finished(self):
+        # Sessions may end on the worker thread, e.g. if taking the hold fails.
+        self.loop.call_soon_threadsafe(self._ended.set)
+
+    async def _run(self, callback: typing.Callable[[], None]):
+        """Runs `callback` on the worker thread if the strategy has one."""
+        if self._executor is None:
+            callback()
+        else:
+            await self.loop.run_in_executor(self._executor, callback)
+
+
+# Holds of each running loop by strategy name.
+_holds: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def shared_hold(strategy: str | None = None) -> AsyncHold:
+    """Hold of the running loop for `strategy`, defaults to the default one."""
+    loop = asyncio.get_running_loop()
+    if strategy is None:
+        strategy = screen_lock.strategy_names[settings.DEFAULT_STRATEGY_INDEX]
+    ndx = screen_lock.strategy_names.index(strategy)
+    holds = _holds.setdefault(loop, {})
+    if strategy not in holds:
+        holds[strategy] = AsyncHold(screen_lock.strategies[ndx], loop)
+    return holds[strategy]
+
+
+@contextlib.asynccontextmanager
+async def keep_awake(
+    strategy: str | None = None,
+) -> typing.AsyncIterator[AsyncHold]:
+    """Holds the system awake while the block runs.
+
+    Args:
+        strategy: One of `screen_lock.strategy_names`, defaults to the default one.
+    """
+    hold = shared_hold(strategy)
+    await hold.acquire()
+    try:
+        yield hold
+    finally:
+        await hold.release()
+
+
+async def hold_for(seconds: float, strategy: str | None = None):
+    """Holds the system awake for `seconds`."""
+    async with keep_awake(strategy):
+        await asyncio.sleep(seconds)
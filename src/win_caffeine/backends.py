@@ -0,0 +1,326 @@
+"""OS backends called by the screen lock strategies."""
+import collections
+import ctypes
+import functools
+import itertools
+import logging
+import shutil
+import subprocess
+import sys
+import time
+import typing
+
+from win_caffeine import settings
+from win_caffeine.clock import Clock, system_clock
+
+logger = logging.getLogger(__name__)
+
+Call = collections.namedtuple("Call", ["timestamp", "name", "args", "latency"])
+
+
+class Backend(typing.Protocol):
+    def set_thread_execution_state(self, flags: int) -> int:
+        """Sets the thread execution state, returns the previous one."""
+        ...
+
+    def keybd_event(self, key: int, flags: int):
+        """Synthesizes a single key down or key up event."""
+        ...
+
+    def send_input(self, keys: list[tuple[int, int]]) -> int:
+        """Synthesizes a sequence of (key, flags) events in one call.
+
+        Returns:
+            Number of events inserted.
+        """
+        ...
+
+    def inhibit(self, reason: str) -> typing.Any:
+        """Takes a long-lived screen lock and sleep inhibitor.
+
+        Returns:
+            Handle to pass to `uninhibit`.
+        """
+        ...
+
+    def uninhibit(self, handle: typing.Any):
+        """Drops an inhibitor taken by `inhibit`."""
+        ...
+
+    def idle_seconds(self) -> float | None:
+        """Seconds since the last user input, None if unknown."""
+        ...
+
+    def lock_timeout_seconds(self) -> float | None:
+        """Idle seconds after which the screen locks, None if unknown or never."""
+        ...
+
+
+class LASTINPUTINFO(ctypes.Structure):
+    _fields_ = [("cbSize", ctypes.c_uint), ("dwTime", ctypes.c_uint)]
+
+
+class KEYBDINPUT(ctypes.Structure):
+    _fields_ = [
+        ("wVk", ctypes.c_ushort),
+        ("wScan", ctypes.c_ushort),
+        ("dwFlags", ctypes.c_ulong),
+        ("time", ctypes.c_ulong),
+        ("dwExtraInfo", ctypes.c_size_t),
+    ]
+
+
+class MOUSEINPUT(ctypes.Structure):
+    _fields_ = [
+        ("dx", ctypes.c_long),
+        ("dy", ctypes.c_long),
+        ("mouseData", ctypes.c_ulong),
+        ("dwFlags", ctypes.c_ulong),
+        ("time", ctypes.c_ulong),
+        ("dwExtraInfo", ctypes.c_size_t),
+    ]
+
+
+class INPUT(ctypes.Structure):
+    class _INPUT(ctypes.Union):
+        # The mouse member sets the union size expected by SendInput.
+        _fields_ = [("ki", KEYBDINPUT), ("mi", MOUSEINPUT)]
+
+    _anonymous_ = ("u",)
+    _fields_ = [("type", ctypes.c_ulong), ("u", _INPUT)]
+
+
+class WindowsBackend:
+    """Calls the Win32 API via ctypes windll."""
+
+    ES_CONTINUOUS = 0x80000000
+    ES_SYSTEM_REQUIRED = 0x00000001
+    ES_DISPLAY_REQUIRED = 0x00000002
+    SPI_GETSCREENSAVETIMEOUT = 0x000E
+    SPI_GETSCREENSAVEACTIVE = 0x0010
+    INPUT_KEYBOARD = 1
+
+    def set_thread_execution_state(self, flags: int) -> int:
+        return ctypes.windll.kernel32.SetThreadExecutionState(flags)
+
+    def keybd_event(self, key: int, flags: int):
+        ctypes.windll.user32.keybd_event(key, 0, flags, 0)
+
+    def send_input(self, keys: list[tuple[int, int]]) -> int:
+        inputs = (INPUT * len(keys))()
+        for item, (key, flags) in zip(inputs, keys):
+            item.type = self.INPUT_KEYBOARD
+            item.ki = KEYBDINPUT(key, 0, flags, 0, 0)
+        return ctypes.windll.user32.SendInput(len(keys), inputs, ctypes.sizeof(INPUT))
+
+    def inhibit(self, reason: str) -> typing.Any:
+        del reason  # unused
+        return self.set_thread_execution_state(
+            self.ES_CONTINUOUS | self.ES_SYSTEM_REQUIRED | self.ES_DISPLAY_REQUIRED
+        )
+
+    def uninhibit(self, handle: typing.Any):
+        del handle  # unused
+        self.set_thread_execution_state(self.ES_CONTINUOUS)
+
+    def idle_seconds(self) -> float | None:
+        info = LASTINPUTINFO(ctypes.sizeof(LASTINPUTINFO), 0)
+        if not ctypes.windll.user32.GetLastInputInfo(ctypes.byref(info)):
+            return None
+        # Both tick counts wrap around after 49.7 days.
+        ticks = ctypes.windll.kernel32.GetTickCount() - info.dwTime
+        return (ticks & 0xFFFFFFFF) / 1000
+
+    def lock_timeout_seconds(self) -> float | None:
+        active, timeout = ctypes.c_int(), ctypes.c_int()
+        user32 = ctypes.windll.user32
+        user32.SystemParametersInfoW(
+            self.SPI_GETSCREENSAVEACTIVE, 0, ctypes.byref(active), 0
+        )
+        user32.SystemParametersInfoW(
+            self.SPI_GETSCREENSAVETIMEOUT, 0, ctypes.byref(timeout), 0
+        )
+        return timeout.value if active.value and timeout.value > 0 else None
+
+
+class LinuxBackend:
+    """Holds a logind inhibitor lock through `systemd-inhibit`.
+
+    The lock lives exactly as long as the helper process, so holding it needs
+    no periodic work and dropping it is a matter of terminating the process.
+    Win32-only calls are ignored.
+    """
+
+    def __init__(self, inhibit_command: list[str] | None = None) -> None:
+        """Linux backend.
+
+        Args:
+            inhibit_command: Command holding the inhibitor until terminated,
+                `{reason}` is substituted. Defaults to `systemd-inhibit`.
+        """
+        self.inhibit_command = inhibit_command or [
+            "systemd-inhibit",
+            "--what=idle:sleep",
+            f"--who={settings.APP_NAME}",
+            "--why={reason}",
+            "--mode=block",
+            "sleep",
+            "infinity",
+        ]
+
+    def set_thread_execution_state(self, flags: int) -> int:
+        del flags  # unused
+        return 0
+
+    def keybd_event(self, key: int, flags: int):
+        del key, flags  # unused
+
+    def send_input(self, keys: list[tuple[int, int]]) -> int:
+        del keys  # unused
+        return 0
+
+    def inhibit(self, reason: str) -> typing.Any:
+        command = [arg.replace("{reason}", reason) for arg in self.inhibit_command]
+        process = subprocess.Popen(
+            command,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            returncode = process.wait(settings.INHIBIT_STARTUP_SECONDS)
+        except subprocess.TimeoutExpired:
+            logger.debug("Inhibitor held by pid %s", process.pid)
+            return process
+        raise OSError(f"Inhibitor {command[0]} exited with code {returncode}.")
+
+    def uninhibit(self, handle: typing.Any):
+        handle.terminate()
+        try:
+            handle.wait(settings.INHIBIT_RELEASE_SECONDS)
+        except subprocess.TimeoutExpired:
+            handle.kill()
+            handle.wait()
+
+    def idle_seconds(self) -> float | None:
+        return None
+
+    def lock_timeout_seconds(self) -> float | None:
+        """Reads the GNOME session idle delay, if gsettings is available."""
+        gsettings = shutil.which("gsettings")
+        if gsettings is None:
+            return None
+        try:
+            output = subprocess.run(
+                [gsettings, "get", "org.gnome.desktop.session", "idle-delay"],
+                capture_output=True,
+                text=True,
+                timeout=settings.CONTROL_TIMEOUT_SECONDS,
+            ).stdout
+            # e.g. "uint32 300"
+            timeout = int(output.split()[-1])
+        except (OSError, subprocess.TimeoutExpired, ValueError, IndexError):
+            return None
+        return timeout or None
+
+
+class RecordingBackend:
+    """Logs every call with its timestamp and latency.
+
+    Stands in for the OS off Windows, or wraps another backend to profile
+    call frequency and latency of each strategy.
+    """
+
+    def __init__(
+        self,
+        delegate: Backend | None = None,
+        clock: Clock | None = None,
+        maxlen: int | None = None,
+        idle: typing.Callable[[], float | None] | None = None,
+        lock_timeout: float | None = None,
+    ) -> None:
+        """Recording backend.
+
+        Args:
+            delegate: Backend actually making the calls, None records only.
+            clock: Clock for the call timestamps.
+            maxlen: Keeps only the latest `maxlen` calls, counts keep growing.
+            idle: Idle time source without a delegate, e.g. a simulated user.
+            lock_timeout: Lock timeout to report without a delegate.
+        """
+        self.delegate = delegate
+        self.idle = idle
+        self.lock_timeout = lock_timeout
+        self.clock = clock or system_clock
+        self.calls: typing.Deque[Call] = collections.deque(maxlen=maxlen)
+        self.counts: typing.Counter[str] = collections.Counter()
+        self.latencies: dict[str, float] = collections.defaultdict(float)
+        self._handles = itertools.count(1)
+
+    def set_thread_execution_state(self, flags: int) -> int:
+        return self._record("set_thread_execution_state", flags) or 0
+
+    def keybd_event(self, key: int, flags: int):
+        self._record("keybd_event", key, flags)
+
+    def send_input(self, keys: list[tuple[int, int]]) -> int:
+        inserted = self._record("send_input", keys)
+        return len(keys) if self.delegate is None else inserted
+
+    def inhibit(self, reason: str) -> typing.Any:
+        handle = self._record("inhibit", reason)
+        return next(self._handles) if self.delegate is None else handle
+
+    def uninhibit(self, handle: typing.Any):
+        self._record("uninhibit", handle)
+
+    def idle_seconds(self) -> float | None:
+        idle = self._record("idle_seconds")
+        if self.delegate is None and self.idle is not None:
+            return self.idle()
+        return idle
+
+    def lock_timeout_seconds(self) -> float | None:
+        timeout = self._record("lock_timeout_seconds")
+        return self.lock_timeout if self.delegate is None else timeout
+
+    def count(self, name: str | None = None) -> int:
+        """Number of calls to `name`, or to any function."""
+        if name is None:
+            return sum(self.counts.values())
+        return self.counts[name]
+
+    def summary(self) -> dict[str, tuple[int, float]]:
+        """Maps each called function to its call count and mean latency."""
+        return {
+            name: (count, self.latencies[name] / count)
+            for name, count in self.counts.items()
+        }
+
+    def _record(self, name: str, *args):
+        timestamp = self.clock.time()
+        started = time.perf_counter()
+        result = None
+        if self.delegate is not None:
+            result = getattr(self.delegate, name)(*args)
+        latency = time.perf_counter() - started
+        self.calls.append(Call(timestamp, name, args, latency))
+        self.counts[name] += 1
+        self.latencies[name] += latency
+        logger.debug("%s%s", name, args)
+        return result
+
+
+@functools.lru_cache(maxsize=None)
+def default_backend() -> Backend:
+    """Recording backend wrapping the native one, for the call metrics.
+
+    Wraps the Win32 backend on Windows and `LinuxBackend` on Linux with
+    systemd, elsewhere calls are only recorded.
+    """
+    if sys.platform == "win32":
+        return RecordingBackend(WindowsBackend(), maxlen=1000)
+    if sys.platform.startswith("linux") and shutil.which("systemd-inhibit"):
+        return RecordingBackend(LinuxBackend(), maxlen=1000)
+    logger.info("No native backend available, OS calls are only recorded.")
+    return RecordingBackend(maxlen=1000)
@@ -1,7 +1,13 @@
 """CLI app implementation."""
+import functools
 import logging
+import os
+import subprocess
+import threading
+import typing
 
-from win_caffeine import screen_lock, utils
+from win_caffeine import activity, control, engine, fswatch, holds, power, schedules
+from win_caffeine import screen_lock, settings, store, utils, watch
 
 logger = logging.getLogger(__name__)
 
@@ -12,19 +18,270 @@ def progress_callback(msg: str):
     logger.info("Remaining time: %s", msg)
 
 
+def configure(
+    model: screen_lock.Model,
+    duration: int,
+    interval: int,
+    strategy: str,
+    auto_interval: bool = False,
+) -> int:
+    """Applies CLI arguments to the model.
+
+    Returns:
+        Index of the requested strategy.
+    """
+    model.duration_minutes = duration
+    model.interval_seconds = interval
+    model.is_auto_interval = auto_interval
+    model.is_duration_checked = duration > 0 and (interval > 0 or auto_interval)
+    return screen_lock.strategy_names.index(strategy)
+
+
+def describe_condition(args) -> str | None:
+    """Describes the condition ending the hold, None for a plain hold."""
+    if args.command:
+        return " ".join(args.command)
+    if args.while_pid:
+        return f"pid {args.while_pid}"
+    if args.until_exists:
+        return f"until {args.until_exists} exists"
+    if args.while_growing:
+        return f"while {args.while_growing} grows"
+    if args.while_active is not None:
+        return "while active"
+    return None
+
+
+def hold_condition(args) -> typing.Callable[[], int | None] | None:
+    """Blocking wait that returns once the hold should end.
+
+    The wrapped command is started here and its wait returns its exit code.
+
+    Raises:
+        OSError: The command, process, file or activity counters do not exist.
+        ValueError: Malformed activity thresholds.
+    """
+    if args.command:
+        return subprocess.Popen(args.command).wait
+    if args.while_pid:
+        pid = args.while_pid
+        if not watch.pid_exists(pid):
+            raise ProcessLookupError(f"No process {pid}.")
+        return lambda: watch.wait_pid(pid)
+    if args.until_exists:
+        return lambda: fswatch.wait_exists(args.until_exists)
+    if args.while_growing:
+        path = args.while_growing
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No file {path}.")
+        return lambda: fswatch.wait_idle(path, settings.FILE_IDLE_SECONDS)
+    if args.while_active is not None:
+        monitor = activity.ActivityMonitor(activity.Thresholds.parse(args.while_active))
+        logger.info("Holding while above %s.", monitor.thresholds)
+        return monitor.wait_idle
+    return None
+
+
+def handoff_handler(
+    model: screen_lock.Model, loop: engine.HeadlessLoop
+) -> typing.Callable[[dict], None]:
+    """Handler applying the arguments of a second cli launch to the session."""
+
+    def handoff(request: dict):
+        ndx = configure(
+            model,
+            request["duration"],
+            request["interval"],
+            request["strategy"],
+            request.get("auto_interval", False),
+        )
+        model.restart(ndx)
+
+    def on_handoff(request: dict):
+        if request["subcommand"] != "cli":
+            logger.info("Ignoring %s launch.", request["subcommand"])
+            return
+        # Called on the control thread, the session runs on the loop.
+        loop.call_soon_threadsafe(functools.partial(handoff, request))
+
+    return on_handoff
+
+
+class ConditionWaiter:
+    """Waits for the hold condition on a thread, then ends the hold."""
+
+    def __init__(
+        self,
+        condition: typing.Callable[[], int | None],
+        description: str | None,
+        on_end: typing.Callable[[], None],
+    ) -> None:
+        """Condition waiter.
+
+        Args:
+            condition: Blocking wait, see `hold_condition`.
+            description: Condition for the log, see `describe_condition`.
+            on_end: Called from the waiting thread once the wait returned.
+        """
+        self.condition = condition
+        self.description = description
+        self.on_end = on_end
+        # Exit code of the condition, 1 if waiting for it failed.
+        self.returncode = 0
+        self.thread = threading.Thread(target=self._wait, name="condition", daemon=True)
+
+    def _wait(self):
+        try:
+            self.returncode = self.condition() or 0
+            logger.info("Hold condition %s ended.", self.description)
+        except Exception:
+            logger.exception("Hold condition %s failed.", self.description)
+            self.returncode = 1
+        finally:
+            # Never leave the hold running once nothing watches the condition.
+            self.on_end()
+
+
+class Hold:
+    """Hold of the cli, kept until released, stopped or the condition ends."""
+
+    def __init__(
+        self, model: screen_lock.Model, policy: power.PowerPolicy | None
+    ) -> None:
+        """Cli hold.
+
+        Args:
+            model: Model to run the sessions of.
+            policy: Power policy to follow, None ignores the power source.
+        """
+        self.model = model
+        self.loop = engine.HeadlessLoop()
+        self.engine = engine.TimerEngine(model, self.loop)
+        self.leases = holds.HoldManager(model, self.loop, self.start_lease_hold)
+        self.guard: power.PowerGuard | None = None
+        if policy is not None:
+            self.guard = power.PowerGuard(model, policy, resume=self.post_start)
+            logger.info("Power policy: %s", policy)
+
+    def start(self, remaining: float | None = None):
+        """Starts a session unless one runs, on the loop thread."""
+        if self.model.is_running():
+            return
+        kwargs: dict = dict(progress_callback=progress_callback)
+        if remaining is not None:
+            kwargs["duration_seconds"] = remaining
+        self.engine.start(**kwargs)
+
+    def post_start(self, remaining: float | None):
+        """Starts a session from any thread, e.g. on AC power."""
+        self.loop.call_soon_threadsafe(functools.partial(self.start, remaining))
+
+    def start_lease_hold(self):
+        """Starts an untimed session for the leases, on the loop thread."""
+        if not self.model.is_running():
+            self.engine.start(timed=False, progress_callback=progress_callback)
+
+    def release(self):
+        """Ends the hold for good, on the loop thread."""
+        if self.guard is not None:
+            # Also while waiting for AC power.
+            self.guard.paused = False
+        if self.model.is_suspend_screen_lock_on:
+            self.model.release_screen_lock_suspend()
+
+    def post_release(self):
+        """Ends the hold for good from any thread."""
+        self.loop.call_soon_threadsafe(self.release)
+
+    def until(self) -> bool:
+        """Returns True once nothing holds and nothing will resume."""
+        if self.model.is_running() or self.leases:
+            return False
+        return not (self.guard is not None and self.guard.paused)
+
+    def run(self):
+        """Holds, serving control commands, until `until()`."""
+        with control.ControlServer(
+            self.model,
+            on_stop=self.post_release,
+            on_handoff=handoff_handler(self.model, self.loop),
+            leases=self.leases,
+        ):
+            self.start()
+            if self.guard is not None:
+                self.guard.start()
+            self.loop.run(until=self.until)
+            if self.guard is not None:
+                self.guard.close()
+
+
 def run(args) -> int:
-    """Run CLI app."""
+    """Run CLI app.
+
+    Returns:
+        Exit code, that of the wrapped command if any.
+    """
     model = screen_lock.model
-    model.duration_minutes = args.duration
-    model.interval_seconds = args.interval
-    model.is_duration_checked = args.duration > 0 and args.interval > 0
+    model.set_strategy(
+        configure(
+            model, args.duration, args.interval, args.strategy, args.auto_interval
+        )
+    )
     model.is_suspend_screen_lock_on = False
+    if args.schedule is not None:
+        specs = args.schedule or store.default_store().value(
+            "Schedule/rules", settings.SCHEDULES
+        )
+        return run_schedule(model, specs)
+    try:
+        condition = hold_condition(args)
+        policy = None if args.power is None else power.PowerPolicy.parse(args.power)
+    except (OSError, ValueError) as e:
+        logger.error("Cannot hold %s: %s", describe_condition(args), e)
+        return 1
+    if condition is not None:
+        # The condition decides when the hold ends, not a duration.
+        model.is_duration_checked = False
+    hold = Hold(model, policy)
+    waiter = None
+    if condition is not None:
+        waiter = ConditionWaiter(condition, describe_condition(args), hold.post_release)
+        waiter.thread.start()
+    hold.run()
+    logger.debug("Exiting cli.run.")
+    if waiter is None:
+        return 0
+    if args.command:
+        # A wrapper exits with its command, also if the hold was stopped.
+        waiter.thread.join()
+    return waiter.returncode
 
-    for ndx, strat in enumerate(screen_lock.strategies):
-        if strat.name == args.strategy:
-            model.set_strategy(ndx)
-            break
 
-    screen_lock.model.suspend_screen_lock(progress_callback=progress_callback)
-    logger.debug("Exiting cli.run.")
+def run_schedule(model: screen_lock.Model, specs: list[str]) -> int:
+    """Holds during the windows of the schedule rules until stopped.
+
+    Returns:
+        Exit code.
+    """
+    try:
+        rules = [schedules.Rule.parse(spec) for spec in specs]
+    except ValueError as e:
+        logger.error("Cannot follow schedule: %s", e)
+        return 1
+    if not rules:
+        logger.error("No schedule rules given or configured.")
+        return 1
+    loop = engine.HeadlessLoop()
+    calendar = schedules.Calendar(rules)
+    runner = schedules.CalendarRunner(
+        calendar, model, loop, progress_callback=progress_callback
+    )
+    logger.info("Following schedule %s.", ", ".join(map(str, rules)))
+
+    def on_stop():
+        loop.call_soon_threadsafe(runner.stop)
+
+    with control.ControlServer(model, on_stop=on_stop):
+        runner.start()
+        loop.run(until=lambda: runner.stopped and not model.is_running())
     return 0
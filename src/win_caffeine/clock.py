@@ -0,0 +1,114 @@
+"""Clock and sleeper abstraction used by the strategies and the scheduler."""
+import heapq
+import itertools
+import logging
+import threading
+import time
+import typing
+
+logger = logging.getLogger(__name__)
+
+
+class Clock(typing.Protocol):
+    def monotonic(self) -> float:
+        """Seconds on a clock that never goes backwards."""
+        ...
+
+    def time(self) -> float:
+        """Wall-clock seconds since the epoch."""
+        ...
+
+    def sleep(self, seconds: float):
+        """Blocks for `seconds`."""
+        ...
+
+    def wait(self, event: threading.Event, timeout: float | None = None) -> bool:
+        """Blocks until `event` is set or `timeout` elapses.
+
+        Returns:
+            True if the event is set.
+        """
+        ...
+
+
+class SystemClock:
+    """Real time, backed by the `time` module."""
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def time(self) -> float:
+        return time.time()
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+    def wait(self, event: threading.Event, timeout: float | None = None) -> bool:
+        return event.wait(timeout)
+
+
+class SimulatedClock:
+    """Virtual time that jumps straight to the next wakeup.
+
+    Nothing ever blocks: `sleep` and `wait` advance virtual time, running any
+    callbacks registered with `call_at` on the way. Callbacks stand in for other
+    threads, e.g. a user releasing the hold after five hours. Every `sleep` and
+    `wait` counts as one wakeup.
+    """
+
+    def __init__(self, start_time: float = 1_700_000_000.0) -> None:
+        self._monotonic = 0.0
+        self._wall_offset = start_time
+        self._calls: list = []
+        self._counter = itertools.count()
+        self.wakeups = 0
+
+    def monotonic(self) -> float:
+        return self._monotonic
+
+    def time(self) -> float:
+        return self._monotonic + self._wall_offset
+
+    def call_at(self, when: float, callback: typing.Callable[[], None]):
+        """Runs `callback` once monotonic time reaches `when`."""
+        heapq.heappush(self._calls, (when, next(self._counter), callback))
+
+    def call_later(self, delay: float, callback: typing.Callable[[], None]):
+        """Runs `callback` after `delay` seconds of virtual time."""
+        self.call_at(self._monotonic + delay, callback)
+
+    def suspend(self, seconds: float):
+        """Simulates system sleep: wall-clock time moves, monotonic does not."""
+        self._wall_offset += seconds
+
+    def advance(self, seconds: float):
+        """Moves virtual time forward, running due callbacks."""
+        self._run_until(self._monotonic + seconds, None)
+
+    def sleep(self, seconds: float):
+        self.wakeups += 1
+        self.advance(seconds)
+
+    def wait(self, event: threading.Event, timeout: float | None = None) -> bool:
+        self.wakeups += 1
+        if event.is_set():
+            return True
+        if timeout is None and not self._calls:
+            raise RuntimeError("Simulated wait would block forever.")
+        target = float("inf") if timeout is None else self._monotonic + timeout
+        return self._run_until(target, event)
+
+    def _run_until(self, target: float, event: threading.Event | None) -> bool:
+        while self._calls and self._calls[0][0] <= target:
+            when, _, callback = heapq.heappop(self._calls)
+            self._monotonic = max(self._monotonic, when)
+            callback()
+            if event is not None and event.is_set():
+                return True
+        if target == float("inf"):
+            raise RuntimeError("Simulated wait would block forever.")
+        self._monotonic = max(self._monotonic, target)
+        return event is not None and event.is_set()
+
+
+system_clock = SystemClock()
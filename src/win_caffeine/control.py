@@ -0,0 +1,372 @@
+"""Local control socket to query and steer the running instance.
+
+The running instance listens on a Unix domain socket in the per-user runtime
+directory, or on a localhost TCP port published in a file where Unix sockets are not
+available. Any local process can reach a TCP port, so the file also carries
+a random token that every request must present. Each connection carries one
+JSON request line and gets one JSON response line back.
+
+Commands that steer the hold run on the thread running the session, through
+`Model.call_soon`, since the OS keeps the execution state per thread.
+"""
+import errno
+import json
+import logging
+import os
+import socket
+import stat
+import tempfile
+import threading
+import typing
+
+from win_caffeine import screen_lock
+from win_caffeine import settings
+
+if typing.TYPE_CHECKING:
+    from win_caffeine import holds
+
+logger = logging.getLogger(__name__)
+
+HAS_UNIX_SOCKETS = hasattr(socket, "AF_UNIX")
+
+
+class ControlError(Exception):
+    """The running instance rejected a command."""
+
+
+def runtime_dir() -> str:
+    """Per-user directory only its owner can enter, created on demand.
+
+    `$XDG_RUNTIME_DIR` if set, else a 0700 directory in the temp directory.
+
+    Raises:
+        PermissionError: The directory belongs to another user or is open to
+            others.
+    """
+    base = os.environ.get("XDG_RUNTIME_DIR")
+    if base:
+        return base
+    path = os.path.join(tempfile.gettempdir(), f"{settings.APP_NAME}-{os.getuid()}")
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+        raise PermissionError(errno.EPERM, f"{path} is not owned by this user.")
+    if info.st_mode & 0o077:
+        raise PermissionError(errno.EPERM, f"{path} is open to other users.")
+    return path
+
+
+def socket_path() -> str:
+    """Path of the Unix domain control socket."""
+    return os.path.join(runtime_dir(), f"{settings.APP_NAME}.sock")
+
+
+def port_path() -> str:
+    """Path of the file publishing the TCP control port."""
+    return os.path.join(tempfile.gettempdir(), f"{settings.APP_NAME}.port")
+
+
+def connect(
+    timeout: float = settings.CONTROL_TIMEOUT_SECONDS,
+) -> tuple[socket.socket, str | None]:
+    """Connects to the running instance.
+
+    Returns:
+        The connected socket and the token requests need, None for none.
+
+    Raises:
+        ConnectionError: No instance is listening.
+    """
+    token = None
+    try:
+        if HAS_UNIX_SOCKETS:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            address: typing.Any = socket_path()
+        else:
+            with open(port_path()) as f:
+                port, token = f.read().split()
+            address = ("127.0.0.1", int(port))
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        sock.connect(address)
+    except (FileNotFoundError, ValueError, ConnectionRefusedError) as e:
+        raise ConnectionError("No running instance.") from e
+    return sock, token
+
+
+def request(
+    command: str, timeout: float = settings.CONTROL_TIMEOUT_SECONDS, **params
+) -> dict:
+    """Sends a command to the running instance and returns its response.
+
+    Raises:
+        ConnectionError: No instance is listening.
+        ControlError: The instance rejected the command.
+    """
+    sock, token = connect(timeout)
+    if token is not None:
+        params["token"] = token
+    with sock:
+        sock.sendall(json.dumps(dict(command=command, **params)).encode() + b"\n")
+        line = sock.makefile("rb").readline()
+    if not line:
+        raise ConnectionError("Running instance closed the connection.")
+    response = json.loads(line)
+    if not response.pop("ok"):
+        raise ControlError(response["error"])
+    return response
+
+
+class ControlServer:
+    """Serves control commands for a model on a background thread."""
+
+    def __init__(
+        self,
+        model: screen_lock.Model,
+        on_stop: typing.Callable[[], None] | None = None,
+        on_handoff: typing.Callable[[dict], None] | None = None,
+        leases: "holds.HoldManager | None" = None,
+    ) -> None:
+        """Control server.
+
+        Args:
+            model: Model to query and steer.
+            on_stop: Called after `stop` released the hold, e.g. to quit the GUI.
+            on_handoff: Called with the arguments of a second launch.
+            leases: Leases of other clients on `model`, None rejects them.
+                Closed with the server.
+        """
+        self.model = model
+        self.on_stop = on_stop
+        self.on_handoff = on_handoff
+        self.commands: dict[str, typing.Callable[[dict], dict]] = {
+            "status": self.status,
+            "stop": self.stop,
+            "extend": self.extend,
+            "set-strategy": self.set_strategy,
+            "handoff": self.handoff,
+            "acquire": self.acquire,
+            "release": self.release,
+        }
+        self.holds = leases
+        # Secret that requests over TCP must carry, None over a Unix socket.
+        self.token: str | None = None
+        self._sock: socket.socket | None = None
+        self._closing = False
+        self._threads: set[threading.Thread] = set()
+
+    def __enter__(self) -> "ControlServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def dispatch(self, request: dict) -> dict:
+        """Runs a decoded request and returns the response to send."""
+        if self.token is not None:
+            import hmac
+
+            if not hmac.compare_digest(str(request.pop("token", "")), self.token):
+                raise PermissionError("Invalid control token.")
+        handler = self.commands.get(request.get("command", ""))
+        if handler is None:
+            raise ValueError(f"Unknown command {request.get('command')!r}.")
+        return dict(ok=True, **handler(request))
+
+    def status(self, request: dict) -> dict:
+        """Reports the state of the running instance."""
+        del request  # unused
+        return dict(
+            pid=os.getpid(),
+            suspended=self.model.is_suspend_screen_lock_on,
+            strategy=self.model.strategy.name,
+            duration_minutes=self.model.duration_minutes,
+            interval_seconds=self.model.interval_seconds,
+            remaining_seconds=self.model.remaining_seconds(),
+            leases=len(self.holds) if self.holds else 0,
+            counters=dict(getattr(self.model.strategy.impl, "counters", {})),
+        )
+
+    def call_in_session(self, callback: typing.Callable[[], typing.Any]) -> typing.Any:
+        """Runs `callback` on the thread running the session, returns its result.
+
+        Raises:
+            TimeoutError: The session thread did not run it in time.
+        """
+        done = threading.Event()
+        result: dict[str, typing.Any] = {}
+
+        def run():
+            try:
+                result["value"] = callback()
+            except Exception as e:
+                result["error"] = e
+            finally:
+                done.set()
+
+        self.model.call_soon(run)
+        if not done.wait(settings.CONTROL_TIMEOUT_SECONDS):
+            raise TimeoutError("The running instance did not respond.")
+        if "error" in result:
+            raise result["error"]
+        return result.get("value")
+
+    def stop(self, request: dict) -> dict:
+        """Releases the hold and waits for the session to end."""
+        del request  # unused
+        if self.holds is not None:
+            # Otherwise the outstanding leases would take the hold again.
+            self.holds.clear()
+
+        def release():
+            if self.model.is_suspend_screen_lock_on:
+                self.model.release_screen_lock_suspend("stopped")
+
+        self.call_in_session(release)
+        if self.on_stop:
+            self.on_stop()
+        stopped = self.model.wait_until_idle(settings.STOP_TIMEOUT_SECONDS)
+        return dict(pid=os.getpid(), stopped=stopped)
+
+    def extend(self, request: dict) -> dict:
+        """Moves the deadline of the running timed hold."""
+        seconds = float(request["minutes"]) * settings.MINUTE
+        remaining = self.call_in_session(lambda: self.model.extend(seconds))
+        return dict(remaining_seconds=remaining)
+
+    def set_strategy(self, request: dict) -> dict:
+        """Switches strategy, moving a running hold over to it."""
+        name = request["strategy"]
+        if name not in screen_lock.strategy_names:
+            raise ValueError(f"Unknown strategy {name!r}.")
+        ndx = screen_lock.strategy_names.index(name)
+        self.call_in_session(lambda: self.model.switch_strategy(ndx))
+        return dict(strategy=name)
+
+    def handoff(self, request: dict) -> dict:
+        """Applies the arguments of a second launch to this instance."""
+        if self.on_handoff is None:
+            raise ValueError("This instance does not accept handoffs.")
+        self.on_handoff(request)
+        return dict(pid=os.getpid())
+
+    def acquire(self, request: dict) -> dict:
+        """Adds a client lease, shared with all other leases."""
+        if self.holds is None:
+            raise ValueError("This instance does not accept leases.")
+        minutes = request.get("minutes")
+        lease = self.holds.acquire(
+            request.get("owner", "unknown"),
+            minutes * settings.MINUTE if minutes else None,
+        )
+        return dict(lease=lease.id, leases=len(self.holds))
+
+    def release(self, request: dict) -> dict:
+        """Ends a client lease."""
+        if self.holds is None or not self.holds.release(int(request["lease"])):
+            raise ValueError(f"Unknown lease {request['lease']!r}.")
+        return dict(leases=len(self.holds))
+
+    def start(self):
+        """Binds the control socket and starts serving.
+
+        The instance keeps running without control if the socket cannot be
+        bound, e.g. because another instance serves it.
+        """
+        try:
+            sock = self._bind()
+        except OSError as e:
+            logger.error("Control server unavailable: %s", e)
+            return
+        self._sock = sock
+        threading.Thread(target=self._serve, name="control", daemon=True).start()
+        logger.debug("Control server listening on %s", sock.getsockname())
+
+    def close(self):
+        """Stops serving and lets in-flight responses finish."""
+        if self._sock is None:
+            return
+        self._closing = True
+        # Wake up the blocking accept.
+        try:
+            connect()[0].close()
+        except OSError:
+            pass
+        self._sock.close()
+        self._sock = None
+        for thread in list(self._threads):
+            thread.join(settings.CONTROL_TIMEOUT_SECONDS)
+        if self.holds is not None:
+            self.holds.close()
+        path = socket_path() if HAS_UNIX_SOCKETS else port_path()
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _bind(self) -> socket.socket:
+        if HAS_UNIX_SOCKETS:
+            path = socket_path()
+            if os.path.exists(path):
+                try:
+                    connect()[0].close()
+                except ConnectionError:
+                    # Left behind by an instance that did not exit cleanly.
+                    os.remove(path)
+                else:
+                    raise OSError(errno.EADDRINUSE, f"{path} is served already.")
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            address: typing.Any = path
+        else:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            address = ("127.0.0.1", 0)
+        try:
+            # Create the socket file private to the user, not chmod it after.
+            umask = os.umask(0o177)
+            try:
+                sock.bind(address)
+            finally:
+                os.umask(umask)
+            if not HAS_UNIX_SOCKETS:
+                self.token = os.urandom(16).hex()
+                port = sock.getsockname()[1]
+                flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+                with os.fdopen(os.open(port_path(), flags, 0o600), "w") as f:
+                    f.write(f"{port} {self.token}")
+            sock.listen()
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def _serve(self):
+        sock = self._sock
+        while sock is not None:
+            try:
+                conn, _ = sock.accept()
+            except OSError:
+                return
+            if self._closing:
+                conn.close()
+                return
+            thread = threading.Thread(target=self._handle, args=(conn,), daemon=True)
+            self._threads.add(thread)
+            thread.start()
+
+    def _handle(self, conn: socket.socket):
+        try:
+            with conn:
+                conn.settimeout(settings.CONTROL_TIMEOUT_SECONDS)
+                line = conn.makefile("rb").readline()
+                try:
+                    response = self.dispatch(json.loads(line))
+                except Exception as e:
+                    logger.debug("Control command failed.", exc_info=e)
+                    response = dict(ok=False, error=str(e))
+                conn.sendall(json.dumps(response).encode() + b"\n")
+        except OSError as e:
+            logger.debug("Control connection failed.", exc_info=e)
+        finally:
+            self._threads.discard(threading.current_thread())
@@ -23,6 +23,8 @@ class LabeledSpinbox(qt.QWidget):
         self.spin_box = qt.QSpinBox()
         self.spin_box.setMaximum(max_value)
         self.spin_box.setMinimum(min_value)
+        # Report typed values once committed, not on every keystroke.
+        self.spin_box.setKeyboardTracking(False)
         layout.addWidget(self.label)
         layout.addWidget(self.spin_box)
         self.setLayout(layout)
@@ -44,9 +46,16 @@ class LabeledSpinbox(qt.QWidget):
 class DurationModel(typing.Protocol):
     duration_minutes: int
     interval_seconds: int
+    is_auto_interval: bool
+
+    def refresh_interval(self) -> int:
+        ...
 
 
 class DurationWidget(qt.QWidget):
+    # Emitted after the model took a new value from the widget.
+    changed = qt.Signal()
+
     def __init__(self, model: DurationModel, parent: qt.QWidget | None = None) -> None:
         super().__init__(parent)
         self._model = model
@@ -58,29 +67,51 @@ class DurationWidget(qt.QWidget):
         self.interval = LabeledSpinbox(
             "Refresh interval (sec)", value=0, orientation=qt.Qt.Horizontal
         )
+        self.auto_interval = qt.QCheckBox("Auto")
+        self.auto_interval.setToolTip("Derive the interval from the lock timeout")
+        interval_layout = qt.QHBoxLayout()
+        interval_layout.addWidget(self.interval)
+        interval_layout.addWidget(self.auto_interval)
         layout = qt.QVBoxLayout()
         layout.addWidget(self.checkbox)
         layout.addWidget(self.duration)
-        layout.addWidget(self.interval)
+        layout.addLayout(interval_layout)
         self.setLayout(layout)
         self.duration.spin_box.valueChanged.connect(self.on_duration_changed)
         self.interval.spin_box.valueChanged.connect(self.on_interval_changed)
+        self.auto_interval.stateChanged.connect(self.on_auto_interval_changed)
 
     def setEnabled(self, enabled: bool):
         self.duration.setEnabled(enabled)
-        self.interval.setEnabled(enabled)
+        self.interval.setEnabled(enabled and not self._model.is_auto_interval)
+        self.auto_interval.setEnabled(enabled)
         super().setEnabled(enabled)
 
     def on_enable_duration_changed(self, state: qt.Qt.CheckState):
         enabled = state == qt.Qt.CheckState.Checked
         self.duration.setEnabled(enabled)
-        self.interval.setEnabled(enabled)
+        self.interval.setEnabled(enabled and not self._model.is_auto_interval)
+        self.auto_interval.setEnabled(enabled)
+
+    def on_auto_interval_changed(self, state: qt.Qt.CheckState):
+        auto = state == qt.Qt.CheckState.Checked
+        self._model.is_auto_interval = auto
+        self.interval.setEnabled(self.checkbox.isChecked() and not auto)
+        # Show the computed interval without overwriting the manual one.
+        self.interval.spin_box.blockSignals(True)
+        self.interval.setValue(self._model.refresh_interval())
+        self.interval.spin_box.blockSignals(False)
+        self.changed.emit()
 
     def on_duration_changed(self, value):
-        self._model.duration_minutes = value
+        if value != self._model.duration_minutes:
+            self._model.duration_minutes = value
+            self.changed.emit()
 
     def on_interval_changed(self, value):
-        self._model.interval_seconds = value
+        if value != self._model.interval_seconds:
+            self._model.interval_seconds = value
+            self.changed.emit()
 
 
 class RadioButtonGroup(qt.QWidget):
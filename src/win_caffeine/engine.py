@@ -0,0 +1,231 @@
+"""Timer-driven hold sessions that run on an event loop instead of a thread.
+
+`TimerEngine` runs the same sessions as `screen_lock.Model.suspend_screen_lock`,
+but each wakeup is a timer callback on the caller's event loop: the Qt loop in
+the GUI, `HeadlessLoop` in the CLI. No thread is parked for the session. The
+hold is taken and refreshed on the loop thread, and since the OS keeps the
+execution state per thread, releases and restarts from other threads are
+posted there too, through `Model.call_soon`.
+"""
+import collections
+import heapq
+import itertools
+import logging
+import threading
+import typing
+
+from win_caffeine import screen_lock
+from win_caffeine.clock import Clock, system_clock
+
+logger = logging.getLogger(__name__)
+
+
+class TimerHandle(typing.Protocol):
+    def cancel(self):
+        """Cancels the timer unless it already fired."""
+        ...
+
+
+class Loop(typing.Protocol):
+    """Event loop running the engine, e.g. `asyncio` or `qloop.QtLoop`."""
+
+    def call_later(
+        self, delay: float, callback: typing.Callable[[], None]
+    ) -> TimerHandle:
+        """Runs `callback` on the loop thread after `delay` seconds."""
+        ...
+
+    def call_soon_threadsafe(self, callback: typing.Callable[[], None]):
+        """Runs `callback` on the loop thread, may be called from any thread."""
+        ...
+
+
+class Timer:
+    """Handle of a `HeadlessLoop` timer."""
+
+    def __init__(self, when: float, callback: typing.Callable[[], None]) -> None:
+        self.when = when
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class HeadlessLoop:
+    """Single-threaded timer loop for running the engine without Qt.
+
+    Timers sit in a heap and cancelled ones are dropped lazily. Between timers
+    the loop blocks on the clock, so a `SimulatedClock` runs it in virtual time.
+    """
+
+    def __init__(self, clock: Clock | None = None) -> None:
+        self.clock = clock or system_clock
+        self._timers: list[tuple[float, int, Timer]] = []
+        self._counter = itertools.count()
+        self._posted: typing.Deque[typing.Callable[[], None]] = collections.deque()
+        self._woken = threading.Event()
+
+    def call_later(self, delay: float, callback: typing.Callable[[], None]) -> Timer:
+        timer = Timer(self.clock.monotonic() + delay, callback)
+        heapq.heappush(self._timers, (timer.when, next(self._counter), timer))
+        return timer
+
+    def call_soon_threadsafe(self, callback: typing.Callable[[], None]):
+        self._posted.append(callback)
+        self._woken.set()
+
+    def run(self, until: typing.Callable[[], bool]):
+        """Runs posted callbacks and due timers until `until()` is True."""
+        while True:
+            self._woken.clear()
+            while self._posted:
+                self._posted.popleft()()
+            while self._timers and self._timers[0][0] <= self.clock.monotonic():
+                _, _, timer = heapq.heappop(self._timers)
+                if not timer.cancelled:
+                    timer.callback()
+            if until():
+                return
+            self.clock.wait(self._woken, self._next_timeout())
+
+    def _next_timeout(self) -> float | None:
+        while self._timers and self._timers[0][2].cancelled:
+            heapq.heappop(self._timers)
+        if not self._timers:
+            return None
+        return max(self._timers[0][0] - self.clock.monotonic(), 0.0)
+
+
+class TimerEngine:
+    """Runs hold sessions of a model as timer callbacks on a loop."""
+
+    def __init__(
+        self,
+        model: screen_lock.Model,
+        loop: Loop,
+        on_finished: typing.Callable[[], None] | None = None,
+    ) -> None:
+        """Timer engine.
+
+        Args:
+            model: Model holding the settings and suspend state.
+            loop: Loop to schedule the wakeups on.
+            on_finished: Called on the loop thread when a session ends.
+        """
+        self.model = model
+        self.loop = loop
+        self.on_finished = on_finished
+        self._kwargs: dict = {}
+        self._timed: bool | None = None
+        self._ticker: screen_lock.HoldTicker | None = None
+        self._steps: screen_lock.Steps | None = None
+        self._timer: TimerHandle | None = None
+
+    def start(self, **kwargs):
+        """Starts a session on the loop thread, returns once the hold is in place.
+
+        Args:
+            progress_callback: Called on the loop thread with the remaining
+                seconds of a timed hold.
+            duration_seconds: Session length, defaults to model.duration_minutes.
+            timed: Overrides model.is_duration_checked, e.g. False for leases.
+        """
+        if self.model.is_running():
+            raise RuntimeError("A hold session is already running.")
+        self._timed = kwargs.pop("timed", None)
+        self._kwargs = kwargs
+        self.model.wakeup_callback = self._post_wakeup
+        self.model.session_loop = (
+            threading.get_ident(),
+            self.loop.call_soon_threadsafe,
+        )
+        self.model.begin_session(self._timed)
+        self._start_hold()
+
+    def stop(self):
+        """Releases the hold and ends its session at once, on the loop thread.
+
+        For shutdown, when the tick that a release posts would never run.
+        """
+        if self._ticker is None:
+            return
+        if self.model.is_suspend_screen_lock_on:
+            self.model.release_screen_lock_suspend()
+        self._tick()
+
+    def _start_hold(self):
+        model = self.model
+        timed = model.is_duration_checked if self._timed is None else self._timed
+        hold = model.strategy.impl.hold(model, timed, **self._kwargs)
+        progress_callback = self._kwargs.get("progress_callback") if timed else None
+        model.set_suspended(True)
+        self._ticker = screen_lock.HoldTicker(model, hold, progress_callback)
+        self._tick()
+
+    def _post_wakeup(self):
+        self.loop.call_soon_threadsafe(self._on_wakeup)
+
+    def _on_wakeup(self):
+        if self._steps is not None and self.model.is_suspend_screen_lock_on:
+            # The step timer is still pending.
+            return
+        self._tick()
+
+    def _tick(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        ticker = self._ticker
+        if ticker is None:
+            return
+        try:
+            if self._run_steps():
+                return
+            if not self.model.is_suspend_screen_lock_on:
+                self._finish_hold(expired=False)
+                return
+            if not ticker.tick():
+                self._finish_hold(expired=True)
+                return
+            self._steps = ticker.steps
+            if self._run_steps():
+                return
+        except Exception as e:
+            logger.error("Hold session failed.", exc_info=e)
+            self.model.end_reason = "failed"
+            self.model.set_suspended(False)
+            self._finish_hold(expired=False)
+            return
+        timeout = ticker.next_timeout()
+        if timeout is not None:
+            self._timer = self.loop.call_later(timeout, self._tick)
+
+    def _run_steps(self) -> bool:
+        """Runs refresh steps up to the next delay.
+
+        Returns:
+            True if a step timer is pending.
+        """
+        if self._steps is None:
+            return False
+        for delay in self._steps:
+            if self.model.is_suspend_screen_lock_on:
+                self._timer = self.loop.call_later(delay, self._tick)
+                return True
+        self._steps = None
+        return False
+
+    def _finish_hold(self, expired: bool):
+        model = self.model
+        self._ticker = None
+        if expired:
+            model.strategy.impl.release_screen_lock_suspend(model)
+        if model.take_restart(self._kwargs):
+            self._start_hold()
+            return
+        model.wakeup_callback = None
+        model.session_loop = None
+        model.end_session()
+        if self.on_finished is not None:
+            self.on_finished()
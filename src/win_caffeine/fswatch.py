@@ -0,0 +1,220 @@
+"""File triggers through OS change notifications.
+
+Paths are watched with inotify on Linux and with directory change
+notifications on Windows, so waiting costs nothing until the file changes and
+a change is seen within milliseconds. Elsewhere the path is polled.
+"""
+import ctypes
+import errno
+import logging
+import os
+import select
+import sys
+import time
+import typing
+
+from win_caffeine import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Changes(typing.Protocol):
+    def wait(self, timeout: float | None = None) -> bool:
+        """Blocks until the watched path changes.
+
+        Returns:
+            False on timeout.
+        """
+        ...
+
+    def close(self):
+        """Stops watching."""
+        ...
+
+
+def signature(path: str) -> tuple[int, int] | None:
+    """Size and modification time of `path`, None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class InotifyChanges:
+    """Changes reported by inotify(7), read through libc."""
+
+    IN_MODIFY = 0x00000002
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_CLOEXEC = 0o2000000
+    BUFFER_SIZE = 64 * 1024
+
+    def __init__(self, path: str, contents: bool) -> None:
+        """Inotify watch.
+
+        Args:
+            path: Path to watch.
+            contents: Watches writes to the file, else entries of its directory.
+        """
+        libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = libc.inotify_init1(self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if contents:
+            target = path
+            mask = self.IN_MODIFY | self.IN_DELETE_SELF | self.IN_MOVE_SELF
+        else:
+            target = os.path.dirname(os.path.abspath(path))
+            mask = self.IN_CREATE | self.IN_DELETE
+            mask |= self.IN_MOVED_TO | self.IN_MOVED_FROM
+        if libc.inotify_add_watch(self.fd, os.fsencode(target), mask) < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, os.strerror(error), target)
+        self._poller = select.poll()
+        self._poller.register(self.fd, select.POLLIN)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        if not self._poller.poll(None if timeout is None else timeout * 1000):
+            return False
+        # Drain the queue, a burst of writes counts as one change.
+        os.read(self.fd, self.BUFFER_SIZE)
+        return True
+
+    def close(self):
+        os.close(self.fd)
+
+
+class WindowsChanges:
+    """Changes reported by FindFirstChangeNotification on the directory.
+
+    Notifications cover the whole directory, so the file signature tells
+    whether the watched path itself changed.
+    """
+
+    FILE_NOTIFY_CHANGE_FILE_NAME = 0x00000001
+    FILE_NOTIFY_CHANGE_SIZE = 0x00000008
+    FILE_NOTIFY_CHANGE_LAST_WRITE = 0x00000010
+    WAIT_OBJECT_0 = 0
+    INFINITE = 0xFFFFFFFF
+    INVALID_HANDLE_VALUE = ctypes.c_void_p(-1).value
+
+    def __init__(self, path: str, contents: bool) -> None:
+        self.path = path
+        self.contents = contents
+        self.kernel32 = ctypes.windll.kernel32
+        self.kernel32.FindFirstChangeNotificationW.restype = ctypes.c_void_p
+        flags = self.FILE_NOTIFY_CHANGE_FILE_NAME
+        if contents:
+            flags |= self.FILE_NOTIFY_CHANGE_SIZE | self.FILE_NOTIFY_CHANGE_LAST_WRITE
+        directory = os.path.dirname(os.path.abspath(path))
+        self.handle = self.kernel32.FindFirstChangeNotificationW(
+            directory, False, flags
+        )
+        if self.handle in (None, self.INVALID_HANDLE_VALUE):
+            raise ctypes.WinError()
+        self._signature = self._current()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = self.INFINITE
+            if deadline is not None:
+                remaining = max(round((deadline - time.monotonic()) * 1000), 0)
+            result = self.kernel32.WaitForSingleObject(
+                ctypes.c_void_p(self.handle), remaining
+            )
+            if result != self.WAIT_OBJECT_0:
+                return False
+            self.kernel32.FindNextChangeNotification(ctypes.c_void_p(self.handle))
+            current = self._current()
+            if current != self._signature:
+                self._signature = current
+                return True
+
+    def close(self):
+        self.kernel32.FindCloseChangeNotification(ctypes.c_void_p(self.handle))
+
+    def _current(self) -> typing.Any:
+        if self.contents:
+            return signature(self.path)
+        return os.path.exists(self.path)
+
+
+class PollingChanges:
+    """Fallback comparing the file signature every few seconds."""
+
+    def __init__(self, path: str, contents: bool) -> None:
+        del contents  # unused
+        self.path = path
+        self._signature = signature(path)
+        logger.debug("No change notifications, polling %s.", path)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = signature(self.path)
+            if current != self._signature:
+                self._signature = current
+                return True
+            delay: float = settings.FILE_POLL_SECONDS
+            if deadline is not None:
+                delay = min(delay, deadline - time.monotonic())
+                if delay <= 0:
+                    return False
+            time.sleep(delay)
+
+    def close(self):
+        pass
+
+
+def watch(path: str, contents: bool = True) -> Changes:
+    """Watches `path` with the best notification API available.
+
+    Args:
+        path: Path to watch.
+        contents: Reports writes to the file, else only its creation or removal.
+    """
+    if sys.platform == "win32":
+        return WindowsChanges(path, contents)
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyChanges(path, contents)
+        except AttributeError:
+            pass  # libc without inotify
+        except OSError as e:
+            # Out of inotify instances or watches, poll instead.
+            if e.errno not in (errno.ENOSYS, errno.EMFILE, errno.ENOSPC):
+                raise
+    return PollingChanges(path, contents)
+
+
+def wait_exists(path: str):
+    """Blocks until `path` exists."""
+    changes = watch(path, contents=False)
+    try:
+        while not os.path.exists(path):
+            changes.wait()
+    finally:
+        changes.close()
+
+
+def wait_idle(path: str, idle_seconds: float):
+    """Blocks until `path` was not written for `idle_seconds`, or is removed.
+
+    Raises:
+        FileNotFoundError: `path` does not exist.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+    changes = watch(path)
+    try:
+        while changes.wait(idle_seconds) and os.path.exists(path):
+            pass
+    finally:
+        changes.close()
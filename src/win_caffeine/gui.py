@@ -1,29 +1,65 @@
 """GUI app implementation."""
+import logging
+import time
+
 import qdarktheme  # type: ignore
 
+from win_caffeine import control
+from win_caffeine import holds
 from win_caffeine import qt
+from win_caffeine import screen_lock
 from win_caffeine import settings
 from win_caffeine import theme
 from win_caffeine import main_window
 
+logger = logging.getLogger(__name__)
+
+
+class FirstPaintLogger(qt.QObject):
+    """Logs when a widget is painted for the first time, then stops watching."""
+
+    def __init__(self, widget: qt.QWidget, started: float) -> None:
+        """First paint logger.
+
+        Args:
+            widget: Widget to watch, its first paint event is logged.
+            started: `time.perf_counter()` at app start.
+        """
+        super().__init__(widget)
+        self.started = started
+        widget.installEventFilter(self)
+
+    def eventFilter(self, watched: qt.QObject, event: qt.QEvent) -> bool:
+        if event.type() == qt.QEvent.Paint:
+            watched.removeEventFilter(self)
+            logger.debug(
+                "First paint %.0f ms after start.",
+                (time.perf_counter() - self.started) * 1000,
+            )
+        return False
+
 
 def run(args) -> int:
     """Run GUI app."""
 
     del args  # unused
+    started = time.perf_counter()
     # Enable HiDPI.
     qdarktheme.enable_hi_dpi()
 
     # Create the application
     app = qt.QApplication([])
     theme.set_theme("auto", app)
+    # Decode all icons up front, so that state and theme changes read no files.
+    theme.icons.preload()
 
     # Create the main window
     window = main_window.MainWindow()
 
     # Create the system tray icon
-    tray_icon = qt.QSystemTrayIcon(qt.QIcon(theme.icon_path.coffee_on), parent=app)
+    tray_icon = qt.QSystemTrayIcon(window.toggle_button.icon(), parent=app)
     tray_icon.setToolTip(window.windowTitle())
+    window.state_icon_changed.connect(tray_icon.setIcon)
 
     # Create the system tray menu
     tray_menu = qt.QMenu()
@@ -31,7 +67,8 @@ def run(args) -> int:
     tray_menu.addAction("Exit", window.on_quit)  # Quit the application
     tray_icon.setContextMenu(tray_menu)
 
-    # Show the main window
+    # Show the main window, logging the startup time once it is painted
+    FirstPaintLogger(window, started)
     window.show()
     # Tray icon to minimize to system tray
     tray_icon.show()
@@ -41,5 +78,13 @@ def run(args) -> int:
 
     app.setQuitOnLastWindowClosed(False)
 
-    # Start the application event loop
-    return app.exec_()
+    # Start the application event loop, serving control commands meanwhile
+    with control.ControlServer(
+        screen_lock.model,
+        on_stop=window.stop_requested.emit,
+        on_handoff=window.handoff_requested.emit,
+        leases=holds.HoldManager(
+            screen_lock.model, window.engine.loop, window.on_lease_hold
+        ),
+    ):
+        return app.exec_()
@@ -0,0 +1,238 @@
+"""Append-only session history in SQLite, with usage statistics.
+
+Every hold session of the app model is appended as one row when it ends. The
+database runs in WAL mode, so an append is a short sequential write and a
+`history` query never blocks the running instance. The table keeps the latest
+`settings.HISTORY_MAX_SESSIONS` sessions, older ones are dropped as new ones
+come in.
+"""
+import collections
+import datetime
+import logging
+import os
+import sys
+import threading
+import time
+import typing
+
+from win_caffeine import settings
+
+if typing.TYPE_CHECKING:
+    import sqlite3
+
+logger = logging.getLogger(__name__)
+
+# One ended session: wall-clock start, length, strategy at the end, why it
+# ended (expired, released, stopped, failed, battery or schedule) and the
+# requested length of a timed session.
+Session = collections.namedtuple(
+    "Session",
+    ["started", "duration_seconds", "strategy", "reason", "requested_seconds"],
+)
+
+# Sessions of one strategy: count, total and percentile lengths in seconds and
+# counts by end reason.
+Stats = collections.namedtuple(
+    "Stats", ["strategy", "sessions", "total", "median", "p90", "reasons"]
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    duration_seconds REAL NOT NULL,
+    strategy TEXT NOT NULL,
+    reason TEXT NOT NULL,
+    requested_seconds REAL
+);
+CREATE INDEX IF NOT EXISTS sessions_started ON sessions (started);
+"""
+
+
+def default_path() -> str:
+    """History file in the per-user state directory."""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_STATE_HOME") or os.path.expanduser("~/.local/state")
+    return os.path.join(base, settings.APP_NAME, settings.HISTORY_FILE_NAME)
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of sorted `values`."""
+    if not values:
+        return 0.0
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+
+class History:
+    """Session store, opened on first use."""
+
+    def __init__(
+        self,
+        path: str | None = None,
+        max_sessions: int = settings.HISTORY_MAX_SESSIONS,
+    ) -> None:
+        """Session history.
+
+        Args:
+            path: Database file, defaults to `settings.HISTORY_PATH` or else
+                `default_path()`.
+            max_sessions: Sessions to keep, older ones are dropped.
+        """
+        self.path = path or settings.HISTORY_PATH or default_path()
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._db: "sqlite3.Connection | None" = None
+
+    def record(self, session: Session):
+        """Appends a session, errors are logged and never raised."""
+        # Imported here so that commands without history do not pay for it.
+        import sqlite3
+
+        try:
+            with self._lock:
+                db = self._connect()
+                with db:
+                    cursor = db.execute(
+                        "INSERT INTO sessions (started, duration_seconds, strategy,"
+                        " reason, requested_seconds) VALUES (?, ?, ?, ?, ?)",
+                        session,
+                    )
+                    # Set after every successful INSERT.
+                    assert cursor.lastrowid is not None
+                    # Ids only grow, so this drops the oldest sessions.
+                    db.execute(
+                        "DELETE FROM sessions WHERE id <= ?",
+                        (cursor.lastrowid - self.max_sessions,),
+                    )
+        except (OSError, sqlite3.Error) as e:
+            logger.error("Could not record session in %s: %s", self.path, e)
+
+    def sessions(self, since: float = 0.0) -> list[Session]:
+        """Sessions started at or after `since`, oldest first."""
+        with self._lock:
+            db = self._open_existing()
+            if db is None:
+                return []
+            rows = db.execute(
+                "SELECT started, duration_seconds, strategy, reason,"
+                " requested_seconds FROM sessions WHERE started >= ? ORDER BY id",
+                (since,),
+            )
+            return [Session(*row) for row in rows]
+
+    def stats(self, since: float = 0.0) -> list[Stats]:
+        """Aggregates the sessions started at or after `since` by strategy."""
+        with self._lock:
+            db = self._open_existing()
+            if db is None:
+                return []
+            reasons: dict[str, dict[str, int]] = collections.defaultdict(dict)
+            for strategy, reason, count in db.execute(
+                "SELECT strategy, reason, COUNT(*) FROM sessions"
+                " WHERE started >= ? GROUP BY strategy, reason",
+                (since,),
+            ):
+                reasons[strategy][reason] = count
+            durations: dict[str, list[float]] = collections.defaultdict(list)
+            for strategy, duration in db.execute(
+                "SELECT strategy, duration_seconds FROM sessions"
+                " WHERE started >= ? ORDER BY strategy, duration_seconds",
+                (since,),
+            ):
+                durations[strategy].append(duration)
+        return [
+            Stats(
+                strategy,
+                len(values),
+                sum(values),
+                percentile(values, 0.5),
+                percentile(values, 0.9),
+                reasons[strategy],
+            )
+            for strategy, values in durations.items()
+        ]
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _open_existing(self) -> "sqlite3.Connection | None":
+        """Database for queries, None while no session was ever recorded."""
+        if self._db is None and not os.path.exists(self.path):
+            return None
+        return self._connect()
+
+    def _connect(self) -> "sqlite3.Connection":
+        import sqlite3
+
+        if self._db is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            # WAL stays consistent without a sync per append.
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(SCHEMA)
+            self._db = db
+        return self._db
+
+
+def format_seconds(seconds: float) -> str:
+    """Formats e.g. `1h05m`, `12m` or `40s`."""
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    minutes = round(seconds / 60)
+    if minutes < 60:
+        return f"{minutes}m"
+    return f"{minutes // 60}h{minutes % 60:02d}m"
+
+
+def run(args) -> int:
+    """Prints session statistics of the last `args.days` days.
+
+    Returns:
+        Exit code.
+    """
+    # Imported here, like in `History`, to keep other commands light.
+    import sqlite3
+
+    since = time.time() - args.days * 24 * settings.HOUR * settings.MINUTE
+    store = History()
+    try:
+        stats = store.stats(since)
+    except (OSError, sqlite3.Error) as e:
+        logger.error("Cannot read history %s: %s", store.path, e)
+        return 1
+    finally:
+        store.close()
+    start = datetime.date.fromtimestamp(since)
+    total = sum(row.total for row in stats)
+    print(
+        f"Sessions since {start}: {sum(row.sessions for row in stats)},"
+        f" {format_seconds(total)} held"
+    )
+    if not stats:
+        return 0
+    reasons = sorted({reason for row in stats for reason in row.reasons})
+    header = ["strategy", "sessions", "total", "median", "p90", *reasons]
+    table = [header]
+    for row in stats:
+        table.append(
+            [
+                row.strategy,
+                str(row.sessions),
+                format_seconds(row.total),
+                format_seconds(row.median),
+                format_seconds(row.p90),
+                *(str(row.reasons.get(reason, 0)) for reason in reasons),
+            ]
+        )
+    columns = range(len(header))
+    widths = [max(len(line[column]) for line in table) for column in columns]
+    for line in table:
+        cells = (cell.ljust(width) for cell, width in zip(line, widths))
+        print("  ".join(cells).rstrip())
+    return 0
@@ -0,0 +1,201 @@
+"""Reference-counted holds shared by many clients."""
+import dataclasses
+import heapq
+import itertools
+import logging
+import threading
+import typing
+
+from win_caffeine import screen_lock
+from win_caffeine.clock import Clock, system_clock
+
+if typing.TYPE_CHECKING:
+    from win_caffeine import engine
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass
+class Lease:
+    """One client's claim on the hold."""
+
+    id: int
+    owner: str
+    deadline: float | None = None
+
+
+class HoldManager:
+    """Merges client leases into the hold session of the instance.
+
+    While any lease is outstanding, a session holds: the leases join a running
+    one, or start an untimed one on the instance's loop, which then follows
+    strategy switches like any other. If the session ends while leases
+    remain, e.g. a timed one expires, another untimed one is started; the last
+    lease releases only a session the leases started. All session changes run
+    on the loop thread, so acquire and release never wait for them.
+
+    Lease deadlines sit in a heap, so finding the next expiry is O(log n);
+    entries of released or extended leases are dropped lazily when they reach
+    the top.
+    """
+
+    def __init__(
+        self,
+        model: screen_lock.Model,
+        loop: "engine.Loop",
+        start_hold: typing.Callable[[], None],
+        clock: Clock | None = None,
+    ):
+        """Hold manager.
+
+        Args:
+            model: Model of the instance, whose session the leases share.
+            loop: Loop running the sessions of `model`.
+            start_hold: Starts an untimed session of `model`, called on the
+                loop thread.
+            clock: Time source, defaults to the model clock.
+        """
+        self.model = model
+        self.loop = loop
+        self.start_hold = start_hold
+        self.clock = clock or model.clock or system_clock
+        # Whether the leases started the running session, only used on the
+        # loop thread.
+        self._owns_session = False
+        self._lock = threading.Lock()
+        self._changed = threading.Event()
+        self._leases: dict[int, Lease] = {}
+        self._deadlines: list[tuple[float, int]] = []
+        self._ids = itertools.count(1)
+        self._expiry: threading.Thread | None = None
+        self._closed = False
+        model.session_listeners.append(self._on_session_ended)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._leases)
+
+    def acquire(self, owner: str, duration_seconds: float | None = None) -> Lease:
+        """Adds a lease, a session holds from the first one on.
+
+        Args:
+            owner: Free-form client description for status reports.
+            duration_seconds: Lease length, None holds until released.
+        """
+        with self._lock:
+            lease = Lease(next(self._ids), owner)
+            self._leases[lease.id] = lease
+            if duration_seconds is not None:
+                self._set_deadline(lease, self.clock.monotonic() + duration_seconds)
+        self.loop.call_soon_threadsafe(self._sync)
+        logger.info("Lease %s acquired by %s.", lease.id, owner)
+        return lease
+
+    def release(self, lease_id: int) -> bool:
+        """Ends a lease, the last one releases the session it started.
+
+        Returns:
+            False if the lease was not found.
+        """
+        with self._lock:
+            if self._leases.pop(lease_id, None) is None:
+                return False
+        self.loop.call_soon_threadsafe(self._sync)
+        logger.info("Lease %s released.", lease_id)
+        return True
+
+    def extend(self, lease_id: int, seconds: float) -> float:
+        """Moves a lease deadline, returns the seconds left on it."""
+        with self._lock:
+            lease = self._leases[lease_id]
+            if lease.deadline is None:
+                raise ValueError(f"Lease {lease_id} has no deadline.")
+            self._set_deadline(lease, lease.deadline + seconds)
+            return lease.deadline - self.clock.monotonic()
+
+    def leases(self) -> list[Lease]:
+        """Outstanding leases."""
+        with self._lock:
+            return list(self._leases.values())
+
+    def next_expiry(self) -> float | None:
+        """Monotonic time of the earliest lease deadline."""
+        with self._lock:
+            return self._peek_deadline()
+
+    def clear(self):
+        """Ends all leases, releasing the session they started."""
+        with self._lock:
+            self._leases.clear()
+            self._deadlines.clear()
+            self._changed.set()
+        self.loop.call_soon_threadsafe(self._sync)
+
+    def close(self):
+        """Ends all leases and stops the expiry thread."""
+        self.clear()
+        with self._lock:
+            self._closed = True
+        if self._expiry is not None:
+            self._expiry.join()
+        self.model.session_listeners.remove(self._on_session_ended)
+
+    def _set_deadline(self, lease: Lease, deadline: float):
+        lease.deadline = deadline
+        heapq.heappush(self._deadlines, (deadline, lease.id))
+        if self._deadlines[0][1] == lease.id:
+            self._changed.set()
+        if self._expiry is None:
+            self._expiry = threading.Thread(
+                target=self._expire_leases, name="lease-expiry", daemon=True
+            )
+            self._expiry.start()
+
+    def _peek_deadline(self) -> float | None:
+        while self._deadlines:
+            deadline, lease_id = self._deadlines[0]
+            lease = self._leases.get(lease_id)
+            if lease is not None and lease.deadline == deadline:
+                return deadline
+            heapq.heappop(self._deadlines)
+        return None
+
+    def _sync(self):
+        """Starts or releases the session to match the leases, on the loop."""
+        with self._lock:
+            wanted = bool(self._leases)
+        model = self.model
+        if wanted and not model.is_running():
+            # A released session that is still ending restarts from
+            # `_on_session_ended` instead.
+            self.start_hold()
+            self._owns_session = model.is_running()
+        elif not wanted and self._owns_session and model.is_suspend_screen_lock_on:
+            model.release_screen_lock_suspend()
+
+    def _on_session_ended(self):
+        self._owns_session = False
+        if self.model.end_reason == "failed":
+            if self._leases:
+                logger.error("The hold of %d leases failed.", len(self._leases))
+            return
+        # Posted, the engine is still finishing the session.
+        self.loop.call_soon_threadsafe(self._sync)
+
+    def _expire_leases(self):
+        while True:
+            with self._lock:
+                if self._closed:
+                    return
+                now = self.clock.monotonic()
+                deadline = self._peek_deadline()
+                while deadline is not None and deadline <= now:
+                    _, lease_id = heapq.heappop(self._deadlines)
+                    logger.info("Lease %s expired.", lease_id)
+                    del self._leases[lease_id]
+                    if not self._leases:
+                        self.loop.call_soon_threadsafe(self._sync)
+                    deadline = self._peek_deadline()
+                timeout = None if deadline is None else deadline - now
+                self._changed.clear()
+            self.clock.wait(self._changed, timeout)
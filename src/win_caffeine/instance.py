@@ -0,0 +1,91 @@
+"""Single app instance lock."""
+import logging
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+from win_caffeine import settings
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+logger = logging.getLogger(__name__)
+
+
+def lock_path() -> str:
+    """Path of the instance lockfile."""
+    return os.path.join(tempfile.gettempdir(), f"{settings.APP_NAME}.lock")
+
+
+class InstanceLock:
+    """Exclusive OS lock on the instance lockfile.
+
+    The lock is taken atomically and the OS drops it when the owner dies, so a
+    lockfile left behind by a crashed instance is simply taken over. The file
+    itself is never removed, which would let two instances lock different
+    files under the same name.
+    """
+
+    def __init__(self, path: str | None = None) -> None:
+        self.path = path or lock_path()
+        self._fd: int | None = None
+
+    def acquire(self) -> bool:
+        """Takes the lock and records our pid.
+
+        Returns:
+            False if a live instance holds the lock.
+        """
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if sys.platform == "win32":
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+
+        stale_pid = os.read(fd, 32).decode(errors="replace").strip()
+        if stale_pid:
+            logger.info("Taking over stale lock of process %s.", stale_pid)
+        os.lseek(fd, 0, os.SEEK_SET)
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    def release(self):
+        """Clears our pid and drops the lock."""
+        if self._fd is None:
+            return
+        os.ftruncate(self._fd, 0)
+        if sys.platform == "win32":
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        os.close(self._fd)
+        self._fd = None
+
+    def owner(self) -> int | None:
+        """Pid recorded in the lockfile, None if unknown."""
+        try:
+            with open(self.path) as f:
+                return int(f.read())
+        except (OSError, ValueError):
+            return None
+
+
+@contextmanager
+def single_instance():
+    """Ensure single app instance."""
+    lock = InstanceLock()
+    if not lock.acquire():
+        logger.error("Another instance is already running (pid %s).", lock.owner())
+        sys.exit(0)
+    try:
+        yield
+    finally:
+        lock.release()
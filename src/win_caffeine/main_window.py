@@ -1,15 +1,17 @@
 """Main GUI window."""
 import logging
-from types import TracebackType
-from typing import Callable, Tuple, Type
+from typing import Callable
 
+from win_caffeine import cli
+from win_caffeine import engine
 from win_caffeine import settings
 from win_caffeine import qt
 from win_caffeine import utils
 from win_caffeine import theme
 from win_caffeine import custom_widgets as widgets
 from win_caffeine import screen_lock
-from win_caffeine import qworker
+from win_caffeine import store
+from win_caffeine import qloop
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +19,12 @@ logger = logging.getLogger(__name__)
 class MainWindow(qt.QMainWindow):
     """Main window."""
 
+    # Emitted from the control server thread, handled on the GUI thread.
+    stop_requested = qt.Signal()
+    handoff_requested = qt.Signal(dict)
+    # Emitted with the icon of the hold state, e.g. for the tray icon.
+    state_icon_changed = qt.Signal(object)
+
     def __init__(
         self,
         parent: qt.QWidget | None = None,
@@ -26,11 +34,12 @@ class MainWindow(qt.QMainWindow):
         flags = flags or qt.Qt.WindowFlags()
         super().__init__(parent, flags)
         self.model = screen_lock.model
-        self.usr_settings = qt.QSettings(
-            qt.QSettings.UserScope, "User", settings.APP_NAME
-        )
+        self.usr_settings = user_settings()
         self.suspend_action: Callable = self.release_suspend_lock
-        self.thread_pool = qt.QThreadPool()
+        # Sessions run as timers on the GUI thread, no worker thread involved.
+        self.engine = engine.TimerEngine(
+            self.model, qloop.QtLoop(self), on_finished=self.on_finished
+        )
         self.duration_widget = widgets.DurationWidget(self.model)
         self.method_widget = widgets.RadioButtonGroup(
             options=screen_lock.strategy_names,
@@ -44,7 +53,8 @@ class MainWindow(qt.QMainWindow):
         self.setup_model_ui()
         self.setup_ui()
         self.connect_signals()
-        self.update_toggle_state()
+        self.apply_icons(theme.icons.current)
+        theme.icons.listeners.append(self.apply_icons)
 
     def setup_ui(self):
         central_layout = qt.QVBoxLayout()
@@ -70,7 +80,6 @@ class MainWindow(qt.QMainWindow):
         window_pos = self.usr_settings.value("window_pos", settings.WINDOW_POSITION)
         self.move(qt.QPoint(*window_pos))
         self.setWindowTitle(settings.APP_NAME)
-        self.setWindowIcon(qt.QIcon(theme.icon_path.coffee_on))
         self.setFixedWidth(settings.WINDOW_FIXED_WIDTH)
         self.setFixedHeight(settings.WINDOW_FIXED_HEIGHT)
         self.usr_settings.endGroup()
@@ -81,8 +90,6 @@ class MainWindow(qt.QMainWindow):
         self.exit_button.setObjectName("exit_button")
         for btn in [self.settings_button, self.exit_button]:
             btn.setFixedSize(qt.QSize(25, 25))
-        self.settings_button.setIcon(qt.QIcon(theme.icon_path.settings))
-        self.exit_button.setIcon(qt.QIcon(theme.icon_path.exit))
         self.settings_button.setToolTip("Settings")
         self.exit_button.setToolTip("Exit")
         self.method_widget.setToolTip("Suspend method")
@@ -100,17 +107,26 @@ class MainWindow(qt.QMainWindow):
         self.duration_widget.on_enable_duration_changed(checked_state)
         self.duration_widget.duration.setValue(self.model.duration_minutes)
         self.duration_widget.interval.setValue(self.model.interval_seconds)
+        self.duration_widget.auto_interval.setChecked(self.model.is_auto_interval)
 
     def connect_signals(self):
         self.toggle_button.clicked.connect(self.on_toggle_button_clicked)
         self.settings_button.clicked.connect(self.on_settings_button_clicked)
         self.exit_button.clicked.connect(self.on_quit)
+        self.stop_requested.connect(self.on_quit)
+        self.handoff_requested.connect(self.on_handoff)
         self.method_widget.buttons_group.buttonClicked.connect(
             self.on_method_button_clicked
         )
+        # The store coalesces these into one write.
+        self.duration_widget.changed.connect(self.save_model_settings)
 
     def save_settings(self):
         self.save_window_settings()
+        self.save_model_settings()
+        self.usr_settings.flush()
+
+    def save_model_settings(self):
         self.model.save_settings(self.usr_settings)
 
     def save_window_settings(self):
@@ -122,26 +138,33 @@ class MainWindow(qt.QMainWindow):
         self.hide()
         return True
 
+    def apply_icons(self, icons: theme.IconSet):
+        """Shows the icons of a theme."""
+        self.setWindowIcon(icons.coffee_on)
+        self.settings_button.setIcon(icons.settings)
+        self.exit_button.setIcon(icons.exit)
+        self.update_toggle_state()
+
     def update_toggle_state(self):
         logger.debug("update_toggle_state")
         mode = "off"
         next_mode = "on"
-        icon_path = ""
+        icons = theme.icons.current
         if self.model.is_suspend_screen_lock_on:
             mode, next_mode = next_mode, mode
-            icon_path = theme.icon_path.coffee_on
+            icon = icons.coffee_on
             self.suspend_action = self.release_suspend_lock
             self.method_widget.setEnabled(False)
             action_name = "release_suspend_lock"
         else:
             self.suspend_action = self.run_suspend_lock
             self.method_widget.setEnabled(True)
-            icon_path = theme.icon_path.coffee_off
+            icon = icons.coffee_off
             action_name = "run_suspend_lock"
-        icon = qt.QIcon(icon_path)
 
         logger.debug("Next suspend_action = {}".format(action_name))
         self.toggle_button.setIcon(icon)
+        self.state_icon_changed.emit(icon)
         self.toggle_button.setText(f"Turn {next_mode}")
         self.state_label.setText(self.get_state_message())
 
@@ -164,45 +187,64 @@ class MainWindow(qt.QMainWindow):
     def on_method_button_clicked(self, object):
         ndx = self.method_widget.buttons_group.id(object)
         self.model.set_strategy(ndx)
+        self.save_model_settings()
 
     def on_quit(self):
-        if self.model.is_suspend_screen_lock_on:
-            self.release_suspend_lock()
+        # Not a posted release, which would only run after the loop quit.
+        self.engine.stop()
         self.save_settings()
         qt.QApplication.instance().quit()
 
+    def on_handoff(self, request: dict):
+        """Applies the arguments of a second app launch."""
+        self.showNormal()
+        self.activateWindow()
+        if request["subcommand"] != "cli":
+            return
+        ndx = cli.configure(
+            self.model,
+            request["duration"],
+            request["interval"],
+            request["strategy"],
+            request.get("auto_interval", False),
+        )
+        self.method_widget.setButtonChecked(ndx)
+        self.duration_widget.checkbox.setChecked(self.model.is_duration_checked)
+        self.duration_widget.duration.setValue(self.model.duration_minutes)
+        self.duration_widget.interval.setValue(self.model.interval_seconds)
+        self.duration_widget.auto_interval.setChecked(self.model.is_auto_interval)
+        if self.model.is_running():
+            self.model.restart(ndx)
+        else:
+            self.model.set_strategy(ndx)
+            self.run_suspend_lock()
+
     def release_suspend_lock(self):
         self.model.release_screen_lock_suspend()
 
     def run_suspend_lock(self):
-        if self.model.is_suspend_screen_lock_on:
+        if self.model.is_running():
             self.statusBar().showMessage(
                 "Duration lock suspend is running!",
                 settings.STATUS_MESSAGE_DURATION_MSECONDS,
             )
             return
 
-        worker = qworker.QWorker(self.model.suspend_screen_lock)
-        worker.signals.error.connect(self.on_error)
-        worker.signals.before_start.connect(self.on_before_start)
-        worker.signals.finished.connect(self.on_finished)
-        worker.signals.progress.connect(self.on_progress)
-        if settings.MULTITHREADING:
-            self.thread_pool.start(worker)
-        else:
-            worker.run()
+        self.engine.start(progress_callback=self.on_progress)
+        if self.model.is_running():
+            self.on_started()
 
-    def on_error(
-        self,
-        exc_info: Tuple[Type[BaseException], BaseException, TracebackType],
-    ):
-        _, exc, _ = exc_info
-        logger.debug(exc.args)
+    def on_lease_hold(self):
+        """Starts an untimed hold for the leases of other clients."""
+        if self.model.is_running():
+            return
+        self.engine.start(timed=False, progress_callback=self.on_progress)
+        if self.model.is_running():
+            self.on_started()
 
-    def on_before_start(
+    def on_started(
         self,
     ):
-        self.model.set_suspended(True)
         self.duration_widget.setEnabled(False)
         self.update_toggle_state()
 
@@ -216,3 +258,14 @@ class MainWindow(qt.QMainWindow):
     def on_progress(self, msg: str):
         td_str = utils.get_time_hh_mm_ss(int(msg))
         self.state_label.setText(self.get_state_message() + f" ({td_str})")
+
+
+def user_settings() -> store.SettingsStore:
+    """Settings store of the GUI, the JSON file shared with the CLI by default."""
+    qsettings = qt.QSettings(qt.QSettings.UserScope, "User", settings.APP_NAME)
+    if settings.SETTINGS_IN_QSETTINGS:
+        return store.SettingsStore(store.QSettingsBacking(qsettings))
+    settings_store = store.default_store()
+    # Carries the settings of versions that kept them in QSettings over.
+    store.import_legacy(settings_store, store.QSettingsBacking(qsettings))
+    return settings_store
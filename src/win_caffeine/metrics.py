@@ -0,0 +1,328 @@
+"""Always-on metrics of hold sessions, exported for Prometheus and as JSON.
+
+The session code counts into the module-level `registry`: scheduler wakeups
+and their lateness (tick jitter), refreshes, key injections, session lengths
+and release latency, labelled by strategy. Backend call counts and latencies
+are read from the recording backend when the metrics are collected, so they
+cost nothing extra, and are attributed to the strategy of the running
+session. Recording is a dict update under a lock.
+
+`exporting` publishes the registry as a Prometheus textfile, for the node
+exporter textfile collector, and on a localhost HTTP endpoint serving
+`/metrics` in Prometheus text format and `/metrics.json`.
+"""
+import collections
+import contextlib
+import dataclasses
+import json
+import logging
+import os
+import tempfile
+import threading
+import typing
+
+from win_caffeine import backends
+from win_caffeine import settings
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "win_caffeine_"
+
+Labels = tuple[tuple[str, str], ...]
+
+
+@dataclasses.dataclass
+class Summary:
+    """Count, sum and maximum of observed values."""
+
+    count: int = 0
+    sum: float = 0.0
+    max: float = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+
+class Registry:
+    """Thread-safe counters and summaries keyed by name and labels."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: dict[str, dict[Labels, float]] = collections.defaultdict(dict)
+        self._summaries: dict[str, dict[Labels, Summary]] = collections.defaultdict(
+            dict
+        )
+        # Called with the registry before each snapshot, to pull in values
+        # kept elsewhere.
+        self.collectors: list[typing.Callable[["Registry"], None]] = []
+
+    def inc(self, name: str, value: float = 1, **labels: str):
+        """Adds `value` to a counter."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters[name]
+            series[key] = series.get(key, 0) + value
+
+    def set_counter(self, name: str, value: float, **labels: str):
+        """Sets a counter kept by someone else, e.g. a collector."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._counters[name][key] = value
+
+    def observe(self, name: str, value: float, **labels: str):
+        """Adds an observation to a summary."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._summaries[name]
+            if key not in series:
+                series[key] = Summary()
+            series[key].observe(value)
+
+    def snapshot(self) -> dict[str, dict]:
+        """Runs the collectors and copies all metrics.
+
+        Returns:
+            Maps each metric name to its type and its samples, each a dict of
+            the labels and the value, or count, sum and max for summaries.
+        """
+        for collect in self.collectors:
+            collect(self)
+        metrics: dict[str, dict] = {}
+        with self._lock:
+            for name, counters in self._counters.items():
+                metrics[name] = dict(
+                    type="counter",
+                    samples=[
+                        dict(labels=dict(key), value=value)
+                        for key, value in counters.items()
+                    ],
+                )
+            for name, summaries in self._summaries.items():
+                metrics[name] = dict(
+                    type="summary",
+                    samples=[
+                        dict(labels=dict(key), **dataclasses.asdict(summary))
+                        for key, summary in summaries.items()
+                    ],
+                )
+        return metrics
+
+    def to_json(self) -> str:
+        """Snapshot as JSON."""
+        return json.dumps(self.snapshot(), sort_keys=True)
+
+    def to_prometheus(self) -> str:
+        """Snapshot in the Prometheus text exposition format."""
+        lines = []
+        for name, metric in sorted(self.snapshot().items()):
+            name = PREFIX + name
+            lines.append(f"# TYPE {name} {metric['type']}")
+            for sample in metric["samples"]:
+                labels = format_labels(sample["labels"])
+                if metric["type"] == "counter":
+                    lines.append(f"{name}{labels} {sample['value']:g}")
+                else:
+                    lines.append(f"{name}_count{labels} {sample['count']}")
+                    lines.append(f"{name}_sum{labels} {sample['sum']:g}")
+            if metric["type"] == "summary":
+                lines.append(f"# TYPE {name}_max gauge")
+                for sample in metric["samples"]:
+                    labels = format_labels(sample["labels"])
+                    lines.append(f"{name}_max{labels} {sample['max']:g}")
+        return "\n".join(lines) + "\n"
+
+
+def format_labels(labels: dict[str, str]) -> str:
+    """Formats Prometheus labels, e.g. `{strategy="NumLock"}`."""
+    if not labels:
+        return ""
+    items = []
+    for key, value in sorted(labels.items()):
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        items.append(f'{key}="{value}"'.replace("\n", "\\n"))
+    return "{" + ",".join(items) + "}"
+
+
+class BackendCollector:
+    """Adds the calls of the recording backend to the metrics, by strategy.
+
+    The backend counts the calls of all strategies together, so the calls
+    made since the last collection go to the strategy active meanwhile. The
+    model reports each strategy change through `switch`.
+    """
+
+    def __init__(self) -> None:
+        # Strategy of the running session, empty before the first one.
+        self.strategy = ""
+        self._lock = threading.Lock()
+        # Call counts and latencies already collected, by function.
+        self._seen: dict[str, tuple[int, float]] = {}
+
+    def __call__(self, registry: Registry):
+        """Adds the calls made since the last collection to `registry`."""
+        backend = backends.default_backend()
+        if not isinstance(backend, backends.RecordingBackend):
+            return
+        with self._lock:
+            for name, count in list(backend.counts.items()):
+                seconds = backend.latencies[name]
+                seen_count, seen_seconds = self._seen.get(name, (0, 0.0))
+                if count == seen_count:
+                    continue
+                self._seen[name] = count, seconds
+                labels = dict(function=name, strategy=self.strategy)
+                registry.inc("backend_calls_total", count - seen_count, **labels)
+                registry.inc(
+                    "backend_call_seconds_total", seconds - seen_seconds, **labels
+                )
+
+    def switch(self, strategy: str):
+        """Collects the calls of the previous strategy, then counts for `strategy`."""
+        if strategy != self.strategy:
+            self(registry)
+            self.strategy = strategy
+
+
+registry = Registry()
+backend_collector = BackendCollector()
+registry.collectors.append(backend_collector)
+
+
+def write_textfile(path: str, source: Registry | None = None):
+    """Writes the metrics to `path` atomically, as the textfile collector needs."""
+    text = (source or registry).to_prometheus()
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".metrics-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+class TextfileWriter:
+    """Rewrites a Prometheus textfile periodically from a background thread."""
+
+    def __init__(
+        self,
+        path: str,
+        source: Registry | None = None,
+        interval_seconds: float = settings.METRICS_TEXTFILE_SECONDS,
+    ) -> None:
+        self.path = path
+        self.source = source or registry
+        self.interval_seconds = interval_seconds
+        self._closed = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        """Writes the file and keeps it current."""
+        write_textfile(self.path, self.source)
+        self._thread = threading.Thread(
+            target=self._run, name="metrics-textfile", daemon=True
+        )
+        self._thread.start()
+
+    def close(self):
+        """Stops the thread after a final write."""
+        self._closed.set()
+        if self._thread is not None:
+            self._thread.join()
+        write_textfile(self.path, self.source)
+
+    def _run(self):
+        while not self._closed.wait(self.interval_seconds):
+            try:
+                write_textfile(self.path, self.source)
+            except OSError as e:
+                logger.error("Could not write metrics to %s: %s", self.path, e)
+
+
+class MetricsServer:
+    """Serves the metrics over HTTP on localhost from a background thread."""
+
+    def __init__(self, port: int = 0, source: Registry | None = None) -> None:
+        """Metrics server.
+
+        Args:
+            port: Port to listen on, 0 picks a free one.
+            source: Registry to serve, defaults to the module one.
+        """
+        self.port = port
+        self.source = source or registry
+        self._server: typing.Any = None
+
+    def start(self):
+        """Binds the port and starts serving."""
+        # Imported here so that commands without an endpoint do not pay for it.
+        import http.server
+
+        source = self.source
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body = source.to_prometheus()
+                    content_type = "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json":
+                    body = source.to_json()
+                    content_type = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                logger.debug("%s " + format, self.address_string(), *args)
+
+        self._server = http.server.ThreadingHTTPServer(
+            (settings.METRICS_HOST, self.port), Handler
+        )
+        self.port = self._server.server_address[1]
+        threading.Thread(
+            target=self._server.serve_forever, name="metrics-http", daemon=True
+        ).start()
+        logger.info("Serving metrics on http://%s:%s/metrics", *self.address)
+
+    @property
+    def address(self) -> tuple[str, int]:
+        return settings.METRICS_HOST, self.port
+
+    def close(self):
+        """Stops serving."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+@contextlib.contextmanager
+def exporting(port: int | None = None, path: str | None = None):
+    """Exports the metrics while the block runs.
+
+    Args:
+        port: Serves them on this localhost port, None does not.
+        path: Keeps this Prometheus textfile current, None does not.
+
+    Raises:
+        OSError: The port is taken or the file cannot be written.
+    """
+    with contextlib.ExitStack() as stack:
+        if port is not None:
+            server = MetricsServer(port)
+            server.start()
+            stack.callback(server.close)
+        if path is not None:
+            writer = TextfileWriter(path)
+            writer.start()
+            stack.callback(writer.close)
+        yield
@@ -0,0 +1,348 @@
+"""Power-source-aware hold policy.
+
+A `PowerGuard` watches the power source and applies a `PowerPolicy` to the
+sessions of a model: it releases the hold when the battery runs low, stretches
+the refresh interval on battery power and takes the hold again once AC power
+returns. On Linux the guard sleeps on kernel uevents for the power supplies,
+so it only wakes up when the power status actually changes.
+"""
+import collections
+import ctypes
+import dataclasses
+import functools
+import logging
+import os
+import select
+import socket
+import sys
+import threading
+import typing
+
+from win_caffeine import screen_lock
+from win_caffeine import settings
+
+logger = logging.getLogger(__name__)
+
+NETLINK_KOBJECT_UEVENT = 15
+UEVENT_BUFFER_SIZE = 64 * 1024
+
+# Battery charge is None without a battery, e.g. on a desktop.
+PowerStatus = collections.namedtuple("PowerStatus", ["on_ac", "battery_percent"])
+
+
+class Provider(typing.Protocol):
+    def status(self) -> PowerStatus:
+        """Reads the current power status."""
+        ...
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Blocks until the power status may have changed.
+
+        Returns:
+            False on timeout.
+        """
+        ...
+
+    def close(self):
+        """Stops watching."""
+        ...
+
+
+class SysfsProvider:
+    """Reads /sys/class/power_supply, woken by power supply uevents."""
+
+    def __init__(self, root: str = "/sys/class/power_supply") -> None:
+        """Sysfs provider.
+
+        Args:
+            root: Directory listing the power supplies.
+        """
+        self.root = root
+        # Written to by `close`, to wake up a blocked `wait`.
+        self._wake_read, self._wake_write = os.pipe()
+        # Held by `wait`, so that `close` frees the descriptors after it.
+        self._lock = threading.Lock()
+        self._closed = False
+        try:
+            self._sock: socket.socket | None = socket.socket(
+                socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_KOBJECT_UEVENT
+            )
+            # Multicast group 1 carries the kernel uevents.
+            self._sock.bind((0, 1))
+        except (AttributeError, OSError):
+            self._sock = None
+            logger.debug("No uevents, polling %s.", root)
+
+    def status(self) -> PowerStatus:
+        mains: list[bool] = []
+        capacities: list[int] = []
+        try:
+            names = sorted(os.listdir(self.root))
+        except OSError:
+            names = []
+        for name in names:
+            supply_type = self._read(name, "type")
+            # Batteries of a mouse or headset have the scope Device.
+            if self._read(name, "scope") == "Device":
+                continue
+            if supply_type == "Battery":
+                capacity = self._read(name, "capacity")
+                if capacity is not None:
+                    capacities.append(int(capacity))
+            elif supply_type is not None:
+                mains.append(self._read(name, "online") == "1")
+        battery = sum(capacities) / len(capacities) if capacities else None
+        # Without a mains supply to report, the machine is plugged in.
+        return PowerStatus(any(mains) or not mains, battery)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        with self._lock:
+            if self._closed:
+                return True
+            if self._sock is None:
+                # Polls, every wakeup counts as a possible change.
+                poll_seconds = settings.POWER_POLL_SECONDS
+                select.select([self._wake_read], [], [], timeout or poll_seconds)
+                return True
+            while True:
+                readable, _, _ = select.select(
+                    [self._sock, self._wake_read], [], [], timeout
+                )
+                if not readable:
+                    return False
+                if self._wake_read in readable:
+                    return True
+                if b"SUBSYSTEM=power_supply" in self._sock.recv(UEVENT_BUFFER_SIZE):
+                    return True
+
+    def close(self):
+        """Wakes up a blocked `wait`, then closes the pipe and the socket."""
+        if self._closed:
+            return
+        os.write(self._wake_write, b"\0")
+        with self._lock:
+            self._closed = True
+            os.close(self._wake_read)
+            os.close(self._wake_write)
+            if self._sock is not None:
+                self._sock.close()
+                self._sock = None
+
+    def _read(self, name: str, attribute: str) -> str | None:
+        try:
+            with open(os.path.join(self.root, name, attribute)) as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+
+class SYSTEM_POWER_STATUS(ctypes.Structure):
+    _fields_ = [
+        ("ACLineStatus", ctypes.c_ubyte),
+        ("BatteryFlag", ctypes.c_ubyte),
+        ("BatteryLifePercent", ctypes.c_ubyte),
+        ("SystemStatusFlag", ctypes.c_ubyte),
+        ("BatteryLifeTime", ctypes.c_ulong),
+        ("BatteryFullLifeTime", ctypes.c_ulong),
+    ]
+
+
+class WindowsProvider:
+    """Reads GetSystemPowerStatus, polled every `settings.POWER_POLL_SECONDS`.
+
+    Power notifications need a window to receive WM_POWERBROADCAST, which the
+    CLI does not have.
+    """
+
+    AC_OFFLINE = 0
+    BATTERY_FLAG_NO_BATTERY = 128
+    BATTERY_PERCENT_UNKNOWN = 255
+
+    def __init__(self) -> None:
+        self._closed = threading.Event()
+
+    def status(self) -> PowerStatus:
+        status = SYSTEM_POWER_STATUS()
+        if not ctypes.windll.kernel32.GetSystemPowerStatus(ctypes.byref(status)):
+            raise ctypes.WinError()
+        battery = None
+        if not status.BatteryFlag & self.BATTERY_FLAG_NO_BATTERY:
+            if status.BatteryLifePercent != self.BATTERY_PERCENT_UNKNOWN:
+                battery = status.BatteryLifePercent
+        return PowerStatus(status.ACLineStatus != self.AC_OFFLINE, battery)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        poll_seconds = settings.POWER_POLL_SECONDS
+        self._closed.wait(poll_seconds if timeout is None else timeout)
+        return True
+
+    def close(self):
+        self._closed.set()
+
+
+class FakeProvider:
+    """Power status set by hand, e.g. by tests or simulations."""
+
+    def __init__(self, on_ac: bool = True, battery_percent: float | None = None):
+        self._status = PowerStatus(on_ac, battery_percent)
+        self._changed = threading.Condition()
+        self._version = 0
+
+    def set(self, on_ac: bool, battery_percent: float | None = None):
+        """Changes the power status and wakes the waiters."""
+        with self._changed:
+            self._status = PowerStatus(on_ac, battery_percent)
+            self._version += 1
+            self._changed.notify_all()
+
+    def status(self) -> PowerStatus:
+        with self._changed:
+            return self._status
+
+    def wait(self, timeout: float | None = None) -> bool:
+        with self._changed:
+            version = self._version
+            return self._changed.wait_for(lambda: self._version != version, timeout)
+
+    def close(self):
+        self.set(*self.status())
+
+
+def default_provider() -> Provider:
+    """Power provider of this platform."""
+    if sys.platform == "win32":
+        return WindowsProvider()
+    return SysfsProvider()
+
+
+@dataclasses.dataclass
+class PowerPolicy:
+    """How holds react to the power source."""
+
+    # Releases the hold on battery below this charge, None never does.
+    min_battery_percent: float | None = None
+    # Refresh interval multiplier on battery power.
+    battery_interval_scale: float = 1.0
+    # Takes a hold released for low battery again once AC power returns.
+    resume_on_ac: bool = False
+
+    @classmethod
+    def parse(cls, spec: str) -> "PowerPolicy":
+        """Parses e.g. `min=20,stretch=2,resume`, missing keys default.
+
+        Raises:
+            ValueError: Unknown key or malformed value.
+        """
+        policy = cls()
+        for item in filter(None, spec.split(",")):
+            key, _, value = (part.strip() for part in item.partition("="))
+            if key == "min":
+                policy.min_battery_percent = float(value)
+            elif key == "stretch":
+                policy.battery_interval_scale = float(value)
+            elif key == "resume":
+                policy.resume_on_ac = True
+            else:
+                raise ValueError(f"Unknown power policy {key!r}.")
+        return policy
+
+    def battery_low(self, status: PowerStatus) -> bool:
+        """Returns True if the hold should be released on `status`."""
+        return (
+            not status.on_ac
+            and self.min_battery_percent is not None
+            and status.battery_percent is not None
+            and status.battery_percent < self.min_battery_percent
+        )
+
+    def __str__(self) -> str:
+        items = []
+        if self.min_battery_percent is not None:
+            items.append(f"min={self.min_battery_percent:g}")
+        if self.battery_interval_scale != 1.0:
+            items.append(f"stretch={self.battery_interval_scale:g}")
+        if self.resume_on_ac:
+            items.append("resume")
+        return ",".join(items)
+
+
+class PowerGuard:
+    """Applies a power policy to the sessions of a model.
+
+    A watcher thread waits for power changes and posts them to the thread
+    running the session, see `Model.call_soon`.
+    """
+
+    def __init__(
+        self,
+        model: screen_lock.Model,
+        policy: PowerPolicy,
+        provider: Provider | None = None,
+        resume: typing.Callable[[float | None], None] | None = None,
+    ) -> None:
+        """Power guard.
+
+        Args:
+            model: Model whose sessions follow the policy.
+            policy: Policy to apply.
+            provider: Power status source, defaults to the platform one.
+            resume: Called from the watcher thread with the remaining seconds
+                of a timed hold, to take a released hold again.
+        """
+        self.model = model
+        self.policy = policy
+        self.provider = provider or default_provider()
+        self.resume = resume
+        self.status: PowerStatus | None = None
+        # Released for low battery, waiting for AC power.
+        self.paused = False
+        self._remaining: float | None = None
+        self._closed = False
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        """Applies the policy to the current status and starts watching."""
+        self.apply(self.provider.status())
+        self._thread = threading.Thread(target=self._watch, name="power", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Stops watching and drops a pending resume."""
+        self._closed = True
+        self.paused = False
+        self.provider.close()
+        if self._thread is not None:
+            self._thread.join(settings.CONTROL_TIMEOUT_SECONDS)
+
+    def apply(self, status: PowerStatus):
+        """Reacts to a power status, repeated ones are ignored."""
+        if status == self.status:
+            return
+        logger.info("Power status: %s", status)
+        self.status = status
+        model = self.model
+        scale = 1.0 if status.on_ac else self.policy.battery_interval_scale
+        if scale != model.interval_scale:
+            model.interval_scale = scale
+            if model.is_suspend_screen_lock_on:
+                # Takes the new interval, keeping the remaining time.
+                model.restart(carry_over=True)
+        if self.policy.battery_low(status):
+            if model.is_suspend_screen_lock_on:
+                logger.info("Battery low, releasing the hold.")
+                self._remaining = model.remaining_seconds()
+                self.paused = self.policy.resume_on_ac and self.resume is not None
+                model.release_screen_lock_suspend("battery")
+        elif self.paused and status.on_ac:
+            logger.info("AC power is back, resuming the hold.")
+            self.paused = False
+            typing.cast(typing.Callable, self.resume)(self._remaining)
+
+    def _watch(self):
+        while not self._closed:
+            self.provider.wait()
+            if not self._closed:
+                # Releases and restarts must run on the thread holding the
+                # execution state.
+                status = self.provider.status()
+                self.model.call_soon(functools.partial(self.apply, status))
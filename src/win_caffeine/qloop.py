@@ -0,0 +1,37 @@
+"""Qt event loop adapter for the timer engine."""
+from typing import Callable
+
+from win_caffeine import qt
+
+
+class QtTimer(qt.QTimer):
+    """Single-shot timer with the `engine.TimerHandle` interface."""
+
+    def cancel(self):
+        self.stop()
+        self.deleteLater()
+
+
+class QtLoop(qt.QObject):
+    """Runs engine callbacks on the thread this object lives in."""
+
+    posted = qt.Signal(object)
+
+    def __init__(self, parent: qt.QObject | None = None) -> None:
+        super().__init__(parent)
+        # Queued even on our own thread, so posting never re-enters the engine.
+        self.posted.connect(self.run_posted, qt.Qt.QueuedConnection)
+
+    def call_later(self, delay: float, callback: Callable[[], None]) -> QtTimer:
+        timer = QtTimer(self)
+        timer.setSingleShot(True)
+        timer.timeout.connect(callback)
+        timer.timeout.connect(timer.deleteLater)
+        timer.start(round(delay * 1000))
+        return timer
+
+    def call_soon_threadsafe(self, callback: Callable[[], None]):
+        self.posted.emit(callback)
+
+    def run_posted(self, callback: Callable[[], None]):
+        callback()
@@ -1,88 +1,132 @@
-"""Bulk imports from the PySide2 package, to manage in one place."""
+"""Bulk imports from the PySide2 package, to manage in one place.
+
+Names are resolved on first access and cached in the module namespace.
+Importing this module loads no Qt module; each of QtCore, QtGui and QtWidgets
+is imported when the first of its names is used.
+"""
 # flake8: noqa
+import functools
+import importlib
 import os
-import PySide2
+import typing
+
+_IMPORTS = {
+    "QtCore": [
+        "QAbstractItemModel",
+        "QAbstractTableModel",
+        "QDate",
+        "QDateTime",
+        "QMargins",
+        "QModelIndex",
+        "QObject",
+        "QPoint",
+        "QRegExp",
+        "QRunnable",
+        "QSettings",
+        "QSignalMapper",
+        "QSize",
+        "QSortFilterProxyModel",
+        "Qt",
+        "QThreadPool",
+        "QTimer",
+        "Signal",
+        "QEvent",
+        "qVersion",
+    ],
+    "QtGui": [
+        "QBrush",
+        "QCloseEvent",
+        "QColor",
+        "QContextMenuEvent",
+        "QFont",
+        "QFontMetrics",
+        "QIcon",
+        "QKeySequence",
+        "QPixmap",
+        "QResizeEvent",
+        "QShowEvent",
+        "QTextCharFormat",
+        "QTextDocument",
+        "QStandardItemModel",
+        "QPainter",
+        "QTextBlock",
+        "QPalette",
+    ],
+    "QtWidgets": [
+        "QAction",
+        "QApplication",
+        "QBoxLayout",
+        "QCheckBox",
+        "QComboBox",
+        "QDateEdit",
+        "QDateTimeEdit",
+        "QDoubleSpinBox",
+        "QGridLayout",
+        "QHBoxLayout",
+        "QHeaderView",
+        "QLabel",
+        "QLineEdit",
+        "QListWidget",
+        "QListWidgetItem",
+        "QMainWindow",
+        "QMenu",
+        "QMessageBox",
+        "QPushButton",
+        "QSizePolicy",
+        "QSpinBox",
+        "QStyle",
+        "QStyledItemDelegate",
+        "QStyleOptionViewItem",
+        "QTableView",
+        "QTextEdit",
+        "QVBoxLayout",
+        "QLayout",
+        "QWidget",
+        "QWidgetAction",
+        "QTableWidget",
+        "QTableWidgetItem",
+        "QFrame",
+        "QStackedWidget",
+        "QStackedLayout",
+        "QSystemTrayIcon",
+        "QButtonGroup",
+        "QRadioButton",
+    ],
+}
+
+if typing.TYPE_CHECKING:
+    # Type checkers cannot follow __getattr__, so they see the whole modules
+    # listed in _IMPORTS, the only list of names.
+    from PySide2.QtCore import *
+    from PySide2.QtGui import *
+    from PySide2.QtWidgets import *
+
+_MODULE_BY_NAME = {name: module for module, names in _IMPORTS.items() for name in names}
+
+__all__ = sorted(_MODULE_BY_NAME)
+
+
+@functools.lru_cache(maxsize=None)
+def _set_plugin_path():
+    """Points Qt at the platform plugins shipped with PySide2."""
+    import PySide2
+
+    plugin_path = os.path.join(
+        os.path.dirname(PySide2.__file__), "plugins", "platforms"
+    )
+    os.environ["QT_QPA_PLATFORM_PLUGIN_PATH"] = plugin_path
+
 
-plugin_path = os.path.join(os.path.dirname(PySide2.__file__), "plugins", "platforms")
-os.environ["QT_QPA_PLATFORM_PLUGIN_PATH"] = plugin_path
+def __getattr__(name: str) -> typing.Any:
+    module_name = _MODULE_BY_NAME.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    _set_plugin_path()
+    module = importlib.import_module(f"PySide2.{module_name}")
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
 
 
-from PySide2.QtCore import (
-    QAbstractItemModel,
-    QAbstractTableModel,
-    QDate,
-    QDateTime,
-    QMargins,
-    QModelIndex,
-    QObject,
-    QPoint,
-    QRegExp,
-    QRunnable,
-    QSettings,
-    QSignalMapper,
-    QSize,
-    QSortFilterProxyModel,
-    Qt,
-    QThreadPool,
-    Signal,
-    QEvent,
-)
-from PySide2.QtGui import (
-    QBrush,
-    QCloseEvent,
-    QColor,
-    QContextMenuEvent,
-    QFont,
-    QFontMetrics,
-    QIcon,
-    QKeySequence,
-    QPixmap,
-    QResizeEvent,
-    QShowEvent,
-    QTextCharFormat,
-    QTextDocument,
-    QStandardItemModel,
-    QPainter,
-    QTextBlock,
-    QPalette,
-)
-from PySide2.QtWidgets import (
-    QAction,
-    QApplication,
-    QBoxLayout,
-    QCheckBox,
-    QComboBox,
-    QDateEdit,
-    QDateTimeEdit,
-    QDoubleSpinBox,
-    QGridLayout,
-    QHBoxLayout,
-    QHeaderView,
-    QLabel,
-    QLineEdit,
-    QListWidget,
-    QListWidgetItem,
-    QMainWindow,
-    QMenu,
-    QMessageBox,
-    QPushButton,
-    QSizePolicy,
-    QSpinBox,
-    QStyle,
-    QStyledItemDelegate,
-    QStyleOptionViewItem,
-    QTableView,
-    QTextEdit,
-    QVBoxLayout,
-    QLayout,
-    QWidget,
-    QWidgetAction,
-    QTableWidget,
-    QTableWidgetItem,
-    QFrame,
-    QStackedWidget,
-    QStackedLayout,
-    QSystemTrayIcon,
-    QButtonGroup,
-    QRadioButton,
-)
+def __dir__() -> typing.List[str]:
+    return __all__
@@ -0,0 +1,141 @@
+"""Monotonic deadline scheduler for screen lock refreshes."""
+import logging
+import math
+
+from win_caffeine import settings
+from win_caffeine.clock import Clock, system_clock
+
+logger = logging.getLogger(__name__)
+
+
+def align(
+    timestamp: float, boundary: float = settings.TIMER_ALIGNMENT_SECONDS
+) -> float:
+    """Rounds `timestamp` up to the next multiple of `boundary`."""
+    if boundary <= 0:
+        return timestamp
+    return math.ceil(timestamp / boundary) * boundary
+
+
+class RefreshScheduler:
+    """Computes refresh ticks and remaining time from a monotonic clock.
+
+    Refresh ticks lie on a fixed grid anchored at the session start, so a late
+    wakeup never pushes the following ticks back, and every wakeup is rounded up
+    to a `settings.TIMER_ALIGNMENT_SECONDS` boundary so the OS can batch it with
+    other timers. Comparing wall-clock and monotonic progress between wakeups
+    detects a resume from sleep.
+    """
+
+    def __init__(
+        self,
+        interval_seconds: float | None,
+        duration_seconds: float | None = None,
+        progress_interval_seconds: float | None = None,
+        clock: Clock | None = None,
+    ) -> None:
+        """Starts the schedule.
+
+        Args:
+            interval_seconds: Refresh period, None refreshes once at start.
+            duration_seconds: Session length, None runs until released.
+            progress_interval_seconds: Progress report period, None disables it.
+            clock: Time source, defaults to the system clock.
+        """
+        self.clock = clock or system_clock
+        now = self.clock.monotonic()
+        self.interval_seconds = interval_seconds or None
+        self.progress_interval_seconds = progress_interval_seconds or None
+        self.deadline = None if duration_seconds is None else now + duration_seconds
+        self._grid_start = now
+        self._next_refresh: float | None = now
+        self._expected_wakeup: float | None = None
+        # Seconds the latest wakeup came after its scheduled time, None if it
+        # was not a scheduled one, e.g. a release.
+        self.late: float | None = None
+        self._last_monotonic = now
+        self._last_wall = self.clock.time()
+
+    def remaining(self) -> float | None:
+        """Seconds left until the deadline, None without a deadline."""
+        if self.deadline is None:
+            return None
+        return max(self.deadline - self.clock.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        """Returns True once the deadline has passed."""
+        return self.deadline is not None and self.clock.monotonic() >= self.deadline
+
+    def extend(self, seconds: float):
+        """Moves the deadline `seconds` later."""
+        if self.deadline is not None:
+            self.deadline += seconds
+
+    def refresh_due(self) -> bool:
+        """Returns True if the hold should be re-asserted now."""
+        if self._next_refresh is None:
+            return False
+        return self.clock.monotonic() >= self._next_refresh
+
+    def mark_refreshed(self):
+        """Advances to the first grid tick after now."""
+        if self.interval_seconds is None:
+            self._next_refresh = None
+            return
+        elapsed = self.clock.monotonic() - self._grid_start
+        ticks = math.floor(elapsed / self.interval_seconds) + 1
+        self._next_refresh = self._grid_start + ticks * self.interval_seconds
+
+    def next_timeout(self) -> float | None:
+        """Seconds to wait until the next refresh, progress report or deadline.
+
+        Returns:
+            None if nothing is scheduled, the hold then waits for a release.
+        """
+        now = self.clock.monotonic()
+        wakeups = []
+        if self._next_refresh is not None:
+            wakeups.append(align(self._next_refresh))
+        if self.progress_interval_seconds is not None:
+            wakeups.append(align(now, self.progress_interval_seconds))
+            if wakeups[-1] <= now:
+                wakeups[-1] += self.progress_interval_seconds
+        if self.deadline is not None:
+            wakeups.append(self.deadline)
+        if not wakeups:
+            self._expected_wakeup = None
+            return None
+        self._expected_wakeup = min(wakeups)
+        return max(self._expected_wakeup - now, 0.0)
+
+    def check_resumed(self) -> bool:
+        """Detects a resume from sleep since the previous call.
+
+        A resume shows up either as wall-clock time advancing past the
+        monotonic clock (which stops during sleep on some platforms) or as a
+        wakeup arriving much later than scheduled. Time spent asleep counts
+        towards the duration, and the refresh grid restarts immediately.
+
+        Returns:
+            True if the system resumed and the hold must be re-asserted.
+        """
+        now = self.clock.monotonic()
+        wall = self.clock.time()
+        gap = (wall - self._last_wall) - (now - self._last_monotonic)
+        late = 0.0 if self._expected_wakeup is None else now - self._expected_wakeup
+        self.late = late if self._expected_wakeup is not None and late >= 0 else None
+        # Each expected wakeup is checked once, later ones e.g. after refresh
+        # steps were not scheduled by `next_timeout`.
+        self._expected_wakeup = None
+        self._last_monotonic = now
+        self._last_wall = wall
+        threshold = settings.RESUME_THRESHOLD_SECONDS
+        if gap < threshold and late < threshold:
+            return False
+
+        logger.info("Resume from sleep detected (%.0f sec).", max(gap, late))
+        if gap >= threshold and self.deadline is not None:
+            self.deadline -= gap
+        self._grid_start = now
+        self._next_refresh = now
+        return True
@@ -0,0 +1,221 @@
+"""Calendar schedules holding the system awake during recurring windows.
+
+A rule such as `mon-fri 08:00-18:00` or `* 02:00-03:30` names days of the week
+in cron syntax and a window in local time; a window ending before it starts
+runs over midnight. `Calendar` keeps the next transition of every rule in a
+heap, so the next activation or deactivation is found in O(log n) however many
+rules there are, and the caller sleeps straight until it.
+"""
+import dataclasses
+import datetime
+import heapq
+import logging
+import typing
+
+from win_caffeine import engine
+from win_caffeine import screen_lock
+from win_caffeine import settings
+from win_caffeine.clock import Clock, system_clock
+
+logger = logging.getLogger(__name__)
+
+DAY_NAMES = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+
+def parse_day(token: str) -> int:
+    """Parses a day name or cron number, 0 and 7 being Sunday.
+
+    Returns:
+        Day of the week as in `datetime.date.weekday`, Monday being 0.
+    """
+    token = token.strip().lower()
+    if token[:3] in DAY_NAMES:
+        return DAY_NAMES.index(token[:3])
+    day = int(token)
+    if not 0 <= day <= 7:
+        raise ValueError(f"Day {token!r} out of range.")
+    return (day - 1) % 7
+
+
+def parse_days(spec: str) -> frozenset[int]:
+    """Parses cron days of the week, e.g. `*`, `mon-fri` or `sat,sun`."""
+    days: set[int] = set()
+    for item in spec.split(","):
+        if item.strip() == "*":
+            return frozenset(range(7))
+        first, _, last = item.partition("-")
+        start = parse_day(first)
+        stop = parse_day(last) if last else start
+        # Ranges may wrap around the week, e.g. fri-mon, or cover it, e.g. 0-7.
+        length = (stop - start) % 7 + 1
+        numeric = first.strip().isdigit() and last.strip().isdigit()
+        if numeric and int(last) - int(first) >= 6:
+            length = 7
+        days.update((start + offset) % 7 for offset in range(length))
+    return frozenset(days)
+
+
+def parse_time(spec: str) -> datetime.time:
+    """Parses a local `HH:MM` time."""
+    hours, _, minutes = spec.strip().partition(":")
+    return datetime.time(int(hours), int(minutes or 0))
+
+
+@dataclasses.dataclass(frozen=True)
+class Rule:
+    """Recurring window on some days of the week."""
+
+    days: frozenset[int]
+    start: datetime.time
+    end: datetime.time
+
+    @classmethod
+    def parse(cls, spec: str) -> "Rule":
+        """Parses e.g. `mon-fri 08:00-18:00`.
+
+        Raises:
+            ValueError: Malformed days or times.
+        """
+        try:
+            days, window = spec.split()
+            start, end = window.split("-")
+            return cls(parse_days(days), parse_time(start), parse_time(end))
+        except ValueError as e:
+            raise ValueError(f"Malformed schedule {spec!r}: {e}") from None
+
+    def window(
+        self, after: datetime.datetime
+    ) -> tuple[datetime.datetime, datetime.datetime]:
+        """First window of the rule ending after `after`, in local time."""
+        # A window started yesterday may still be running.
+        day = after.date() - datetime.timedelta(days=1)
+        for _ in range(9):
+            if day.weekday() in self.days:
+                start = datetime.datetime.combine(day, self.start)
+                end = datetime.datetime.combine(day, self.end)
+                if end <= start:
+                    end += datetime.timedelta(days=1)
+                if end > after:
+                    return start, end
+            day += datetime.timedelta(days=1)
+        raise ValueError("Rule without days.")
+
+    def __str__(self) -> str:
+        days = ",".join(DAY_NAMES[day] for day in sorted(self.days))
+        if len(self.days) == 7:
+            days = "*"
+        return f"{days} {self.start:%H:%M}-{self.end:%H:%M}"
+
+
+class Calendar:
+    """Tracks which rules are active and when the next one changes.
+
+    The heap holds one entry per rule, the wall-clock time of its next start
+    or end. Only due entries are touched on each update.
+    """
+
+    def __init__(self, rules: typing.Iterable[Rule], clock: Clock | None = None):
+        """Calendar, rules are evaluated right away.
+
+        Args:
+            rules: Rules to follow, overlapping windows merge into one hold.
+            clock: Time source, defaults to the system clock.
+        """
+        self.rules = list(rules)
+        self.clock = clock or system_clock
+        self.active: set[int] = set()
+        self._transitions: list[tuple[float, int]] = []
+        now = self.clock.time()
+        for ndx in range(len(self.rules)):
+            self._schedule(ndx, now)
+
+    def update(self) -> bool:
+        """Applies all transitions due by now.
+
+        Returns:
+            True if any rule is active.
+        """
+        now = self.clock.time()
+        while self._transitions and self._transitions[0][0] <= now:
+            _, ndx = heapq.heappop(self._transitions)
+            self._schedule(ndx, now)
+        return bool(self.active)
+
+    def next_transition(self) -> float | None:
+        """Wall-clock time of the next start or end of any rule."""
+        return self._transitions[0][0] if self._transitions else None
+
+    def timeout(self) -> float | None:
+        """Seconds until the next transition, None without rules."""
+        when = self.next_transition()
+        return None if when is None else max(when - self.clock.time(), 0.0)
+
+    def _schedule(self, ndx: int, now: float):
+        start, end = self.rules[ndx].window(datetime.datetime.fromtimestamp(now))
+        if start.timestamp() <= now:
+            self.active.add(ndx)
+            heapq.heappush(self._transitions, (end.timestamp(), ndx))
+        else:
+            self.active.discard(ndx)
+            heapq.heappush(self._transitions, (start.timestamp(), ndx))
+
+
+class CalendarRunner:
+    """Starts and releases the holds of a model as the calendar turns."""
+
+    def __init__(
+        self,
+        calendar: Calendar,
+        model: screen_lock.Model,
+        loop: engine.Loop,
+        **kwargs,
+    ) -> None:
+        """Calendar runner.
+
+        Args:
+            calendar: Calendar deciding when to hold.
+            model: Model to run the holds of, untimed.
+            loop: Loop running the transition timer and the holds.
+            kwargs: Passed to `engine.TimerEngine.start`.
+        """
+        self.calendar = calendar
+        self.model = model
+        self.loop = loop
+        self.engine = engine.TimerEngine(model, loop)
+        self.stopped = False
+        self._kwargs = kwargs
+        self._timer: engine.TimerHandle | None = None
+
+    def start(self):
+        """Follows the calendar until stopped."""
+        self.stopped = False
+        self._update()
+
+    def stop(self):
+        """Stops following the calendar and releases a running hold."""
+        self.stopped = True
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._release()
+
+    def _update(self):
+        active = self.calendar.update()
+        if active and not self.model.is_running():
+            rules = [str(self.calendar.rules[ndx]) for ndx in self.calendar.active]
+            logger.info("Schedule %s started.", ", ".join(rules))
+            self.model.is_duration_checked = False
+            self.engine.start(**self._kwargs)
+        elif not active:
+            self._release()
+        timeout = self.calendar.timeout()
+        if timeout is not None:
+            # Wall-clock changes and time spent asleep delay the monotonic
+            # timer, so check back at least every SCHEDULE_RECHECK_SECONDS.
+            timeout = min(timeout, settings.SCHEDULE_RECHECK_SECONDS)
+            self._timer = self.loop.call_later(timeout, self._update)
+
+    def _release(self):
+        if self.model.is_suspend_screen_lock_on:
+            logger.info("Schedule ended.")
+            self.model.release_screen_lock_suspend("schedule")
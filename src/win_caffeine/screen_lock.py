@@ -1,161 +1,409 @@
 """Screen lock implementation."""
 import collections
-import ctypes
+import functools
 import logging
-import time
+import math
+import threading
 import typing
 
-from win_caffeine import qt
+from win_caffeine import backends
+from win_caffeine import history
+from win_caffeine import metrics
 from win_caffeine import settings
+from win_caffeine import scheduler
+from win_caffeine.clock import Clock, system_clock
 
 logger = logging.getLogger(__name__)
 
 Strategy = collections.namedtuple("Strategy", ["ndx", "name", "impl"])
 
 
+class UserSettings(typing.Protocol):
+    """Grouped key-value settings storage, e.g. `QSettings`."""
+
+    def beginGroup(self, prefix: str):
+        ...
+
+    def endGroup(self):
+        ...
+
+    def setValue(self, key: str, value: typing.Any):
+        ...
+
+    def value(self, key: str, defaultValue: typing.Any = None) -> typing.Any:
+        ...
+
+
 class StrategyProtocol(typing.Protocol):
-    def suspend_screen_lock(self, **kwargs):
+    def suspend_screen_lock(self, model: "Model", **kwargs):
         """Suspends screen lock."""
         ...
 
-    def release_screen_lock_suspend(self):
+    def release_screen_lock_suspend(self, model: "Model"):
         """Release screen lock prevention."""
         ...
 
-    def duration_suspend_screen_lock(self, **kwargs):
+    def duration_suspend_screen_lock(self, model: "Model", **kwargs):
         """Suspends screen lock for set duration of time.
 
         Args:
             progress_callback: Callable or None.
+            duration_seconds: Session length, defaults to model.duration_minutes.
+        """
+        ...
+
+    def hold(self, model: "Model", timed: bool = False, **kwargs) -> "Hold":
+        """Describes the hold without running it, for the timer engine.
+
+        Args:
+            timed: Describes the duration hold instead of the indefinite one.
+            duration_seconds: Session length, defaults to model.duration_minutes.
         """
         ...
 
 
+# The refresh callable may return an iterator of delays, e.g. between key
+# events, which the caller waits out between the steps instead of blocking.
+Hold = collections.namedtuple(
+    "Hold", ["refresh", "interval_seconds", "duration_seconds"]
+)
+
+Steps = typing.Iterator[float]
+
+# Runs a callback on another thread, e.g. a loop's `call_soon_threadsafe`.
+Post = typing.Callable[[typing.Callable[[], None]], None]
+
+
+def duration_seconds(model: "Model", kwargs: dict) -> float:
+    """Session length requested in `kwargs`, defaults to the model duration."""
+    return kwargs.get("duration_seconds", model.duration_minutes * settings.MINUTE)
+
+
+class HoldTicker:
+    """Runs one wakeup of a hold session at a time.
+
+    Shared by the blocking `run_hold` and the timer-driven `engine.TimerEngine`,
+    which only differ in how they wait between wakeups.
+    """
+
+    def __init__(
+        self,
+        model: "Model",
+        hold: Hold,
+        progress_callback: typing.Callable[[str], None] | None = None,
+    ) -> None:
+        """Starts the schedule of `hold` and publishes it on the model."""
+        self.hold = hold
+        self.progress_callback = progress_callback
+        self.schedule = scheduler.RefreshScheduler(
+            hold.interval_seconds,
+            hold.duration_seconds,
+            settings.PROGRESS_INTERVAL_SECONDS
+            if progress_callback and hold.duration_seconds
+            else None,
+            clock=model.clock,
+        )
+        # Refresh steps still to run, see `Hold`.
+        self.steps: Steps = iter(())
+        self.strategy_name = model.strategy.name
+        model.schedule = self.schedule
+
+    def tick(self) -> bool:
+        """Checks for resume and expiry, refreshes if due and reports progress.
+
+        Returns:
+            False once the duration elapsed.
+        """
+        schedule = self.schedule
+        schedule.check_resumed()
+        metrics.registry.inc("wakeups_total", strategy=self.strategy_name)
+        if schedule.late is not None:
+            metrics.registry.observe(
+                "tick_jitter_seconds", schedule.late, strategy=self.strategy_name
+            )
+        if schedule.expired():
+            return False
+        if schedule.refresh_due():
+            logger.debug("run_hold: remaining_time %s", schedule.remaining())
+            self.steps = iter(self.hold.refresh() or ())
+            schedule.mark_refreshed()
+            metrics.registry.inc("refreshes_total", strategy=self.strategy_name)
+        remaining = schedule.remaining()
+        if self.progress_callback and remaining is not None:
+            self.progress_callback(str(math.ceil(remaining)))
+        return True
+
+    def next_timeout(self) -> float | None:
+        """Seconds until the next wakeup, None to wait for a release."""
+        return self.schedule.next_timeout()
+
+
+def run_hold(
+    model: "Model",
+    refresh: typing.Callable[[], Steps | None],
+    interval_seconds: float | None = None,
+    duration_seconds: float | None = None,
+    progress_callback: typing.Callable[[str], None] | None = None,
+) -> bool:
+    """Re-asserts the hold on a monotonic schedule until released or expired.
+
+    Args:
+        model: Model holding the suspend state and the clock.
+        refresh: Re-asserts the hold, called at start, on every refresh tick
+            and after a resume from sleep.
+        interval_seconds: Refresh period, None refreshes once at start.
+        duration_seconds: Session length, None runs until released.
+        progress_callback: Called with the remaining seconds as a string.
+
+    Returns:
+        True if the duration elapsed, False if the hold was released.
+    """
+    ticker = HoldTicker(
+        model, Hold(refresh, interval_seconds, duration_seconds), progress_callback
+    )
+    while model.is_suspend_screen_lock_on:
+        if not ticker.tick():
+            return True
+        # A release cuts the steps short, they still all run.
+        for delay in ticker.steps:
+            model.wait(delay)
+        model.wait(ticker.next_timeout())
+    return False
+
+
 class ThreadExecState:
     # Execution state constants
     ES_CONTINUOUS = 0x80000000
     ES_SYSTEM_REQUIRED = 0x00000001
 
-    def suspend_screen_lock(self, **kwargs):
+    def __init__(self, backend: backends.Backend | None = None) -> None:
+        self.backend = backend or backends.default_backend()
+
+    def suspend_screen_lock(self, model: "Model", **kwargs):
         """Suspends screen lock."""
         del kwargs  # unused
-        model.is_suspend_screen_lock_on = True
-        ctypes.windll.kernel32.SetThreadExecutionState(
-            ThreadExecState.ES_CONTINUOUS | ThreadExecState.ES_SYSTEM_REQUIRED
-        )
-        logger.debug(
-            "SetThreadExecutionState: 0x%x",
-            ThreadExecState.ES_CONTINUOUS | ThreadExecState.ES_SYSTEM_REQUIRED,
-        )
-        while model.is_suspend_screen_lock_on:
-            time.sleep(1)
+        model.set_suspended(True)
+        run_hold(model, *self.hold(model))
 
-    def release_screen_lock_suspend(self):
+    def release_screen_lock_suspend(self, model: "Model"):
         """Release screen lock prevention."""
-        ctypes.windll.kernel32.SetThreadExecutionState(ThreadExecState.ES_CONTINUOUS)
-        model.is_suspend_screen_lock_on = False
+        self.backend.set_thread_execution_state(ThreadExecState.ES_CONTINUOUS)
+        model.set_suspended(False)
         logger.debug(
             "Release SetThreadExecutionState: 0x%x", ThreadExecState.ES_CONTINUOUS
         )
 
-    def duration_suspend_screen_lock(self, **kwargs):
+    def duration_suspend_screen_lock(self, model: "Model", **kwargs):
         """Suspends screen lock for set duration of time.
 
         Args:
             progress_callback: Callable or None.
+            duration_seconds: Session length, defaults to model.duration_minutes.
         """
-        model.is_suspend_screen_lock_on = True
-        end_time_sec = time.time() + (model.duration_minutes * settings.MINUTE)
-        progress_callback = kwargs.get("progress_callback")
-        remaining_time = end_time_sec - time.time()
+        model.set_suspended(True)
+        hold = self.hold(model, timed=True, **kwargs)
+        if run_hold(model, *hold, kwargs.get("progress_callback")):
+            self.release_screen_lock_suspend(model)
+
+    def hold(self, model: "Model", timed: bool = False, **kwargs) -> Hold:
+        """Describes the hold without running it, for the timer engine."""
+        if not timed:
+            return Hold(self.set_execution_state, None, None)
+        return Hold(
+            self.set_execution_state,
+            model.refresh_interval(),
+            duration_seconds(model, kwargs),
+        )
 
-        while time.time() < end_time_sec:
-            logger.debug(
-                "duration_suspend_screen_lock: remaining_time %d", remaining_time
-            )
-            self.suspend_screen_lock()
-            sleep_interval = 0
-            while sleep_interval < model.interval_seconds:
-                time.sleep(1)
-                sleep_interval += 1
-                remaining_time -= 1
-                if progress_callback:
-                    progress_callback(str(int(remaining_time)))
-                if not model.is_suspend_screen_lock_on:
-                    return
-        self.release_screen_lock_suspend()
+    def set_execution_state(self):
+        """Requests the system to stay awake until released."""
+        self.backend.set_thread_execution_state(
+            ThreadExecState.ES_CONTINUOUS | ThreadExecState.ES_SYSTEM_REQUIRED
+        )
+        logger.debug(
+            "SetThreadExecutionState: 0x%x",
+            ThreadExecState.ES_CONTINUOUS | ThreadExecState.ES_SYSTEM_REQUIRED,
+        )
 
 
 class NumLock:
     VK_NUMLOCK = 0x90
+    KEYEVENTF_KEYUP = 0x0002
 
-    def suspend_screen_lock(self, **kwargs):
+    def __init__(self, backend: backends.Backend | None = None) -> None:
+        self.backend = backend or backends.default_backend()
+        # Injected and skipped toggles of the running session.
+        self.counters: typing.Counter[str] = collections.Counter()
+        # Lock timeout read from the OS, None if unknown.
+        self.lock_timeout: float | None = None
+
+    def suspend_screen_lock(self, model: "Model", **kwargs):
         """Suspends screen lock."""
         del kwargs  # unused
-        model.is_suspend_screen_lock_on = True
-
-        while model.is_suspend_screen_lock_on:
-            self.send_key(self.VK_NUMLOCK)
-            time.sleep(1)
-            self.send_key(self.VK_NUMLOCK)
-
-            sleep_interval = settings.DEFAULT_REFRESH_INTERVAL_SECONDS
-            while sleep_interval > 0:
-                time.sleep(1)
-                sleep_interval -= 1
-                if not model.is_suspend_screen_lock_on:
-                    logger.debug("suspend_screen_lock return")
-                    return
-            logger.debug("suspend_screen_lock return is on")
-
-    def release_screen_lock_suspend(self):
+        model.set_suspended(True)
+        run_hold(model, *self.hold(model))
+        logger.debug("suspend_screen_lock return")
+
+    def release_screen_lock_suspend(self, model: "Model"):
         """Release screen lock prevention."""
-        model.is_suspend_screen_lock_on = False
-        logger.debug("Release NumLock")
+        model.set_suspended(False)
+        logger.debug(
+            "Release %s, toggles: %s", type(self).__name__, dict(self.counters)
+        )
 
-    def duration_suspend_screen_lock(self, **kwargs):
+    def duration_suspend_screen_lock(self, model: "Model", **kwargs):
         """Suspends screen lock for set duration of time.
 
         Args:
             progress_callback: Callable or None.
+            duration_seconds: Session length, defaults to model.duration_minutes.
         """
-        model.is_suspend_screen_lock_on = True
-        end_time_sec = time.time() + (model.duration_minutes * settings.MINUTE)
-        progress_callback = kwargs.get("progress_callback")
-        remaining_time = end_time_sec - time.time()
+        model.set_suspended(True)
+        hold = self.hold(model, timed=True, **kwargs)
+        if run_hold(model, *hold, kwargs.get("progress_callback")):
+            self.release_screen_lock_suspend(model)
+
+    def hold(self, model: "Model", timed: bool = False, **kwargs) -> Hold:
+        """Describes the hold without running it, for the timer engine."""
+        self.counters.clear()
+        self.lock_timeout = model.os_lock_timeout()
+        if timed or model.is_auto_interval:
+            interval = model.refresh_interval()
+        else:
+            interval = settings.DEFAULT_REFRESH_INTERVAL_SECONDS
+            interval = round(interval * model.interval_scale)
+        refresh = functools.partial(self.toggle_numlock, interval)
+        duration = duration_seconds(model, kwargs) if timed else None
+        return Hold(refresh, interval, duration)
 
-        while time.time() < end_time_sec:
-            logger.debug(
-                "duration_suspend_screen_lock: remaining_time %d", remaining_time
-            )
-            self.send_key(self.VK_NUMLOCK)
-            time.sleep(1)
-            self.send_key(self.VK_NUMLOCK)
-
-            sleep_interval = model.interval_seconds
-            while sleep_interval > 0:
-                time.sleep(1)
-                sleep_interval -= 1
-                remaining_time -= 1
-                if progress_callback:
-                    progress_callback(str(int(remaining_time)))
-                if not model.is_suspend_screen_lock_on:
-                    return
-        self.release_screen_lock_suspend()
-
-    def send_key(self, key, up_down_delay=0.1):
-        """Sends key via ctypes windll"""
+    def toggle_numlock(self, interval_seconds: float | None = None) -> Steps:
+        """Toggles NumLock on and back off, restoring its state on release.
+
+        The toggle is skipped unless the screen could lock before the next one.
+
+        Args:
+            interval_seconds: Seconds until the next toggle.
+
+        Yields:
+            Seconds to wait before the next key event.
+        """
+        if not self.lock_due(interval_seconds):
+            self.count_toggle("skipped")
+            return
+        self.count_toggle("injected")
+        yield from self.send_key(self.VK_NUMLOCK)
+        yield 1
+        yield from self.send_key(self.VK_NUMLOCK)
+
+    def count_toggle(self, result: str):
+        """Counts an injected or skipped toggle."""
+        self.counters[result] += 1
+        metrics.registry.inc(
+            "key_injections_total", strategy=type(self).__name__, result=result
+        )
+
+    def lock_due(self, interval_seconds: float | None) -> bool:
+        """Returns True if the idle time may reach the lock timeout in time.
+
+        Without the real lock timeout every refresh is due, since a default
+        could be longer than the OS one and let the screen lock.
+        """
+        if self.lock_timeout is None or not interval_seconds:
+            return True
+        idle = self.backend.idle_seconds()
+        if idle is None:
+            return True
+        return idle + interval_seconds >= self.lock_timeout
+
+    def send_key(self, key, up_down_delay=0.1) -> Steps:
+        """Sends key via the backend, yielding the delay before key up."""
         # key down
-        ctypes.windll.user32.keybd_event(key, 0, 0, 0)
-        time.sleep(up_down_delay)
+        self.backend.keybd_event(key, 0)
+        yield up_down_delay
         # key up
-        ctypes.windll.user32.keybd_event(key, 0, 0x002, 0)
+        self.backend.keybd_event(key, self.KEYEVENTF_KEYUP)
         logger.debug("Send key 0x%x", key)
 
 
+class KeyPress(NumLock):
+    """Presses F15 in one batched input call, a key without visible state.
+
+    Unlike toggling NumLock, nothing needs restoring, so a refresh is a
+    single call with no steps and no delay between key down and key up.
+    """
+
+    VK_F15 = 0x7E
+
+    def hold(self, model: "Model", timed: bool = False, **kwargs) -> Hold:
+        """Describes the hold without running it, for the timer engine."""
+        hold = super().hold(model, timed, **kwargs)
+        refresh = functools.partial(self.press_key, hold.interval_seconds)
+        return hold._replace(refresh=refresh)
+
+    def press_key(self, interval_seconds: float | None = None):
+        """Sends F15 down and up, skipped unless the screen could lock.
+
+        Args:
+            interval_seconds: Seconds until the next key press.
+        """
+        if not self.lock_due(interval_seconds):
+            self.count_toggle("skipped")
+            return
+        self.count_toggle("injected")
+        self.backend.send_input([(self.VK_F15, 0), (self.VK_F15, self.KEYEVENTF_KEYUP)])
+
+
+class Inhibitor:
+    """Takes one long-lived OS inhibitor at start and drops it on release."""
+
+    def __init__(self, backend: backends.Backend | None = None) -> None:
+        self.backend = backend or backends.default_backend()
+        self._handle: typing.Any = None
+
+    def suspend_screen_lock(self, model: "Model", **kwargs):
+        """Suspends screen lock."""
+        del kwargs  # unused
+        model.set_suspended(True)
+        run_hold(model, *self.hold(model))
+
+    def release_screen_lock_suspend(self, model: "Model"):
+        """Release screen lock prevention."""
+        if self._handle is not None:
+            self.backend.uninhibit(self._handle)
+            self._handle = None
+        model.set_suspended(False)
+        logger.debug("Release Inhibitor")
+
+    def duration_suspend_screen_lock(self, model: "Model", **kwargs):
+        """Suspends screen lock for set duration of time.
+
+        Args:
+            progress_callback: Callable or None.
+            duration_seconds: Session length, defaults to model.duration_minutes.
+        """
+        model.set_suspended(True)
+        hold = self.hold(model, timed=True, **kwargs)
+        if run_hold(model, *hold, kwargs.get("progress_callback")):
+            self.release_screen_lock_suspend(model)
+
+    def hold(self, model: "Model", timed: bool = False, **kwargs) -> Hold:
+        """Describes the hold without running it, for the timer engine."""
+        return Hold(
+            self.inhibit, None, duration_seconds(model, kwargs) if timed else None
+        )
+
+    def inhibit(self):
+        """Takes the inhibitor unless it is already held."""
+        if self._handle is None:
+            self._handle = self.backend.inhibit(f"{settings.APP_NAME} hold")
+            logger.debug("Inhibitor taken: %s", self._handle)
+
+
 strategies = [
     Strategy(0, "NumLock", NumLock()),
     Strategy(1, "ThreadExecState", ThreadExecState()),
+    Strategy(2, "Inhibitor", Inhibitor()),
+    Strategy(3, "KeyPress", KeyPress()),
 ]
 
 strategy_names = [strategy.name for strategy in strategies]
@@ -166,28 +414,194 @@ class Model:
 
     is_suspend_screen_lock_on = False
     is_duration_checked = False
+    is_auto_interval = False
+    # Refresh interval multiplier, set by a power policy.
+    interval_scale = 1.0
     duration_minutes = settings.DEFAULT_DURATION_MINUTES
     interval_seconds = settings.DEFAULT_REFRESH_INTERVAL_SECONDS
     strategy: Strategy = strategies[settings.DEFAULT_STRATEGY_INDEX]
+    schedule: scheduler.RefreshScheduler | None = None
+    # Records the ended sessions, None keeps no history.
+    session_history: history.History | None = None
+
+    def __init__(self, clock: Clock | None = None) -> None:
+        self.clock = clock or system_clock
+        self._wakeup = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._suspended = threading.Event()
+        # Strategy to restart the running session with, and whether to keep
+        # its remaining time.
+        self._restart: tuple[Strategy, bool] | None = None
+        # Called by `wakeup`, e.g. to post a tick to the engine's loop.
+        self.wakeup_callback: typing.Callable[[], None] | None = None
+        # Thread id and `call_soon_threadsafe` of the loop running the
+        # session, set by the timer engine, see `call_soon`.
+        self.session_loop: tuple[int, Post] | None = None
+        # Monotonic times of the session start and of the release request.
+        self._session_started: float | None = None
+        self._release_requested: float | None = None
+        # Why the running session ends, None until released or failed.
+        self.end_reason: str | None = None
+        self._started_wall = 0.0
+        self._requested_seconds: float | None = None
+        # Called on the session thread after each session ended.
+        self.session_listeners: list[typing.Callable[[], None]] = []
+        # Backend, lock timeout read from it and the monotonic read time.
+        self._lock_timeout: tuple[backends.Backend, float | None, float] | None = None
 
     def set_suspended(self, val: bool):
         """Sets suspend state."""
         self.is_suspend_screen_lock_on = val
+        if val:
+            self._suspended.set()
+        else:
+            self._suspended.clear()
+            self.wakeup()
+
+    def wakeup(self):
+        """Wakes up a strategy blocked in `wait`."""
+        self._wakeup.set()
+        if self.wakeup_callback is not None:
+            self.wakeup_callback()
+
+    def call_soon(self, callback: typing.Callable[[], None]):
+        """Runs `callback` on the thread running the session.
+
+        The OS keeps the execution state per thread, so a release or restart
+        has to run on the thread that took the hold. With a timer engine the
+        callback is posted to its loop, otherwise it runs right away.
+        """
+        session_loop = self.session_loop
+        if session_loop is None or session_loop[0] == threading.get_ident():
+            callback()
+        else:
+            session_loop[1](callback)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Blocks until `timeout` elapses or `wakeup` is called.
+
+        Args:
+            timeout: Seconds to wait, None waits until woken up.
+
+        Returns:
+            True if woken up, False on timeout.
+        """
+        woken = self.clock.wait(self._wakeup, timeout)
+        if self.is_suspend_screen_lock_on:
+            # Keep a release latched so later waits return immediately.
+            self._wakeup.clear()
+        return woken
+
+    def wait_until_idle(self, timeout: float | None = None) -> bool:
+        """Blocks until no session is running.
+
+        Returns:
+            True if idle, False on timeout.
+        """
+        return self._idle.wait(timeout)
+
+    def wait_until_suspended(self, timeout: float | None = None) -> bool:
+        """Blocks until a session has taken hold.
+
+        Returns:
+            True if suspended, False on timeout.
+        """
+        return self._suspended.wait(timeout)
+
+    def is_running(self) -> bool:
+        """Returns True while `suspend_screen_lock` runs."""
+        return not self._idle.is_set()
 
     def set_strategy(self, ndx: int):
         """Sets strategy for the Screen suspend."""
         self.strategy = strategies[ndx]
 
-    def save_settings(self, usr_settings: qt.QSettings):
+    def switch_strategy(self, ndx: int):
+        """Sets strategy, moving a running session over to it."""
+        if self.strategy.ndx != ndx:
+            self.restart(ndx, carry_over=True)
+
+    def restart(self, ndx: int | None = None, carry_over: bool = False):
+        """Restarts the running session with the current settings.
+
+        Args:
+            ndx: Strategy to restart with, defaults to the current one.
+            carry_over: Keeps the remaining time instead of a fresh duration.
+        """
+        self.call_soon(functools.partial(self._restart_session, ndx, carry_over))
+
+    def _restart_session(self, ndx: int | None, carry_over: bool):
+        strategy = self.strategy if ndx is None else strategies[ndx]
+        if not self.is_running():
+            self.strategy = strategy
+            return
+        self._restart = strategy, carry_over
+        self.strategy.impl.release_screen_lock_suspend(self)
+
+    def extend(self, seconds: float) -> float:
+        """Moves the deadline of the running timed session.
+
+        Returns:
+            Remaining seconds.
+        """
+        schedule = self.schedule
+        if schedule is None or schedule.deadline is None:
+            raise ValueError("No timed hold is running.")
+        schedule.extend(seconds)
+        self.wakeup()
+        return typing.cast(float, schedule.remaining())
+
+    def os_lock_timeout(self) -> float | None:
+        """OS lock timeout, None if unknown.
+
+        Read from the backend of the strategy at most every
+        `settings.LOCK_TIMEOUT_CACHE_SECONDS`, since e.g. on Linux that runs
+        gsettings.
+        """
+        backend = self.strategy.impl.backend
+        now = self.clock.monotonic()
+        cached = self._lock_timeout
+        if (
+            cached is None
+            or cached[0] is not backend
+            or now - cached[2] >= settings.LOCK_TIMEOUT_CACHE_SECONDS
+        ):
+            cached = (backend, backend.lock_timeout_seconds(), now)
+            self._lock_timeout = cached
+        return cached[1]
+
+    def lock_timeout_seconds(self) -> float:
+        """OS lock timeout, `settings.LOCK_TIMEOUT_SECONDS` if unknown."""
+        return self.os_lock_timeout() or settings.LOCK_TIMEOUT_SECONDS
+
+    def refresh_interval(self) -> int:
+        """Refresh interval in use, a fraction of the lock timeout in auto mode.
+
+        The interval is stretched by `interval_scale`, e.g. on battery power.
+        """
+        if not self.is_auto_interval:
+            return round(self.interval_seconds * self.interval_scale)
+        interval = self.lock_timeout_seconds() * settings.AUTO_INTERVAL_FRACTION
+        interval = int(interval * self.interval_scale)
+        return max(interval, settings.MIN_REFRESH_INTERVAL_SECONDS)
+
+    def remaining_seconds(self) -> float | None:
+        """Seconds left in the running timed session."""
+        schedule = self.schedule
+        return None if schedule is None else schedule.remaining()
+
+    def save_settings(self, usr_settings: UserSettings):
         """Saves model settings."""
         usr_settings.beginGroup("ModelSettings")
         usr_settings.setValue("strategy_index", self.strategy.ndx)
         usr_settings.setValue("duration_checked", self.is_duration_checked)
         usr_settings.setValue("duration_minutes", self.duration_minutes)
         usr_settings.setValue("refresh_interval_seconds", self.interval_seconds)
+        usr_settings.setValue("auto_interval", self.is_auto_interval)
         usr_settings.endGroup()
 
-    def load_settings(self, usr_settings: qt.QSettings):
+    def load_settings(self, usr_settings: UserSettings):
         """Loads model settings."""
         usr_settings.beginGroup("ModelSettings")
         strategy_ndx = typing.cast(
@@ -208,25 +622,121 @@ class Model:
                 "refresh_interval_seconds", settings.DEFAULT_REFRESH_INTERVAL_SECONDS
             ),
         )
+        self.is_auto_interval = typing.cast(
+            bool, usr_settings.value("auto_interval", False)
+        )
         usr_settings.endGroup()
 
     def suspend_screen_lock(self, **kwargs):
         """Suspends screen lock."""
+        self.begin_session()
+        try:
+            while True:
+                if self.is_duration_checked:
+                    self.strategy.impl.duration_suspend_screen_lock(self, **kwargs)
+                else:
+                    self.strategy.impl.suspend_screen_lock(self, **kwargs)
+                if not self.take_restart(kwargs):
+                    break
+        except Exception:
+            self.end_reason = "failed"
+            raise
+        finally:
+            self.end_session()
+
+    def begin_session(self, timed: bool | None = None):
+        """Marks a session as running, see `suspend_screen_lock`.
+
+        Args:
+            timed: Overrides is_duration_checked for the history.
+        """
         logger.info("--- Suspend screen lock ---\n%s", str(self))
-        if self.is_duration_checked:
-            self.strategy.impl.duration_suspend_screen_lock(**kwargs)
-        else:
-            self.strategy.impl.suspend_screen_lock(**kwargs)
+        self._idle.clear()
+        self._wakeup.clear()
+        self._restart = None
+        self._session_started = self.clock.monotonic()
+        self._release_requested = None
+        self.end_reason = None
+        self._started_wall = self.clock.time()
+        self._requested_seconds = None
+        metrics.backend_collector.switch(self.strategy.name)
+        if self.is_duration_checked if timed is None else timed:
+            self._requested_seconds = self.duration_minutes * settings.MINUTE
+        metrics.registry.inc("sessions_total", strategy=self.strategy.name)
+
+    def take_restart(self, kwargs: dict) -> bool:
+        """Switches to a pending restart, updating the session `kwargs`.
+
+        Returns:
+            False if no restart is pending and the session ends.
+        """
+        if self._restart is None:
+            return False
+        if self._release_requested is not None:
+            # Released while the restart was pending, the session ends.
+            self._restart = None
+            return False
+        (self.strategy, carry_over), self._restart = self._restart, None
+        metrics.backend_collector.switch(self.strategy.name)
+        remaining = self.remaining_seconds()
+        kwargs.pop("duration_seconds", None)
+        if carry_over and remaining is not None:
+            kwargs["duration_seconds"] = remaining
+        self._wakeup.clear()
+        logger.info("Restarted with strategy %s", self.strategy.name)
+        return True
+
+    def end_session(self):
+        """Marks the session as ended."""
+        now = self.clock.monotonic()
+        strategy = self.strategy.name
+        if self._session_started is not None:
+            metrics.registry.observe(
+                "session_seconds", now - self._session_started, strategy=strategy
+            )
+        if self._release_requested is not None:
+            metrics.registry.observe(
+                "release_latency_seconds",
+                now - self._release_requested,
+                strategy=strategy,
+            )
+        if self.session_history is not None and self._session_started is not None:
+            self.session_history.record(
+                history.Session(
+                    self._started_wall,
+                    now - self._session_started,
+                    strategy,
+                    self.end_reason or "expired",
+                    self._requested_seconds,
+                )
+            )
+        self._session_started = self._release_requested = None
+        self.schedule = None
+        self._idle.set()
+        for listener in list(self.session_listeners):
+            listener()
 
-    def release_screen_lock_suspend(self):
-        """Release screen lock prevention."""
-        self.strategy.impl.release_screen_lock_suspend()
+    def release_screen_lock_suspend(self, reason: str = "released"):
+        """Release screen lock prevention.
+
+        Args:
+            reason: Why the session ends, for the history.
+        """
+        if self.is_running() and self._release_requested is None:
+            self._release_requested = self.clock.monotonic()
+            self.end_reason = reason
+        self.call_soon(lambda: self.strategy.impl.release_screen_lock_suspend(self))
+
+    def describe_interval(self) -> str:
+        """Refresh interval for display, e.g. `auto, 150 sec`."""
+        interval = f"{self.refresh_interval()} sec"
+        return f"auto, {interval}" if self.is_auto_interval else interval
 
     def __str__(self) -> str:
         return ">>> " + "\n>>> ".join(
             [
                 f"Duration: {str(self.duration_minutes)} min",
-                f"Interval: {str(self.interval_seconds)} sec",
+                f"Interval: {self.describe_interval()}",
                 f"Using duration: {str(self.is_duration_checked)}",
                 f"Strategy: {self.strategy.name}",
             ]
@@ -11,16 +11,69 @@ WINDOW_FIXED_WIDTH = 280
 WINDOW_FIXED_HEIGHT = 280
 WINDOW_POSITION = 200, 200
 DEFAULT_APP_THEME = "light"
+APP_THEMES = ["dark", "light"]
+# Generated theme styles, None keeps them in the per-user cache directory.
+STYLE_CACHE_DIR: str | None = None
+# Icons by role, shipped as `assets/<name>-<theme>.png` for each app theme.
+ICON_NAMES = dict(
+    settings="settings",
+    exit="exit-door",
+    coffee_on="coffee-on",
+    coffee_off="coffee-off",
+)
 
 
 DEFAULT_STRATEGY_INDEX = 0
-MULTITHREADING = True
 START_IN_SUSPEND_MODE = False
 
 STATUS_MESSAGE_DURATION_MSECONDS = 3000
+PROGRESS_INTERVAL_SECONDS = 1
+TIMER_ALIGNMENT_SECONDS = 1
+RESUME_THRESHOLD_SECONDS = 30
+INHIBIT_STARTUP_SECONDS = 0.1
+INHIBIT_RELEASE_SECONDS = 1
+CONTROL_TIMEOUT_SECONDS = 1
+STOP_TIMEOUT_SECONDS = 5
+PROCESS_POLL_SECONDS = 1
+FILE_POLL_SECONDS = 2
+FILE_IDLE_SECONDS = 60
+ACTIVITY_SAMPLE_SECONDS = 5
+ACTIVITY_IDLE_SECONDS = 60
+ACTIVITY_CPU_PERCENT = 20
+ACTIVITY_DISK_BYTES_PER_SECOND = 1_000_000
+ACTIVITY_NET_BYTES_PER_SECOND = 100_000
+# Low thresholds, as a fraction of the high ones.
+ACTIVITY_HYSTERESIS = 0.5
 HOUR = 60
 MINUTE = 60
 DEFAULT_DURATION_MINUTES = 2 * HOUR
 DEFAULT_REFRESH_INTERVAL_SECONDS = 2 * MINUTE
+# Idle time after which the OS locks the screen.
+LOCK_TIMEOUT_SECONDS = 5 * MINUTE
+# How long a lock timeout read from the OS is reused.
+LOCK_TIMEOUT_CACHE_SECONDS = MINUTE
+# Auto refresh interval, as a fraction of the lock timeout.
+AUTO_INTERVAL_FRACTION = 0.5
+MIN_REFRESH_INTERVAL_SECONDS = 10
+# Power status polling where no change notifications exist.
+POWER_POLL_SECONDS = MINUTE
+# Session history file, None keeps it in the per-user state directory.
+HISTORY_PATH: str | None = None
+HISTORY_FILE_NAME = "history.sqlite3"
+HISTORY_MAX_SESSIONS = 100_000
+HISTORY_STATS_DAYS = 90
+# User settings file, None keeps it in the per-user config directory.
+SETTINGS_PATH: str | None = None
+SETTINGS_FILE_NAME = "settings.json"
+# Keep the GUI settings in QSettings (the registry on Windows) instead.
+SETTINGS_IN_QSETTINGS = False
+# Delay between the first unsaved settings change and the write.
+SETTINGS_WRITE_DELAY_SECONDS = 1.0
+METRICS_HOST = "127.0.0.1"
+METRICS_TEXTFILE_SECONDS = 15
+# Recurring hold windows of `cli --schedule`, e.g. "mon-fri 08:00-18:00".
+SCHEDULES: list[str] = []
+# Longest sleep between schedule checks, bounds the delay after a clock change.
+SCHEDULE_RECHECK_SECONDS = HOUR * MINUTE
 MAX_INT = 2_147_483_647
 MIN_INT = -MAX_INT - 1
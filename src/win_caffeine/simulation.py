@@ -0,0 +1,133 @@
+"""Fast-forward simulation of hold sessions on a virtual clock.
+
+Runs the real strategy and scheduler code against `clock.SimulatedClock` and a
+`backends.RecordingBackend`, so a full day of holds completes in
+milliseconds on any platform.
+"""
+import argparse
+import dataclasses
+import logging
+import time
+
+from win_caffeine import engine
+from win_caffeine import screen_lock
+from win_caffeine import settings
+from win_caffeine.backends import RecordingBackend
+from win_caffeine.clock import SimulatedClock
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass
+class SimulationReport:
+    """Outcome of a simulated hold session."""
+
+    strategy: str
+    simulated_seconds: float
+    elapsed_seconds: float
+    wakeups: int
+    api_calls: int
+    progress_reports: int
+    max_countdown_error: float
+
+    def __str__(self) -> str:
+        return ">>> " + "\n>>> ".join(
+            [
+                f"Strategy: {self.strategy}",
+                f"Simulated: {self.simulated_seconds:.0f} sec",
+                f"Elapsed: {self.elapsed_seconds * 1000:.1f} ms",
+                f"Wakeups: {self.wakeups}",
+                f"API calls: {self.api_calls}",
+                f"Progress reports: {self.progress_reports}",
+                f"Max countdown error: {self.max_countdown_error:.3f} sec",
+            ]
+        )
+
+
+def simulate(
+    strategy_name: str,
+    duration_minutes: int | None = None,
+    interval_seconds: int = settings.DEFAULT_REFRESH_INTERVAL_SECONDS,
+    release_after_seconds: float | None = None,
+    suspends: list[tuple[float, float]] | None = None,
+    progress: bool = True,
+    timers: bool = False,
+) -> SimulationReport:
+    """Runs one hold session on a simulated clock.
+
+    Args:
+        strategy_name: One of `screen_lock.strategy_names`.
+        duration_minutes: Session length, None holds until released.
+        interval_seconds: Refresh interval.
+        release_after_seconds: Releases the hold after this many seconds.
+        suspends: (at_seconds, sleep_seconds) system sleeps to inject.
+        progress: Attaches a progress callback, like the GUI and CLI do.
+        timers: Runs the session on `engine.TimerEngine` instead of blocking.
+
+    Returns:
+        SimulationReport of the session.
+    """
+    if duration_minutes is None and release_after_seconds is None:
+        raise ValueError("An indefinite hold needs release_after_seconds.")
+
+    clock = SimulatedClock()
+    backend = RecordingBackend(clock=clock)
+    model = screen_lock.Model(clock)
+    ndx = screen_lock.strategy_names.index(strategy_name)
+    impl = type(screen_lock.strategies[ndx].impl)(backend)
+    model.strategy = screen_lock.Strategy(ndx, strategy_name, impl)
+    model.is_duration_checked = duration_minutes is not None
+    model.duration_minutes = duration_minutes or 0
+    model.interval_seconds = interval_seconds
+
+    if release_after_seconds is not None:
+        clock.call_later(release_after_seconds, model.release_screen_lock_suspend)
+    for at_seconds, sleep_seconds in suspends or []:
+        clock.call_at(at_seconds, lambda s=sleep_seconds: clock.suspend(s))
+
+    start_time = clock.time()
+    end_time = start_time + model.duration_minutes * settings.MINUTE
+    reports = []
+
+    def progress_callback(msg: str):
+        reports.append(abs(int(msg) - (end_time - clock.time())))
+
+    started = time.perf_counter()
+    callback = progress_callback if progress else None
+    if timers:
+        loop = engine.HeadlessLoop(clock)
+        engine.TimerEngine(model, loop).start(progress_callback=callback)
+        loop.run(until=lambda: not model.is_running())
+    else:
+        model.suspend_screen_lock(progress_callback=callback)
+    return SimulationReport(
+        strategy=strategy_name,
+        simulated_seconds=clock.time() - start_time,
+        elapsed_seconds=time.perf_counter() - started,
+        wakeups=clock.wakeups,
+        api_calls=backend.count(),
+        progress_reports=len(reports),
+        max_countdown_error=max(reports, default=0.0),
+    )
+
+
+def main() -> int:
+    """Simulates a hold with every strategy and prints the reports."""
+    parser = argparse.ArgumentParser(prog="python -m win_caffeine.simulation")
+    parser.add_argument("-d", "--duration", type=int, default=24 * settings.HOUR)
+    parser.add_argument(
+        "-i", "--interval", type=int, default=settings.DEFAULT_REFRESH_INTERVAL_SECONDS
+    )
+    parser.add_argument("--no-progress", action="store_true")
+    args = parser.parse_args()
+
+    for name in screen_lock.strategy_names:
+        report = simulate(
+            name, args.duration, args.interval, progress=not args.no_progress
+        )
+        print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,222 @@
+"""Typed user settings store, independent of Qt.
+
+`SettingsStore` implements `screen_lock.UserSettings` over an in-memory cache,
+so reads never touch the disk and `Model.save_settings` works unchanged. Writes
+only mark the cache dirty; a single write follows
+`settings.SETTINGS_WRITE_DELAY_SECONDS` after the first unsaved change, so a
+burst of changes, e.g. while a spinbox is scrolled, costs one write. The cache
+is kept in a JSON file, replaced atomically, or in `QSettings` through
+`QSettingsBacking`. TOML would need a third-party writer, hence JSON. A JSON
+store that has no file yet is seeded once from the former `QSettings` values,
+see `import_legacy`.
+"""
+import functools
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import typing
+
+from win_caffeine import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Backing(typing.Protocol):
+    def load(self) -> dict[str, typing.Any]:
+        """Reads all values, keyed by `Group/key`."""
+        ...
+
+    def save(self, values: dict[str, typing.Any]):
+        """Replaces all values."""
+        ...
+
+
+def default_path() -> str:
+    """Settings file in the per-user config directory."""
+    if sys.platform == "win32":
+        base = os.environ.get("APPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config")
+    return os.path.join(base, settings.APP_NAME, settings.SETTINGS_FILE_NAME)
+
+
+class JsonFile:
+    """Values in a JSON file, written to a temporary file and renamed over it."""
+
+    def __init__(self, path: str | None = None) -> None:
+        """JSON file backing.
+
+        Args:
+            path: File path, defaults to `settings.SETTINGS_PATH` or else
+                `default_path()`.
+        """
+        self.path = path or settings.SETTINGS_PATH or default_path()
+
+    def load(self) -> dict[str, typing.Any]:
+        try:
+            with open(self.path) as f:
+                values = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.error("Ignoring unreadable settings %s: %s", self.path, e)
+            return {}
+        return values if isinstance(values, dict) else {}
+
+    def save(self, values: dict[str, typing.Any]):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".settings-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(values, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+
+class QSettingsBacking:
+    """Values in a `QSettings` object, for an existing registry or INI store."""
+
+    def __init__(self, qsettings: typing.Any) -> None:
+        self.qsettings = qsettings
+
+    def load(self) -> dict[str, typing.Any]:
+        return {key: self.qsettings.value(key) for key in self.qsettings.allKeys()}
+
+    def save(self, values: dict[str, typing.Any]):
+        for key, value in values.items():
+            self.qsettings.setValue(key, value)
+        self.qsettings.sync()
+
+
+def coerce(value: typing.Any, default: typing.Any) -> typing.Any:
+    """Converts a stored value to the type of `default`.
+
+    JSON has no tuples and QSettings may return every value as a string, so
+    values are read back typed by their default.
+    """
+    if default is None or value is None or isinstance(value, type(default)):
+        return value
+    kind = type(default)
+    try:
+        if kind is bool:
+            if isinstance(value, str):
+                return value.lower() in ("true", "1")
+            return bool(value)
+        if kind in (tuple, list) and isinstance(value, (tuple, list)):
+            return kind(coerce(item, default[0]) if default else item for item in value)
+        return kind(value)
+    except (TypeError, ValueError):
+        logger.warning("Ignoring setting %r, expected %s.", value, kind.__name__)
+        return default
+
+
+class SettingsStore:
+    """Grouped, typed settings served from memory with coalesced writes."""
+
+    def __init__(
+        self,
+        backing: Backing | None = None,
+        delay_seconds: float = settings.SETTINGS_WRITE_DELAY_SECONDS,
+    ) -> None:
+        """Settings store, values are loaded right away.
+
+        Args:
+            backing: Persistent storage, defaults to the JSON settings file.
+            delay_seconds: Delay between the first unsaved change and the write.
+        """
+        self.backing = backing or JsonFile()
+        self.delay_seconds = delay_seconds
+        self._lock = threading.Lock()
+        # Serializes the writes of the timer thread and of the caller, e.g.
+        # the GUI thread, since the backing may not be thread-safe.
+        self._save_lock = threading.Lock()
+        self._values = self.backing.load()
+        self._groups: list[str] = []
+        self._timer: threading.Timer | None = None
+        self._dirty = False
+
+    def beginGroup(self, prefix: str):
+        self._groups.append(prefix)
+
+    def endGroup(self):
+        self._groups.pop()
+
+    def setValue(self, key: str, value: typing.Any):
+        if isinstance(value, tuple):
+            value = list(value)
+        key = self._key(key)
+        with self._lock:
+            if key in self._values and self._values[key] == value:
+                return
+            self._values[key] = value
+            self._dirty = True
+            if self._timer is None:
+                self._timer = threading.Timer(self.delay_seconds, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def update(self, values: dict[str, typing.Any]):
+        """Sets many `Group/key` values at once, written on the next flush."""
+        with self._lock:
+            self._values.update(values)
+            self._dirty = True
+
+    def value(self, key: str, defaultValue: typing.Any = None) -> typing.Any:
+        """Cached value of `key`, converted to the type of `defaultValue`."""
+        with self._lock:
+            value = self._values.get(self._key(key))
+        if value is None:
+            return defaultValue
+        return coerce(value, defaultValue)
+
+    def flush(self):
+        """Writes pending changes now, after any write in progress."""
+        with self._save_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if not self._dirty:
+                    return
+                # Taken under the save lock, so the last write is the newest.
+                values = dict(self._values)
+                self._dirty = False
+            try:
+                self.backing.save(values)
+            except OSError as e:
+                logger.error("Could not save settings: %s", e)
+
+    def _key(self, key: str) -> str:
+        return "/".join([*self._groups, key])
+
+
+def import_legacy(settings_store: SettingsStore, legacy: Backing) -> bool:
+    """Copies the values of `legacy` into a JSON store whose file is missing.
+
+    Runs once: the import writes the file, later calls find it and do nothing.
+
+    Returns:
+        True if values were imported.
+    """
+    backing = settings_store.backing
+    if not isinstance(backing, JsonFile) or os.path.exists(backing.path):
+        return False
+    values = legacy.load()
+    if not values:
+        return False
+    settings_store.update(values)
+    settings_store.flush()
+    logger.info("Imported %d settings into %s.", len(values), backing.path)
+    return True
+
+
+@functools.lru_cache(maxsize=None)
+def default_store() -> SettingsStore:
+    """Store shared by the CLI and the GUI."""
+    return SettingsStore()
@@ -0,0 +1,98 @@
+"""On-disk cache of the generated theme styles.
+
+Generating a qdarktheme style renders a large stylesheet template and builds
+its palette on every launch. The cache keeps the stylesheet and the palette
+colors of each theme in a JSON file keyed by the theme and the library
+versions, so later launches and theme switches only read it, and each style
+is read once per run. The stylesheet refers to icon files in the qdarktheme
+cache directory; an entry whose icon files are gone, e.g. after
+`qdarktheme.clear_cache()`, is rebuilt.
+"""
+import collections
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import typing
+
+from win_caffeine import settings
+
+logger = logging.getLogger(__name__)
+
+URL_PATTERN = re.compile(r"url\(([^)]+)\)")
+
+# A theme style: the stylesheet and the palette colors set by the theme, as
+# (color group, color role, `#AARRGGBB`) lists.
+Style = collections.namedtuple("Style", ["stylesheet", "palette"])
+
+
+def default_directory() -> str:
+    """Style cache in the per-user cache directory."""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        return os.path.join(base, settings.APP_NAME, "cache")
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, settings.APP_NAME)
+
+
+class StyleCache:
+    """Styles by theme, in memory and on disk."""
+
+    def __init__(self, version: str, directory: str | None = None) -> None:
+        """Style cache.
+
+        Args:
+            version: Versions the styles depend on, part of the file names.
+            directory: Cache directory, defaults to `settings.STYLE_CACHE_DIR`
+                or else `default_directory()`.
+        """
+        self.version = re.sub(r"[^\w.-]", "_", version)
+        self.directory = directory or settings.STYLE_CACHE_DIR or default_directory()
+        self._styles: dict[str, Style] = {}
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, f"style-{name}-{self.version}.json")
+
+    def get(self, name: str, build: typing.Callable[[], Style]) -> Style:
+        """Style of theme `name`, calling `build` only if it is not cached."""
+        style = self._styles.get(name) or self.load(name)
+        if style is None:
+            style = build()
+            try:
+                self.save(name, style)
+            except OSError as e:
+                logger.error("Could not cache style %s: %s", name, e)
+        self._styles[name] = style
+        return style
+
+    def load(self, name: str) -> Style | None:
+        """Reads a cached style, None if it is missing or stale."""
+        path = self.path(name)
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            style = Style(data["stylesheet"], data["palette"])
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning("Ignoring unreadable style cache %s: %s", path, e)
+            return None
+        files = URL_PATTERN.findall(style.stylesheet)
+        if not all(os.path.exists(file) for file in files):
+            logger.info("Rebuilding style %s, its icon files are gone.", name)
+            return None
+        return style
+
+    def save(self, name: str, style: Style):
+        """Writes a style atomically, so readers never see a partial file."""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".style-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(style._asdict(), f)
+            os.replace(tmp_path, self.path(name))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
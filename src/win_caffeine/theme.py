@@ -1,35 +1,181 @@
-"""App theme."""
+"""App theme, its styles and its icons.
+
+Styles are generated by qdarktheme once per theme and library version and
+then read from `style_cache`, so launches and theme switches skip building
+the stylesheet. The "auto" theme is resolved from the system setting, not from
+the palette of a first styling pass, and followed while the app runs.
+
+Icons are package data, read with `importlib.resources` so that the app runs
+from any working directory. `icons` decodes the icon set of a theme once;
+state changes then only pick preloaded `QIcon`s, and a theme change hands the
+listeners the whole set of the new theme.
+"""
+import logging
+import threading
+import time
+import typing
+
 import qdarktheme  # type: ignore
 
 from win_caffeine import qt
 from win_caffeine import settings
+from win_caffeine import style_cache
 from win_caffeine import utils
 
+logger = logging.getLogger(__name__)
+
+PALETTE_GROUPS = ["Active", "Inactive", "Disabled"]
+PALETTE_ROLES = [
+    "WindowText",
+    "Button",
+    "Light",
+    "Midlight",
+    "Dark",
+    "Mid",
+    "Text",
+    "BrightText",
+    "ButtonText",
+    "Base",
+    "Window",
+    "Shadow",
+    "Highlight",
+    "HighlightedText",
+    "Link",
+    "LinkVisited",
+    "AlternateBase",
+    "ToolTipBase",
+    "ToolTipText",
+    "PlaceholderText",
+]
+
+
+class IconSet(typing.NamedTuple):
+    """The icons of one theme, a field per role of `settings.ICON_NAMES`."""
+
+    settings: qt.QIcon
+    exit: qt.QIcon
+    coffee_on: qt.QIcon
+    coffee_off: qt.QIcon
+
 
 class Theme:
     current = settings.DEFAULT_APP_THEME
 
 
-class IconPath:
-    @property
-    def settings(self) -> str:
-        return f"assets/settings-{theme.current}.png"
+def load_icon(file_name: str) -> qt.QIcon:
+    """Decodes an icon of the package assets.
 
-    @property
-    def exit(self) -> str:
-        return f"assets/exit-door-{theme.current}.png"
+    Raises:
+        ValueError: The file is not a valid image.
+    """
+    pixmap = qt.QPixmap()
+    if not pixmap.loadFromData(utils.read_asset(file_name)):
+        raise ValueError(f"Cannot decode icon {file_name}.")
+    return qt.QIcon(pixmap)
 
-    @property
-    def coffee_on(self) -> str:
-        return f"assets/coffee-on-{theme.current}.png"
+
+class IconCache:
+    """Icon sets by theme, decoded on first use. Needs a `QApplication`."""
+
+    def __init__(self) -> None:
+        self._sets: dict[str, IconSet] = {}
+        # Called with the icon set of the new theme on every theme change.
+        self.listeners: list[typing.Callable[[IconSet], None]] = []
+
+    def get(self, name: str) -> IconSet:
+        if name not in self._sets:
+            self._sets[name] = IconSet(
+                **{
+                    role: load_icon(f"{file_name}-{name}.png")
+                    for role, file_name in settings.ICON_NAMES.items()
+                }
+            )
+        return self._sets[name]
+
+    def preload(self):
+        """Decodes the icon sets of all themes."""
+        for name in settings.APP_THEMES:
+            self.get(name)
 
     @property
-    def coffee_off(self) -> str:
-        return f"assets/coffee-off-{theme.current}.png"
+    def current(self) -> IconSet:
+        return self.get(theme.current)
+
+    def notify(self):
+        icon_set = self.current
+        for listener in self.listeners:
+            listener(icon_set)
+
+
+def build_style(name: str) -> style_cache.Style:
+    """Generates the stylesheet and palette of theme `name` with qdarktheme."""
+    palette = qdarktheme.load_palette(name, for_stylesheet=True)
+    colors = []
+    for group_name in PALETTE_GROUPS:
+        group = getattr(qt.QPalette, group_name)
+        for role_name in PALETTE_ROLES:
+            role = getattr(qt.QPalette, role_name)
+            if palette.isBrushSet(group, role):
+                color = palette.color(group, role).name(qt.QColor.HexArgb)
+                colors.append([group_name, role_name, color])
+    return style_cache.Style(qdarktheme.load_stylesheet(name), colors)
+
+
+def to_palette(colors: list[list[str]]) -> qt.QPalette:
+    """Palette setting only the cached colors, like the generated one."""
+    palette = qt.QPalette()
+    for group_name, role_name, color in colors:
+        palette.setColor(
+            getattr(qt.QPalette, group_name),
+            getattr(qt.QPalette, role_name),
+            qt.QColor(color),
+        )
+    return palette
+
+
+def system_theme() -> str:
+    """Theme of the OS, `settings.DEFAULT_APP_THEME` if unknown."""
+    import darkdetect  # type: ignore
+
+    name = darkdetect.theme()
+    return name.lower() if name else settings.DEFAULT_APP_THEME
+
+
+class SystemThemeListener(qt.QObject):
+    """Applies the OS theme whenever it changes."""
+
+    changed = qt.Signal(str)
+
+    def __init__(self, app: qt.QApplication) -> None:
+        super().__init__(app)
+        self.app = app
+        # Cleared while an explicit theme is set.
+        self.enabled = True
+        self.changed.connect(self.on_changed)
+        thread = threading.Thread(target=self._listen, name="theme-listener")
+        thread.daemon = True
+        thread.start()
+
+    def on_changed(self, name: str):
+        if self.enabled:
+            apply_theme(name.lower(), self.app)
+
+    def _listen(self):
+        import darkdetect
+
+        try:
+            # Blocks, calling back from this thread on every change.
+            darkdetect.listener(self.changed.emit)
+        except Exception as e:
+            logger.warning("Cannot follow the system theme: %s", e)
 
 
 theme = Theme()
-icon_path = IconPath()
+icons = IconCache()
+styles = style_cache.StyleCache(
+    f"qdarktheme-{qdarktheme.__version__}-qt-{qt.qVersion()}"
+)
+_listener: SystemThemeListener | None = None
 
 
 def get_current_theme() -> str:
@@ -37,9 +183,34 @@ def get_current_theme() -> str:
 
 
 def set_theme(name: str, app: qt.QApplication):
+    """Applies theme `name`, "auto" follows the OS theme.
+
+    Raises:
+        ValueError: No such theme.
+    """
+    global _listener
+
     if name not in qdarktheme.get_themes():
         raise ValueError(f"Theme {name} is not available.")
-    qdarktheme.setup_theme(name, default_theme="light")
     if name == "auto":
-        name = utils.theme_from_palette(app.palette())
-    theme.current = name
+        apply_theme(system_theme(), app)
+        if _listener is None:
+            _listener = SystemThemeListener(app)
+    else:
+        apply_theme(name, app)
+    if _listener is not None:
+        _listener.enabled = name == "auto"
+
+
+def apply_theme(name: str, app: qt.QApplication):
+    """Applies the style of the dark or light theme, generating it if needed."""
+    started = time.perf_counter()
+    style = styles.get(name, lambda: build_style(name))
+    app.setStyleSheet(style.stylesheet)
+    app.setPalette(to_palette(style.palette))
+    logger.debug(
+        "Applied %s theme in %.1f ms.", name, (time.perf_counter() - started) * 1000
+    )
+    if name != theme.current:
+        theme.current = name
+        icons.notify()
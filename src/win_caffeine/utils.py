@@ -1,7 +1,9 @@
 """Util functions."""
+import typing
 from datetime import timedelta
 
-from win_caffeine import qt
+if typing.TYPE_CHECKING:
+    from win_caffeine import qt
 
 
 def get_time_hh_mm_ss(sec: int):
@@ -9,7 +11,7 @@ def get_time_hh_mm_ss(sec: int):
     return str(timedelta(seconds=sec))
 
 
-def is_dark_theme(palette: qt.QPalette) -> bool:
+def is_dark_theme(palette: "qt.QPalette") -> bool:
     text_color = palette.color(palette.Text)
     lum = sum((text_color.red(), text_color.green(), text_color.blue())) // 3
     return lum < 127
@@ -17,3 +19,11 @@ def is_dark_theme(palette: qt.QPalette) -> bool:
 
 def theme_from_palette(palette) -> str:
     return "dark" if is_dark_theme(palette) else "light"
+
+
+def read_asset(name: str) -> bytes:
+    """Reads a file of the package `assets` directory, wherever it is installed."""
+    # Imported here, it pulls in pathlib and zipfile, which the CLI does not need.
+    import importlib.resources
+
+    return (importlib.resources.files(__package__) / "assets" / name).read_bytes()
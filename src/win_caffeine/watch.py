@@ -0,0 +1,83 @@
+"""Process exit notification through blocking OS waits.
+
+Exits are detected by blocking on the OS rather than polling: a child wait for
+our own children, a pidfd on Linux, a process handle on Windows and a kqueue
+on BSD and macOS. Only where none of these exist is the process polled.
+"""
+import ctypes
+import errno
+import logging
+import os
+import select
+import sys
+import time
+
+from win_caffeine import settings
+
+logger = logging.getLogger(__name__)
+
+SYNCHRONIZE = 0x00100000
+INFINITE = 0xFFFFFFFF
+
+
+def wait_pid(pid: int):
+    """Blocks until process `pid` exits.
+
+    Raises:
+        ProcessLookupError: No process `pid`.
+    """
+    if sys.platform == "win32":
+        _wait_handle(pid)
+    elif hasattr(os, "pidfd_open"):
+        try:
+            fd = os.pidfd_open(pid)
+        except OSError as e:
+            if e.errno != errno.ENOSYS:
+                raise
+            _poll_pid(pid)
+            return
+        try:
+            poller = select.poll()
+            poller.register(fd, select.POLLIN)
+            poller.poll()
+        finally:
+            os.close(fd)
+    elif hasattr(select, "kqueue"):
+        kq = select.kqueue()
+        try:
+            event = select.kevent(
+                pid, select.KQ_FILTER_PROC, select.KQ_EV_ADD, select.KQ_NOTE_EXIT
+            )
+            kq.control([event], 1)
+        finally:
+            kq.close()
+    else:
+        _poll_pid(pid)
+
+
+def _wait_handle(pid: int):
+    kernel32 = ctypes.windll.kernel32
+    handle = kernel32.OpenProcess(SYNCHRONIZE, False, pid)
+    if not handle:
+        raise ProcessLookupError(f"No process {pid}.")
+    try:
+        kernel32.WaitForSingleObject(handle, INFINITE)
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+def _poll_pid(pid: int):
+    logger.debug("No process wait primitive, polling pid %s.", pid)
+    while pid_exists(pid):
+        time.sleep(settings.PROCESS_POLL_SECONDS)
+
+
+def pid_exists(pid: int) -> bool:
+    """Returns True if process `pid` exists, also if owned by another user."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
@@ -0,0 +1,65 @@
+"""Test activity-aware holds."""
+
+import pytest
+
+from win_caffeine import activity
+from win_caffeine import settings
+from win_caffeine.clock import SimulatedClock
+
+
+class ScriptedProvider:
+    """Counters growing by a scripted CPU load per sample."""
+
+    def __init__(self, cpu_percents: list[float]) -> None:
+        self.cpu_percents = iter(cpu_percents)
+        self.counters = activity.Counters(0, 0, 0, 0)
+
+    def sample(self) -> activity.Counters:
+        busy, total, disk, net = self.counters
+        percent = next(self.cpu_percents, 0)
+        self.counters = activity.Counters(busy + percent, total + 100, disk, net)
+        return self.counters
+
+
+def test_hold_ends_after_quiet_period_with_hysteresis():
+    """Load between the low and high threshold does not count as quiet."""
+    clock = SimulatedClock()
+    # First sample is the baseline, then busy, hovering, quiet.
+    loads = [0, 90, 15, 12, 15, 5, 5]
+    monitor = activity.ActivityMonitor(
+        activity.Thresholds(20, 1e6, 1e5), ScriptedProvider(loads), clock
+    )
+    monitor.wait_idle(idle_seconds=10, sample_seconds=5)
+    # Quiet from the fifth sample on, idle for 10 seconds after that.
+    assert clock.monotonic() == 35
+    assert not monitor.busy
+
+
+def test_thresholds_parse():
+    """Missing keys keep their defaults, unknown keys are rejected."""
+    thresholds = activity.Thresholds.parse("cpu=50,net=1e3")
+    assert thresholds.cpu_percent == 50
+    assert thresholds.net_bytes_per_second == 1000
+    assert thresholds.disk_bytes_per_second == settings.ACTIVITY_DISK_BYTES_PER_SECOND
+    with pytest.raises(ValueError):
+        activity.Thresholds.parse("gpu=1")
+
+
+def test_proc_provider_reads_counters(tmp_path):
+    """Whole disks and non-loopback interfaces are summed."""
+    (tmp_path / "net").mkdir()
+    (tmp_path / "stat").write_text("cpu  10 0 10 70 10 0 0 0 0 0\ncpu0 1 2 3\n")
+    (tmp_path / "diskstats").write_text(
+        "   8       0 sda 1 0 100 0 1 0 50 0 0 0 0\n"
+        "   8       1 sda1 1 0 100 0 1 0 50 0 0 0 0\n"
+    )
+    (tmp_path / "net" / "dev").write_text(
+        "Inter-|   Receive\n face |bytes\n"
+        "    lo: 999 0 0 0 0 0 0 0 999 0 0 0 0 0 0 0\n"
+        "  eth0: 100 0 0 0 0 0 0 0 20 0 0 0 0 0 0 0\n"
+    )
+    block = tmp_path / "block"
+    (block / "sda").mkdir(parents=True)
+    (block / "loop0").mkdir()
+    provider = activity.ProcProvider(str(tmp_path), str(block))
+    assert provider.sample() == activity.Counters(20, 100, 150 * 512, 120)
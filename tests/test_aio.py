@@ -0,0 +1,102 @@
+"""Test the asyncio API."""
+
+import asyncio
+import sys
+import threading
+
+from win_caffeine import aio
+from win_caffeine import backends
+from win_caffeine import screen_lock
+
+
+def test_concurrent_coroutines_share_one_activation():
+    """Overlapping holds take the inhibitor once and drop it after the last."""
+    backend = backends.RecordingBackend()
+
+    async def main():
+        strategy = screen_lock.Strategy(2, "Inhibitor", screen_lock.Inhibitor(backend))
+        hold = aio.AsyncHold(strategy, asyncio.get_running_loop())
+
+        async def job(seconds: float):
+            await hold.acquire()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                await hold.release()
+
+        await asyncio.gather(*(job(0.01 * n) for n in range(1, 6)))
+        assert not hold.model.is_running()
+        await job(0)
+
+    asyncio.run(main())
+    assert [call.name for call in backend.calls] == [
+        "inhibit",
+        "uninhibit",
+        "inhibit",
+        "uninhibit",
+    ]
+
+
+def test_keep_awake_refreshes_on_the_running_loop():
+    """keep_awake holds per strategy and releases on exit."""
+
+    async def main():
+        async with aio.keep_awake("ThreadExecState") as hold:
+            assert hold is aio.shared_hold("ThreadExecState")
+            assert hold.model.is_suspend_screen_lock_on
+            await aio.hold_for(0.01, "ThreadExecState")
+            assert hold.users == 1
+        assert not hold.model.is_running()
+        return hold
+
+    hold = asyncio.run(main())
+    assert hold.users == 0
+
+
+class SlowInhibitor(backends.LinuxBackend):
+    """Stand-in inhibitor process, recording the threads of its calls."""
+
+    def __init__(self) -> None:
+        super().__init__([sys.executable, "-c", "import time; time.sleep(60)"])
+        self.threads: list[int] = []
+
+    def inhibit(self, reason: str):
+        self.threads.append(threading.get_ident())
+        return super().inhibit(reason)
+
+    def uninhibit(self, handle):
+        self.threads.append(threading.get_ident())
+        super().uninhibit(handle)
+
+
+def test_blocking_inhibitor_runs_off_the_loop():
+    """The loop keeps running while the inhibitor starts on one worker thread."""
+    backend = SlowInhibitor()
+    ticks = []
+
+    async def tick():
+        while True:
+            ticks.append(1)
+            await asyncio.sleep(0.01)
+
+    async def main():
+        strategy = screen_lock.Strategy(2, "Inhibitor", screen_lock.Inhibitor(backend))
+        hold = aio.AsyncHold(strategy, asyncio.get_running_loop())
+        ticker = asyncio.ensure_future(tick())
+        await hold.acquire()
+        assert hold.model.is_suspend_screen_lock_on
+        await hold.release()
+        ticker.cancel()
+        return hold
+
+    hold = asyncio.run(main())
+    assert not hold.model.is_running()
+    # The stand-in takes settings.INHIBIT_STARTUP_SECONDS to be trusted.
+    assert len(ticks) > 2
+    inhibit_thread, uninhibit_thread = backend.threads
+    assert inhibit_thread == uninhibit_thread != threading.get_ident()
+    # The worker is shut down with the hold.
+    workers = [t for t in threading.enumerate() if t.ident == inhibit_thread]
+    for worker in workers:
+        worker.join(1)
+        assert not worker.is_alive()
@@ -0,0 +1,35 @@
+"""Test the package assets."""
+
+import ast
+import pathlib
+
+from win_caffeine import settings
+from win_caffeine import utils
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def test_icons_of_every_theme_read_from_any_working_directory(tmp_path, monkeypatch):
+    """Icons resolve relative to the package, not the working directory."""
+    monkeypatch.chdir(tmp_path)
+    for theme in settings.APP_THEMES:
+        for name in settings.ICON_NAMES.values():
+            data = utils.read_asset(f"{name}-{theme}.png")
+            assert data.startswith(PNG_SIGNATURE)
+
+
+def test_icon_set_has_a_field_per_icon_role():
+    """`theme.IconSet` lists the roles of `settings.ICON_NAMES` in order."""
+    path = pathlib.Path(settings.__file__).with_name("theme.py")
+    tree = ast.parse(path.read_text())
+    (icon_set,) = [
+        node
+        for node in tree.body
+        if isinstance(node, ast.ClassDef) and node.name == "IconSet"
+    ]
+    fields = [
+        node.target.id
+        for node in icon_set.body
+        if isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name)
+    ]
+    assert fields == list(settings.ICON_NAMES)
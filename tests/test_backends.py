@@ -0,0 +1,105 @@
+"""Test OS backends."""
+
+import math
+import sys
+import threading
+import time
+
+import pytest
+
+from win_caffeine import backends
+from win_caffeine import screen_lock
+from win_caffeine import settings
+from win_caffeine.clock import SimulatedClock
+
+
+def test_recording_backend_logs_strategy_calls():
+    """Strategy calls go through the backend and are timestamped."""
+    clock = SimulatedClock()
+    backend = backends.RecordingBackend(clock=clock)
+    strategy = screen_lock.NumLock(backend)
+    for delay in strategy.send_key(strategy.VK_NUMLOCK):
+        clock.sleep(delay)
+    assert [call.name for call in backend.calls] == ["keybd_event", "keybd_event"]
+    assert backend.calls[1].timestamp - backend.calls[0].timestamp == pytest.approx(0.1)
+    assert backend.summary()["keybd_event"][0] == 2
+
+
+def test_inhibitor_holds_one_lock_until_released():
+    """The Inhibitor strategy keeps a single stand-in inhibitor process."""
+    stand_in = [sys.executable, "-c", "import time; time.sleep(60)"]
+    backend = backends.RecordingBackend(backends.LinuxBackend(stand_in))
+    model = screen_lock.Model()
+    impl = screen_lock.Inhibitor(backend)
+    model.strategy = screen_lock.Strategy(2, "Inhibitor", impl)
+    thread = threading.Thread(target=model.suspend_screen_lock)
+    thread.start()
+    while model.strategy.impl._handle is None:
+        time.sleep(0.01)
+    process = model.strategy.impl._handle
+    assert process.poll() is None
+
+    model.release_screen_lock_suspend()
+    thread.join(1)
+    assert not thread.is_alive()
+    assert process.poll() is not None
+    assert backend.summary().keys() == {"inhibit", "uninhibit"}
+
+
+def test_numlock_skips_toggles_while_user_is_active():
+    """Keys are only injected once idle time nears the lock timeout."""
+    clock = SimulatedClock()
+    # The user types for the first hour, then walks away.
+    backend = backends.RecordingBackend(
+        clock=clock,
+        idle=lambda: max(clock.monotonic() - 3600, 0),
+        lock_timeout=settings.LOCK_TIMEOUT_SECONDS,
+    )
+    model = screen_lock.Model(clock)
+    impl = screen_lock.NumLock(backend)
+    model.strategy = screen_lock.Strategy(0, "NumLock", impl)
+    model.is_duration_checked = True
+    model.duration_minutes = 2 * 60
+    model.interval_seconds = 120
+    model.suspend_screen_lock()
+
+    refreshes = 2 * 3600 // 120
+    assert sum(impl.counters.values()) == refreshes
+    # Injections start once idle time plus the interval reaches the timeout.
+    first = 3600 + settings.LOCK_TIMEOUT_SECONDS - 120
+    assert impl.counters["skipped"] == math.ceil(first / 120)
+    assert backend.count("keybd_event") == 4 * impl.counters["injected"]
+
+
+def test_numlock_toggles_every_refresh_without_the_lock_timeout():
+    """An unknown lock timeout could be shorter than any default, so none skip."""
+    clock = SimulatedClock()
+    backend = backends.RecordingBackend(clock=clock, idle=lambda: 0)
+    model = screen_lock.Model(clock)
+    impl = screen_lock.NumLock(backend)
+    model.strategy = screen_lock.Strategy(0, "NumLock", impl)
+    model.is_duration_checked = True
+    model.duration_minutes = 60
+    model.interval_seconds = 120
+    model.suspend_screen_lock()
+
+    assert impl.counters == {"injected": 3600 // 120}
+
+
+def test_key_press_sends_one_batched_call_per_refresh():
+    """KeyPress injects F15 down and up in a single call, without steps."""
+    clock = SimulatedClock()
+    backend = backends.RecordingBackend(clock=clock, idle=lambda: clock.monotonic())
+    model = screen_lock.Model(clock)
+    impl = screen_lock.KeyPress(backend)
+    model.strategy = screen_lock.Strategy(3, "KeyPress", impl)
+    model.is_duration_checked = True
+    model.duration_minutes = 60
+    model.interval_seconds = 120
+    model.suspend_screen_lock()
+
+    assert impl.counters["injected"] == backend.count("send_input") > 0
+    assert backend.count("keybd_event") == 0
+    down, up = backend.calls[-1].args[0]
+    assert down == (impl.VK_F15, 0)
+    assert up == (impl.VK_F15, impl.KEYEVENTF_KEYUP)
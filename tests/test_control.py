@@ -0,0 +1,151 @@
+"""Test the local control socket."""
+
+import json
+import os
+import stat
+import tempfile
+import threading
+import time
+
+import pytest
+
+from win_caffeine import backends
+from win_caffeine import control
+from win_caffeine import engine
+from win_caffeine import screen_lock
+
+
+@pytest.fixture(autouse=True)
+def no_runtime_dir(monkeypatch):
+    """Keeps the socket in the temp directory the tests point elsewhere."""
+    monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+
+
+@pytest.fixture
+def model(tmp_path, monkeypatch):
+    """Model running a timed ThreadExecState hold behind a control server."""
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    model = screen_lock.Model()
+    impl = screen_lock.ThreadExecState(backends.RecordingBackend())
+    model.strategy = screen_lock.Strategy(1, "ThreadExecState", impl)
+    model.is_duration_checked = True
+    model.duration_minutes = 60
+    thread = threading.Thread(target=model.suspend_screen_lock)
+    with control.ControlServer(model):
+        thread.start()
+        while model.schedule is None:
+            time.sleep(0.01)
+        yield model
+        model.release_screen_lock_suspend()
+    thread.join(1)
+
+
+def test_status_and_extend(model):
+    """A running hold reports its state and can be extended."""
+    status = control.request("status")
+    assert status["suspended"] and status["strategy"] == "ThreadExecState"
+    assert status["remaining_seconds"] <= 3600
+
+    remaining = control.request("extend", minutes=30)["remaining_seconds"]
+    assert 3600 < remaining <= 5400
+
+
+def test_stop_releases_the_hold(model):
+    """`stop` releases the hold and confirms the session ended."""
+    assert control.request("stop", timeout=5)["stopped"]
+    assert not model.is_suspend_screen_lock_on
+    assert not model.is_running()
+
+
+def test_rejected_command(model):
+    """Invalid commands are reported back as ControlError."""
+    with pytest.raises(control.ControlError):
+        control.request("set-strategy", strategy="Unknown")
+
+
+def test_no_running_instance(tmp_path, monkeypatch):
+    """Clients get ConnectionError when nothing is listening."""
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    with pytest.raises(ConnectionError):
+        control.request("status")
+
+
+def test_handoff(tmp_path, monkeypatch):
+    """A second launch hands its arguments to the running instance."""
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    requests = []
+    with control.ControlServer(screen_lock.Model(), on_handoff=requests.append):
+        control.request("handoff", subcommand="cli", duration=5)
+    assert requests == [dict(command="handoff", subcommand="cli", duration=5)]
+
+
+def test_commands_run_on_the_loop_thread(tmp_path, monkeypatch):
+    """`stop` releases the hold on the thread that took it."""
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    backend = backends.RecordingBackend()
+    threads = []
+    monkeypatch.setattr(
+        backend,
+        "set_thread_execution_state",
+        lambda flags: threads.append(threading.current_thread().name),
+    )
+    model = screen_lock.Model()
+    impl = screen_lock.ThreadExecState(backend)
+    model.strategy = screen_lock.Strategy(1, "ThreadExecState", impl)
+    loop = engine.HeadlessLoop()
+
+    def run():
+        engine.TimerEngine(model, loop).start()
+        loop.run(until=lambda: not model.is_running())
+
+    thread = threading.Thread(target=run, name="loop")
+    with control.ControlServer(model):
+        thread.start()
+        assert model.wait_until_suspended(1)
+        assert control.request("stop", timeout=5)["stopped"]
+    thread.join(1)
+    assert threads == ["loop", "loop"]
+
+
+def test_live_socket_is_kept(tmp_path, monkeypatch):
+    """A second server does not take over the socket of a running one."""
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    with control.ControlServer(screen_lock.Model(), on_handoff=lambda r: None):
+        with control.ControlServer(screen_lock.Model()):
+            pass
+        assert control.request("handoff", subcommand="gui")["pid"]
+
+
+def test_tcp_requests_need_the_token(tmp_path, monkeypatch):
+    """Over TCP only clients that read the port file are served."""
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    monkeypatch.setattr(control, "HAS_UNIX_SOCKETS", False)
+    with control.ControlServer(screen_lock.Model()):
+        assert not control.request("status")["suspended"]
+        sock, token = control.connect()
+        with sock:
+            sock.sendall(b'{"command": "status", "token": "guess"}\n')
+            response = json.loads(sock.makefile("rb").readline())
+    assert token and not response["ok"]
+    assert "token" in response["error"]
+
+
+@pytest.mark.skipif(not control.HAS_UNIX_SOCKETS, reason="Unix sockets only")
+def test_socket_is_private(tmp_path, monkeypatch):
+    """The socket lives in a directory and file only the user can open."""
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    with control.ControlServer(screen_lock.Model()):
+        path = control.socket_path()
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+        assert stat.S_IMODE(os.stat(os.path.dirname(path)).st_mode) == 0o700
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    assert os.path.dirname(control.socket_path()) == str(tmp_path)
+
+
+@pytest.mark.skipif(not control.HAS_UNIX_SOCKETS, reason="Unix sockets only")
+def test_shared_runtime_dir_is_refused(tmp_path, monkeypatch):
+    """A runtime directory others can enter is not used."""
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    os.chmod(control.runtime_dir(), 0o755)
+    with pytest.raises(PermissionError):
+        control.request("status")
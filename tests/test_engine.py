@@ -0,0 +1,122 @@
+"""Test the timer-driven engine."""
+
+import threading
+import time
+
+from win_caffeine import backends
+from win_caffeine import engine
+from win_caffeine import screen_lock
+from win_caffeine import settings
+from win_caffeine import simulation
+from win_caffeine.clock import SimulatedClock
+
+
+def test_timers_match_blocking_session():
+    """Timer callbacks make the same OS calls as the blocking session."""
+    for name in screen_lock.strategy_names:
+        blocking = simulation.simulate(name, 8 * settings.HOUR)
+        timers = simulation.simulate(name, 8 * settings.HOUR, timers=True)
+        assert timers.simulated_seconds == blocking.simulated_seconds
+        assert timers.api_calls == blocking.api_calls
+        assert timers.max_countdown_error < 1
+
+
+def test_release_from_another_thread_ends_session():
+    """A release posts a tick to the loop, which finishes the session."""
+    backend = backends.RecordingBackend()
+    model = screen_lock.Model()
+    model.strategy = screen_lock.Strategy(0, "NumLock", screen_lock.NumLock(backend))
+    loop = engine.HeadlessLoop()
+    finished = []
+    engine.TimerEngine(model, loop, on_finished=lambda: finished.append(1)).start()
+    assert model.is_suspend_screen_lock_on
+
+    threading.Timer(0.05, model.release_screen_lock_suspend).start()
+    loop.run(until=lambda: not model.is_running())
+    assert finished == [1]
+    # The NumLock toggle still completes, restoring the key state.
+    assert backend.count("keybd_event") == 4
+    assert model.wakeup_callback is None
+
+
+def test_stop_ends_the_session_without_the_loop():
+    """`stop` releases and records the session before the loop runs again."""
+    backend = backends.RecordingBackend()
+    model = screen_lock.Model()
+    impl = screen_lock.Inhibitor(backend)
+    model.strategy = screen_lock.Strategy(2, "Inhibitor", impl)
+    finished = []
+    timer_engine = engine.TimerEngine(
+        model, engine.HeadlessLoop(), on_finished=lambda: finished.append(1)
+    )
+    timer_engine.start()
+    timer_engine.stop()
+    assert not model.is_running()
+    assert finished == [1]
+    assert backend.count("uninhibit") == 1
+    timer_engine.stop()
+    assert finished == [1]
+
+
+def test_restart_runs_on_the_loop():
+    """A restart releases the running hold and takes it again."""
+    clock = SimulatedClock()
+    backend = backends.RecordingBackend(clock=clock)
+    model = screen_lock.Model(clock)
+    impl = screen_lock.ThreadExecState(backend)
+    model.strategy = screen_lock.Strategy(1, "ThreadExecState", impl)
+    loop = engine.HeadlessLoop(clock)
+    engine.TimerEngine(model, loop).start()
+    clock.call_later(10, model.restart)
+    clock.call_later(20, model.release_screen_lock_suspend)
+    loop.run(until=lambda: not model.is_running())
+    assert clock.monotonic() == 20
+    assert [flags for _, _, (flags,), _ in backend.calls] == [
+        impl.ES_CONTINUOUS | impl.ES_SYSTEM_REQUIRED,
+        impl.ES_CONTINUOUS,
+        impl.ES_CONTINUOUS | impl.ES_SYSTEM_REQUIRED,
+        impl.ES_CONTINUOUS,
+    ]
+
+
+class ThreadBackend(backends.RecordingBackend):
+    """Records the thread of each execution state call."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.threads: list[tuple[str, int]] = []
+
+    def set_thread_execution_state(self, flags: int) -> int:
+        self.threads.append((threading.current_thread().name, flags))
+        return super().set_thread_execution_state(flags)
+
+
+def test_releases_from_other_threads_run_on_the_loop_thread():
+    """Execution state is per thread, so restarts and releases are posted."""
+    backend = ThreadBackend()
+    model = screen_lock.Model()
+    impl = screen_lock.ThreadExecState(backend)
+    model.strategy = screen_lock.Strategy(1, "ThreadExecState", impl)
+    loop = engine.HeadlessLoop()
+    timer_engine = engine.TimerEngine(model, loop)
+
+    def run():
+        timer_engine.start()
+        loop.run(until=lambda: not model.is_running())
+
+    thread = threading.Thread(target=run, name="loop")
+    thread.start()
+    assert model.wait_until_suspended(1)
+    model.restart()
+    while len(backend.threads) < 3:
+        time.sleep(0.01)
+    model.release_screen_lock_suspend()
+    thread.join(1)
+    assert not model.is_running() and model.session_loop is None
+    held = impl.ES_CONTINUOUS | impl.ES_SYSTEM_REQUIRED
+    assert backend.threads == [
+        ("loop", held),
+        ("loop", impl.ES_CONTINUOUS),
+        ("loop", held),
+        ("loop", impl.ES_CONTINUOUS),
+    ]
@@ -0,0 +1,49 @@
+"""Test file triggers."""
+
+import threading
+import time
+
+from win_caffeine import fswatch
+
+
+def in_thread(target, *args) -> threading.Event:
+    done = threading.Event()
+    threading.Thread(target=lambda: (target(*args), done.set()), daemon=True).start()
+    return done
+
+
+def test_wait_exists_reacts_to_creation(tmp_path):
+    """The wait returns as soon as the flag file is created."""
+    flag = tmp_path / "done.flag"
+    done = in_thread(fswatch.wait_exists, str(flag))
+    (tmp_path / "other").touch()
+    assert not done.wait(0.1)
+
+    created = time.monotonic()
+    flag.touch()
+    assert done.wait(2)
+    assert time.monotonic() - created < 0.5
+
+
+def test_wait_idle_follows_writes(tmp_path):
+    """Writes keep the wait going, it ends once they stop."""
+    log = tmp_path / "build.log"
+    log.touch()
+    done = in_thread(fswatch.wait_idle, str(log), 0.3)
+    with open(log, "a") as f:
+        for _ in range(5):
+            f.write("line\n")
+            f.flush()
+            time.sleep(0.1)
+            assert not done.is_set()
+    assert done.wait(2)
+
+
+def test_removed_file_is_not_growing(tmp_path):
+    """Removing the file ends the wait without waiting for the idle time."""
+    log = tmp_path / "build.log"
+    log.touch()
+    done = in_thread(fswatch.wait_idle, str(log), 60)
+    time.sleep(0.05)
+    log.unlink()
+    assert done.wait(2)
@@ -0,0 +1,89 @@
+"""Test the session history."""
+
+import argparse
+import time
+
+from win_caffeine import backends
+from win_caffeine import engine
+from win_caffeine import history
+from win_caffeine import screen_lock
+from win_caffeine import settings
+from win_caffeine.clock import SimulatedClock
+
+
+def test_sessions_are_recorded_with_their_end_reason(tmp_path):
+    """Expired, released and stopped sessions each append one row."""
+    clock = SimulatedClock()
+    model = screen_lock.Model(clock)
+    model.session_history = history.History(str(tmp_path / "history.sqlite3"))
+    impl = screen_lock.ThreadExecState(backends.RecordingBackend(clock=clock))
+    model.strategy = screen_lock.Strategy(1, "ThreadExecState", impl)
+    loop = engine.HeadlessLoop(clock)
+    timer_engine = engine.TimerEngine(model, loop)
+
+    model.is_duration_checked = True
+    model.duration_minutes = 10
+    timer_engine.start()
+    loop.run(until=lambda: not model.is_running())
+    model.is_duration_checked = False
+    for reason in ["released", "stopped"]:
+        timer_engine.start()
+        clock.call_later(60, lambda: model.release_screen_lock_suspend(reason))
+        loop.run(until=lambda: not model.is_running())
+
+    sessions = model.session_history.sessions()
+    assert [(s.duration_seconds, s.reason) for s in sessions] == [
+        (600, "expired"),
+        (60, "released"),
+        (60, "stopped"),
+    ]
+    assert sessions[0].requested_seconds == 600
+    assert sessions[1].requested_seconds is None
+    assert sessions[2].started == clock.time() - 60
+
+
+def test_store_keeps_the_latest_sessions_in_wal_mode(tmp_path):
+    """Old sessions are dropped once the store is full."""
+    store = history.History(str(tmp_path / "history.sqlite3"), max_sessions=5)
+    for started in range(12):
+        store.record(history.Session(started, 60, "NumLock", "expired", None))
+    assert [s.started for s in store.sessions()] == list(range(7, 12))
+    assert store.sessions(since=10)[0].started == 10
+    journal_mode = store._connect().execute("PRAGMA journal_mode").fetchone()
+    assert journal_mode == ("wal",)
+
+
+def test_history_subcommand_prints_stats(tmp_path, monkeypatch, capsys):
+    """Stats aggregate the recent sessions by strategy and end reason."""
+    path = str(tmp_path / "history.sqlite3")
+    monkeypatch.setattr(settings, "HISTORY_PATH", path)
+    store = history.History()
+    now = time.time()
+    old = now - 200 * 24 * 3600
+    for started, minutes, reason in [
+        (old, 500, "expired"),
+        (now, 30, "released"),
+        (now, 120, "expired"),
+        (now, 60, "stopped"),
+    ]:
+        store.record(history.Session(started, minutes * 60, "NumLock", reason, None))
+    store.close()
+    (stats,) = history.History().stats(now - 3600)
+    assert stats.sessions == 3
+    assert (stats.median, stats.p90) == (3600, 7200)
+
+    assert history.run(argparse.Namespace(days=90)) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].endswith(": 3, 3h30m held")
+    assert lines[1].split()[5:] == ["expired", "released", "stopped"]
+    assert lines[2].split() == "NumLock 3 3h30m 1h00m 2h00m 1 1 1".split()
+
+
+def test_queries_do_not_create_the_database(tmp_path):
+    """Reading a history that was never written leaves no file behind."""
+    path = tmp_path / "state" / "history.sqlite3"
+    store = history.History(str(path))
+    assert store.sessions() == []
+    assert store.stats() == []
+    store.close()
+    assert not path.parent.exists()
@@ -0,0 +1,146 @@
+"""Test reference-counted holds."""
+
+import threading
+import time
+
+import pytest
+
+from win_caffeine import backends
+from win_caffeine import engine
+from win_caffeine import holds
+from win_caffeine import screen_lock
+
+
+class Instance:
+    """Model and engine of an instance, its loop running in a thread."""
+
+    def __init__(self) -> None:
+        self.backend = backends.RecordingBackend()
+        self.model = screen_lock.Model()
+        impl = screen_lock.Inhibitor(self.backend)
+        self.model.strategy = screen_lock.Strategy(2, "Inhibitor", impl)
+        self.loop = engine.HeadlessLoop()
+        self.engine = engine.TimerEngine(self.model, self.loop)
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(
+            target=self.loop.run, args=(self.stopped.is_set,), name="loop"
+        )
+        self.thread.start()
+
+    def post(self, callback):
+        self.loop.call_soon_threadsafe(callback)
+
+    def sync(self):
+        """Waits for the callbacks posted so far, e.g. the first refresh."""
+        done = threading.Event()
+        self.post(done.set)
+        assert done.wait(1)
+
+    def start_lease_hold(self):
+        if not self.model.is_running():
+            self.engine.start(timed=False)
+
+    def close(self):
+        self.stopped.set()
+        self.post(lambda: None)
+        self.thread.join(1)
+
+
+def wait_for(predicate, timeout: float = 2) -> bool:
+    """Polls `predicate` until it is true, False on timeout."""
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def instance():
+    instance = Instance()
+    yield instance
+    instance.close()
+
+
+@pytest.fixture
+def manager(instance):
+    manager = holds.HoldManager(
+        instance.model, instance.loop, instance.start_lease_hold
+    )
+    yield manager
+    manager.close()
+
+
+def test_leases_share_one_activation(instance, manager):
+    """Many leases take the inhibitor once and drop it after the last one."""
+    leases = [manager.acquire(f"job {n}") for n in range(3)]
+    instance.sync()
+    assert instance.backend.count("inhibit") == 1
+    assert len(manager) == 3
+
+    for lease in leases[:-1]:
+        assert manager.release(lease.id)
+    instance.sync()
+    assert instance.model.is_suspend_screen_lock_on
+    assert not manager.release(leases[0].id)
+
+    manager.release(leases[-1].id)
+    assert instance.model.wait_until_idle(1)
+    assert instance.backend.count("uninhibit") == 1
+
+
+def test_leases_expire_in_deadline_order(instance, manager):
+    """The earliest deadline expires first, the hold ends with the last one."""
+    late = manager.acquire("late", 0.2)
+    early = manager.acquire("early", 0.05)
+    assert manager.next_expiry() == early.deadline
+
+    # The session may not have started yet, so wait for the leases first.
+    assert wait_for(lambda: manager.leases() == [])
+    assert instance.model.wait_until_idle(1)
+    assert late.deadline > early.deadline
+    assert instance.backend.summary().keys() == {"inhibit", "uninhibit"}
+
+
+def test_acquire_right_after_the_last_release_holds_again(instance, manager):
+    """A new lease waits for the released session to end, then takes hold."""
+    backend = instance.backend
+    for _ in range(3):
+        manager.release(manager.acquire("job").id)
+    lease = manager.acquire("job")
+    assert wait_for(
+        lambda: backend.count("inhibit") == backend.count("uninhibit") + 1
+        and instance.model.is_suspend_screen_lock_on
+    )
+    manager.release(lease.id)
+    assert wait_for(lambda: backend.count("inhibit") == backend.count("uninhibit"))
+
+
+def test_leases_join_the_running_hold(instance, manager):
+    """Leases neither restart nor end a hold they did not start."""
+    instance.model.is_duration_checked = True
+    instance.model.duration_minutes = 60
+    instance.post(instance.engine.start)
+    assert instance.model.wait_until_suspended(1)
+
+    manager.release(manager.acquire("job").id)
+    instance.sync()
+    assert instance.model.is_suspend_screen_lock_on
+    assert instance.backend.count("inhibit") == 1
+    instance.model.release_screen_lock_suspend()
+    assert instance.model.wait_until_idle(1)
+
+
+def test_leases_outlive_the_session_they_joined(instance, manager):
+    """When a joined timed session expires, an untimed one takes over."""
+    instance.post(lambda: instance.engine.start(duration_seconds=0.1, timed=True))
+    assert instance.model.wait_until_suspended(1)
+    manager.acquire("job", 3600)
+    instance.sync()
+    assert instance.backend.count("inhibit") == 1
+
+    assert wait_for(lambda: instance.backend.count("inhibit") == 2)
+    assert instance.model.is_suspend_screen_lock_on
+    assert instance.model.remaining_seconds() is None
+    assert instance.backend.count("uninhibit") == 1
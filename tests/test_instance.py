@@ -0,0 +1,24 @@
+"""Test the single instance lock."""
+
+from win_caffeine import instance
+
+
+def test_lock_is_exclusive(tmp_path):
+    """Only one lock holder at a time, released locks can be taken again."""
+    path = str(tmp_path / "app.lock")
+    first, second = instance.InstanceLock(path), instance.InstanceLock(path)
+    assert first.acquire()
+    assert not second.acquire()
+    first.release()
+    assert second.acquire()
+    second.release()
+
+
+def test_stale_lock_is_taken_over(tmp_path):
+    """A lockfile left behind by a dead process does not block startup."""
+    path = tmp_path / "app.lock"
+    path.write_text("99999999")
+    lock = instance.InstanceLock(str(path))
+    assert lock.acquire()
+    assert lock.owner() != 99999999
+    lock.release()
@@ -0,0 +1,114 @@
+"""Test the metrics registry and exporters."""
+
+import json
+import urllib.request
+
+import pytest
+
+from win_caffeine import backends
+from win_caffeine import engine
+from win_caffeine import metrics
+from win_caffeine import screen_lock
+from win_caffeine.clock import SimulatedClock
+
+
+@pytest.fixture
+def registry(monkeypatch) -> metrics.Registry:
+    """Fresh module registry."""
+    fresh = metrics.Registry()
+    monkeypatch.setattr(metrics, "registry", fresh)
+    return fresh
+
+
+def test_registry_formats_prometheus_text():
+    """Counters and summaries follow the text exposition format."""
+    source = metrics.Registry()
+    source.inc("wakeups_total", strategy="NumLock")
+    source.inc("wakeups_total", 2, strategy="NumLock")
+    source.observe("session_seconds", 3, strategy='a"b')
+    source.observe("session_seconds", 5, strategy='a"b')
+    assert source.to_prometheus().splitlines() == [
+        "# TYPE win_caffeine_session_seconds summary",
+        'win_caffeine_session_seconds_count{strategy="a\\"b"} 2',
+        'win_caffeine_session_seconds_sum{strategy="a\\"b"} 8',
+        "# TYPE win_caffeine_session_seconds_max gauge",
+        'win_caffeine_session_seconds_max{strategy="a\\"b"} 5',
+        "# TYPE win_caffeine_wakeups_total counter",
+        'win_caffeine_wakeups_total{strategy="NumLock"} 3',
+    ]
+
+
+def test_sessions_record_wakeups_lengths_and_release_latency(registry):
+    """A released session counts its wakeups, length and release latency."""
+    clock = SimulatedClock()
+    model = screen_lock.Model(clock)
+    impl = screen_lock.NumLock(backends.RecordingBackend(clock=clock))
+    model.strategy = screen_lock.Strategy(0, "NumLock", impl)
+    model.is_duration_checked = True
+    model.interval_seconds = 120
+    loop = engine.HeadlessLoop(clock)
+    engine.TimerEngine(model, loop).start()
+    clock.call_at(601, model.release_screen_lock_suspend)
+    loop.run(until=lambda: not model.is_running())
+
+    snapshot = registry.snapshot()
+    labels = dict(strategy="NumLock")
+    assert snapshot["refreshes_total"]["samples"] == [dict(labels=labels, value=6)]
+    assert snapshot["wakeups_total"]["samples"][0]["value"] >= 6
+    assert snapshot["tick_jitter_seconds"]["samples"][0]["max"] < 1
+    (session,) = snapshot["session_seconds"]["samples"]
+    assert session["count"] == 1 and session["sum"] == 601
+    # The release cuts the running toggle short, restoring the key at once.
+    (latency,) = snapshot["release_latency_seconds"]["samples"]
+    assert latency["count"] == 1 and latency["max"] == 0
+    assert impl.backend.count("keybd_event") == 6 * 4
+
+
+def test_exporters_serve_and_write_metrics(registry, tmp_path):
+    """The HTTP endpoint and the textfile carry the same metrics."""
+    registry.inc("sessions_total", strategy="Inhibitor")
+    path = tmp_path / "win_caffeine.prom"
+    with metrics.exporting(port=0, path=str(path)):
+        server = metrics.MetricsServer(0, registry)
+        server.start()
+        try:
+            url = "http://{}:{}".format(*server.address)
+            with urllib.request.urlopen(url + "/metrics.json") as response:
+                data = json.load(response)
+            with urllib.request.urlopen(url + "/metrics") as response:
+                text = response.read().decode()
+        finally:
+            server.close()
+    assert data["sessions_total"]["samples"][0]["value"] == 1
+    assert 'win_caffeine_sessions_total{strategy="Inhibitor"} 1' in text
+    assert text == path.read_text()
+    assert [p.name for p in tmp_path.iterdir()] == [path.name]
+
+
+def test_backend_calls_are_labelled_by_strategy(registry, monkeypatch):
+    """Backend calls count for the strategy of the session that made them."""
+    backend = backends.RecordingBackend()
+    monkeypatch.setattr(backends, "default_backend", lambda: backend)
+    collector = metrics.BackendCollector()
+    monkeypatch.setattr(metrics, "backend_collector", collector)
+    registry.collectors.append(collector)
+    model = screen_lock.Model()
+    for ndx, name in [(2, "Inhibitor"), (1, "ThreadExecState")]:
+        impl = getattr(screen_lock, name)(backend)
+        model.strategy = screen_lock.Strategy(ndx, name, impl)
+        timer_engine = engine.TimerEngine(model, engine.HeadlessLoop())
+        timer_engine.start()
+        timer_engine.stop()
+
+    for _ in range(2):
+        samples = registry.snapshot()["backend_calls_total"]["samples"]
+        calls = {
+            (labels["strategy"], labels["function"]): sample["value"]
+            for sample in samples
+            for labels in [sample["labels"]]
+        }
+        assert calls == {
+            ("Inhibitor", "inhibit"): 1,
+            ("Inhibitor", "uninhibit"): 1,
+            ("ThreadExecState", "set_thread_execution_state"): 2,
+        }
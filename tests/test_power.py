@@ -0,0 +1,102 @@
+"""Test the power policy."""
+
+import os
+import time
+
+import pytest
+
+from win_caffeine import backends
+from win_caffeine import engine
+from win_caffeine import power
+from win_caffeine import screen_lock
+from win_caffeine.clock import SimulatedClock
+
+
+def test_sysfs_provider_reads_supplies(tmp_path):
+    """Mains and system batteries count, peripheral batteries do not."""
+    supplies = dict(
+        AC=dict(type="Mains", online="0"),
+        BAT0=dict(type="Battery", capacity="40"),
+        BAT1=dict(type="Battery", capacity="60"),
+        hid_mouse=dict(type="Battery", scope="Device", capacity="5"),
+    )
+    for name, attributes in supplies.items():
+        (tmp_path / name).mkdir()
+        for attribute, value in attributes.items():
+            (tmp_path / name / attribute).write_text(value + "\n")
+    provider = power.SysfsProvider(str(tmp_path))
+    assert provider.status() == (False, 50)
+    (tmp_path / "AC" / "online").write_text("1\n")
+    assert provider.status() == (True, 50)
+    provider.close()
+    assert provider.wait()
+    with pytest.raises(OSError):
+        os.fstat(provider._wake_read)
+    assert provider._sock is None
+    provider.close()
+
+    assert power.SysfsProvider(str(tmp_path / "none")).status() == (True, None)
+    policy = power.PowerPolicy.parse("min=20, stretch=2, resume")
+    assert str(policy) == "min=20,stretch=2,resume"
+    with pytest.raises(ValueError):
+        power.PowerPolicy.parse("max=80")
+
+
+def test_policy_stretches_releases_and_resumes():
+    """Battery power stretches the interval, low charge releases until AC."""
+    clock = SimulatedClock()
+    backend = backends.RecordingBackend(clock=clock)
+    model = screen_lock.Model(clock)
+    impl = screen_lock.ThreadExecState(backend)
+    model.strategy = screen_lock.Strategy(1, "ThreadExecState", impl)
+    model.is_duration_checked = True
+    model.duration_minutes = 60
+    model.interval_seconds = 120
+    loop = engine.HeadlessLoop(clock)
+    resumed = []
+    guard = power.PowerGuard(
+        model,
+        power.PowerPolicy(20, 2.0, True),
+        power.FakeProvider(),
+        resume=resumed.append,
+    )
+    engine.TimerEngine(model, loop).start()
+    guard.apply(power.PowerStatus(True, 90))
+    clock.call_at(600, lambda: guard.apply(power.PowerStatus(False, 50)))
+    clock.call_at(1200, lambda: guard.apply(power.PowerStatus(False, 10)))
+    loop.run(until=lambda: not model.is_running())
+
+    assert clock.monotonic() == 1200
+    refreshes = [
+        call.timestamp - clock.time() + 1200
+        for call in backend.calls
+        if call.args == (impl.ES_CONTINUOUS | impl.ES_SYSTEM_REQUIRED,)
+    ]
+    assert refreshes == [0, 120, 240, 360, 480, 600, 840, 1080]
+    assert guard.paused and not resumed
+
+    guard.apply(power.PowerStatus(True, 10))
+    assert model.interval_scale == 1.0
+    assert resumed == [pytest.approx(3600 - 1200)]
+
+
+def test_guard_follows_provider_changes():
+    """The watcher thread posts every status the provider reports."""
+    provider = power.FakeProvider(True, 80)
+    model = screen_lock.Model()
+    posted: list = []
+    # A session running on a loop of another thread.
+    model.session_loop = (-1, posted.append)
+    policy = power.PowerPolicy(battery_interval_scale=3)
+    guard = power.PowerGuard(model, policy, provider)
+    guard.start()
+    provider.set(False, 70)
+    deadline = time.monotonic() + 5
+    while not posted and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert guard.status == (True, 80)
+    posted.pop(0)()
+    assert guard.status == (False, 70)
+    assert guard.model.interval_scale == 3
+    guard.close()
+    assert not guard._thread.is_alive()
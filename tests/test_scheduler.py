@@ -0,0 +1,87 @@
+"""Test the refresh scheduler."""
+
+from win_caffeine import scheduler
+from win_caffeine import settings
+from win_caffeine.clock import SimulatedClock
+
+
+def test_refresh_ticks_do_not_drift():
+    """Late wakeups keep refresh ticks on the grid."""
+    clock = SimulatedClock()
+    schedule = scheduler.RefreshScheduler(60, 600, clock=clock)
+    schedule.mark_refreshed()
+    clock.advance(65.5)
+    assert schedule.refresh_due()
+    schedule.mark_refreshed()
+    assert schedule.next_timeout() == 120 - 65.5
+    assert schedule.remaining() == 600 - 65.5
+
+
+def test_resume_is_detected():
+    """Wall-clock time passing while monotonic stands still is a resume."""
+    clock = SimulatedClock()
+    schedule = scheduler.RefreshScheduler(60, 3600, clock=clock)
+    schedule.mark_refreshed()
+    clock.suspend(600)
+    assert schedule.check_resumed()
+    assert schedule.refresh_due()
+    assert schedule.remaining() == 3000
+
+
+def test_late_wakeups_keep_the_tick_count_and_deadline():
+    """Wakeups half a second late still refresh once per interval."""
+    clock = SimulatedClock()
+    schedule = scheduler.RefreshScheduler(60, 600, clock=clock)
+    refreshes = []
+    while not schedule.expired():
+        if schedule.refresh_due():
+            refreshes.append(clock.monotonic())
+            schedule.mark_refreshed()
+        clock.advance(schedule.next_timeout() + 0.5)
+    assert refreshes == [0] + [60 * n + 0.5 for n in range(1, 10)]
+    assert schedule.remaining() == 0
+    assert schedule.deadline == 600
+
+
+def test_wakeups_are_aligned():
+    """Refresh wakeups are rounded up to the alignment boundary."""
+    clock = SimulatedClock()
+    clock.advance(0.25)
+    schedule = scheduler.RefreshScheduler(60, clock=clock)
+    schedule.mark_refreshed()
+    assert schedule.next_timeout() == scheduler.align(60.25) - 0.25 == 60.75
+
+
+def test_extend_moves_the_deadline():
+    """Extending a timed schedule adds to the remaining time."""
+    clock = SimulatedClock()
+    schedule = scheduler.RefreshScheduler(60, 120, clock=clock)
+    clock.advance(100)
+    schedule.extend(60)
+    assert schedule.remaining() == 80
+    assert not schedule.expired()
+
+
+def test_without_interval_the_hold_refreshes_once():
+    """An untimed schedule without interval sleeps until released."""
+    clock = SimulatedClock()
+    schedule = scheduler.RefreshScheduler(None, clock=clock)
+    assert schedule.refresh_due()
+    schedule.mark_refreshed()
+    assert not schedule.refresh_due()
+    assert schedule.next_timeout() is None
+    assert schedule.remaining() is None
+
+
+def test_very_late_wakeup_is_a_resume():
+    """A wakeup far past its schedule restarts the refresh grid."""
+    clock = SimulatedClock()
+    schedule = scheduler.RefreshScheduler(60, 3600, clock=clock)
+    schedule.mark_refreshed()
+    timeout = schedule.next_timeout()
+    clock.advance(timeout + settings.RESUME_THRESHOLD_SECONDS)
+    assert schedule.check_resumed()
+    assert schedule.late == settings.RESUME_THRESHOLD_SECONDS
+    assert schedule.refresh_due()
+    # Monotonic time kept running, so the deadline stays.
+    assert schedule.remaining() == 3600 - timeout - settings.RESUME_THRESHOLD_SECONDS
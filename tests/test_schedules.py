@@ -0,0 +1,71 @@
+"""Test calendar schedules."""
+
+import datetime
+
+import pytest
+
+from win_caffeine import backends
+from win_caffeine import engine
+from win_caffeine import schedules
+from win_caffeine import screen_lock
+from win_caffeine.clock import SimulatedClock
+
+# Monday 2024-01-01 00:00 local time.
+MONDAY = datetime.datetime(2024, 1, 1).timestamp()
+
+
+def test_rules_parse_cron_days_and_overnight_windows():
+    """Days take cron names, numbers and ranges, windows may cross midnight."""
+    rule = schedules.Rule.parse("mon-fri 08:00-18:00")
+    assert rule.days == frozenset(range(5))
+    assert str(rule) == "mon,tue,wed,thu,fri 08:00-18:00"
+    assert schedules.Rule.parse("fri-1 9-17").days == {4, 5, 6, 0}
+    assert str(schedules.Rule.parse("0-7 02:00-03:30")) == "* 02:00-03:30"
+
+    nightly = schedules.Rule.parse("sun 22:00-06:00")
+    start, end = nightly.window(datetime.datetime(2024, 1, 8, 1))
+    assert (start, end) == (
+        datetime.datetime(2024, 1, 7, 22),
+        datetime.datetime(2024, 1, 8, 6),
+    )
+    for spec in ["mon", "xyz 08:00-09:00", "mon 25:00-26:00", "8 08:00-09:00"]:
+        with pytest.raises(ValueError):
+            schedules.Rule.parse(spec)
+
+
+def test_calendar_merges_many_rules():
+    """Hundreds of rules only wake the caller at their transitions."""
+    clock = SimulatedClock(start_time=MONDAY)
+    # Overlapping hourly windows add up to a single Monday 08:00-18:00 hold.
+    specs = [f"mon {8 + i % 10:02d}:00-{9 + i % 10:02d}:00" for i in range(300)]
+    calendar = schedules.Calendar(map(schedules.Rule.parse, specs), clock)
+    changes = []
+    active = calendar.update()
+    while calendar.next_transition() < MONDAY + 24 * 3600:
+        clock.advance(calendar.timeout())
+        if calendar.update() != active:
+            active = not active
+            changes.append((clock.monotonic() / 3600, active))
+    assert changes == [(8, True), (18, False)]
+
+
+def test_runner_holds_during_windows():
+    """The runner takes the hold at each window start and releases it at the end."""
+    clock = SimulatedClock(start_time=MONDAY)
+    backend = backends.RecordingBackend(clock=clock)
+    model = screen_lock.Model(clock)
+    impl = screen_lock.ThreadExecState(backend)
+    model.strategy = screen_lock.Strategy(1, "ThreadExecState", impl)
+    loop = engine.HeadlessLoop(clock)
+    rules = [schedules.Rule.parse("* 02:00-03:00")]
+    runner = schedules.CalendarRunner(schedules.Calendar(rules, clock), model, loop)
+    runner.start()
+    clock.call_at(3 * 24 * 3600, lambda: loop.call_soon_threadsafe(runner.stop))
+    loop.run(until=lambda: runner.stopped and not model.is_running())
+
+    assert [
+        (call.timestamp - MONDAY) / 3600
+        for call in backend.calls
+        if call.args == (impl.ES_CONTINUOUS | impl.ES_SYSTEM_REQUIRED,)
+    ] == [2, 26, 50]
+    assert backend.count("set_thread_execution_state") == 6
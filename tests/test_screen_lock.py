@@ -0,0 +1,60 @@
+"""Test hold sessions of the screen lock model."""
+
+from win_caffeine import screen_lock
+from win_caffeine.clock import SimulatedClock
+
+
+def suspended_model() -> tuple[screen_lock.Model, SimulatedClock]:
+    """Model on simulated time, suspended as a strategy would have it."""
+    clock = SimulatedClock()
+    model = screen_lock.Model(clock)
+    model.set_suspended(True)
+    return model, clock
+
+
+def test_timed_hold_refreshes_once_per_interval():
+    """A 10-minute hold refreshes on the minute grid, then expires."""
+    model, clock = suspended_model()
+    refreshes = []
+
+    def refresh():
+        refreshes.append(clock.monotonic())
+        # A key press and its release a second later.
+        return iter([1.0])
+
+    assert screen_lock.run_hold(model, refresh, 60, 600)
+    assert refreshes == [60 * n for n in range(10)]
+    assert clock.monotonic() == 600
+
+
+def test_release_ends_the_wait_right_away():
+    """A release wakes the hold at once instead of at the next refresh."""
+    model, clock = suspended_model()
+    refreshes = []
+    clock.call_at(90, lambda: model.set_suspended(False))
+
+    assert not screen_lock.run_hold(model, lambda: refreshes.append(1), 60, 600)
+    assert clock.monotonic() == 90
+    assert len(refreshes) == 2
+
+
+def test_untimed_hold_sleeps_until_released():
+    """Without interval or duration the hold wakes up only for the release."""
+    model, clock = suspended_model()
+    clock.call_at(86400, lambda: model.set_suspended(False))
+
+    assert not screen_lock.run_hold(model, lambda: None)
+    assert clock.wakeups == 1
+
+
+def test_ticker_reports_progress_every_second():
+    """The ticker reports the remaining seconds until the duration elapsed."""
+    model, clock = suspended_model()
+    progress: list[str] = []
+    hold = screen_lock.Hold(lambda: None, 60, 5)
+    ticker = screen_lock.HoldTicker(model, hold, progress.append)
+    assert model.schedule is ticker.schedule
+
+    while ticker.tick():
+        clock.advance(ticker.next_timeout())
+    assert progress == ["5", "4", "3", "2", "1"]
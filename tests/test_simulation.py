@@ -0,0 +1,54 @@
+"""Test simulated hold sessions."""
+
+from win_caffeine import backends
+from win_caffeine import screen_lock
+from win_caffeine import settings
+from win_caffeine import simulation
+from win_caffeine.clock import SimulatedClock
+
+
+def test_indefinite_thread_exec_state_does_not_wake_up():
+    """An indefinite ThreadExecState hold sleeps until released."""
+    report = simulation.simulate("ThreadExecState", release_after_seconds=86400)
+    assert report.simulated_seconds == 86400
+    assert report.wakeups == 1
+    assert report.api_calls == 2
+
+
+def test_duration_hold_refreshes_on_schedule():
+    """An 8-hour NumLock hold refreshes once per interval."""
+    report = simulation.simulate("NumLock", 8 * settings.HOUR, progress=False)
+    refreshes = 8 * settings.HOUR * settings.MINUTE // 120
+    assert report.simulated_seconds == 8 * settings.HOUR * settings.MINUTE
+    # Four key events per refresh and one lock timeout query per session. The
+    # backend reports no lock timeout, so the idle time is never queried.
+    assert report.api_calls == 4 * refreshes + 1
+
+
+def test_countdown_survives_system_sleep():
+    """Remaining time follows the wall clock across a resume from sleep."""
+    report = simulation.simulate("ThreadExecState", 60, suspends=[(600, 1200)])
+    assert report.simulated_seconds == 60 * settings.MINUTE
+    assert report.max_countdown_error < 1
+
+
+def test_auto_interval_follows_lock_timeout():
+    """The auto interval is a safe fraction of the backend lock timeout."""
+    clock = SimulatedClock()
+    model = screen_lock.Model(clock)
+    backend = backends.RecordingBackend(lock_timeout=600)
+    model.strategy = screen_lock.Strategy(
+        1, "ThreadExecState", screen_lock.ThreadExecState(backend)
+    )
+    model.interval_seconds = 900
+    assert model.refresh_interval() == 900
+    model.is_auto_interval = True
+    assert model.refresh_interval() == 600 * settings.AUTO_INTERVAL_FRACTION
+    assert "Interval: auto, 300 sec" in str(model)
+
+    # The lock timeout is read once and reused for a while.
+    assert backend.count("lock_timeout_seconds") == 1
+    backend.lock_timeout = None
+    assert model.lock_timeout_seconds() == 600
+    clock.advance(settings.LOCK_TIMEOUT_CACHE_SECONDS)
+    assert model.lock_timeout_seconds() == settings.LOCK_TIMEOUT_SECONDS
@@ -0,0 +1,112 @@
+"""Test what the subcommands import at startup."""
+
+import ast
+import os
+import pathlib
+import subprocess
+import sys
+
+import pytest
+
+ROOT = pathlib.Path(__file__).parent.parent
+QT_MODULES = ("PySide2", "shiboken2", "qdarktheme")
+# Session machinery that `stop`, which only talks to the control socket,
+# must not load.
+SESSION_MODULES = (
+    "win_caffeine.cli",
+    "win_caffeine.gui",
+    "win_caffeine.engine",
+    "win_caffeine.holds",
+    "win_caffeine.store",
+)
+
+
+def import_times(tmp_path, *args) -> tuple[int, dict[str, int]]:
+    """Runs python with `-X importtime`.
+
+    Returns:
+        The exit code, and module names mapped to cumulative microseconds.
+    """
+    env = dict(os.environ, TMP=str(tmp_path), TEMP=str(tmp_path), TMPDIR=str(tmp_path))
+    env["PYTHONPATH"] = os.pathsep.join([str(ROOT / "src"), env.get("PYTHONPATH", "")])
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True,
+        text=True,
+        env=env,
+        timeout=30,
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative)
+    return proc.returncode, times
+
+
+@pytest.mark.parametrize(
+    "args, returncodes",
+    [
+        # Exits with 1 when no instance is running.
+        ([str(ROOT / "win-caffeine.py"), "stop"], (0, 1)),
+        (["-c", "import win_caffeine.cli"], (0,)),
+    ],
+    ids=["stop", "cli"],
+)
+def test_startup_skips_qt(tmp_path, args, returncodes):
+    """`stop` and `cli` start without importing Qt."""
+    returncode, times = import_times(tmp_path, *args)
+    assert returncode in returncodes
+    assert "win_caffeine.screen_lock" in times
+    assert not [name for name in times if name.startswith(QT_MODULES)]
+
+
+def test_stop_skips_the_session_machinery(tmp_path):
+    """`stop` loads only what it needs to reach the running instance."""
+    returncode, times = import_times(tmp_path, str(ROOT / "win-caffeine.py"), "stop")
+    assert returncode in (0, 1)
+    assert "win_caffeine.control" in times
+    assert not [name for name in times if name.startswith(SESSION_MODULES)]
+
+
+def test_qt_facade_is_lazy(tmp_path):
+    """Importing the qt facade loads no Qt module."""
+    returncode, times = import_times(tmp_path, "-c", "import win_caffeine.qt")
+    assert returncode == 0
+    assert not [name for name in times if name.startswith(QT_MODULES)]
+
+
+def test_qt_facade_types_cover_its_imports():
+    """Type checkers see the modules that the facade resolves names from."""
+    from win_caffeine import qt
+
+    tree = ast.parse((ROOT / "src" / "win_caffeine" / "qt.py").read_text())
+    (block,) = [node for node in tree.body if isinstance(node, ast.If)]
+    typed = [
+        node.module.split(".")[-1]
+        for node in block.body
+        if isinstance(node, ast.ImportFrom) and node.module
+        if [alias.name for alias in node.names] == ["*"]
+    ]
+    assert typed == list(qt._IMPORTS)
+
+
+def test_qt_names_load_only_their_module(tmp_path):
+    """Using a QtCore name leaves QtGui and QtWidgets unloaded."""
+    pytest.importorskip("PySide2")
+    code = "from win_caffeine import qt; qt.QObject"
+    returncode, times = import_times(tmp_path, "-c", code)
+    assert returncode == 0
+    assert "PySide2.QtCore" in times
+    assert "PySide2.QtGui" not in times
+    assert "PySide2.QtWidgets" not in times
+
+
+def test_qt_facade_names_exist():
+    """Every name of the facade resolves in its Qt module."""
+    pytest.importorskip("PySide2")
+    from win_caffeine import qt
+
+    for name in qt.__all__:
+        assert getattr(qt, name) is not None
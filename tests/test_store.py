@@ -0,0 +1,154 @@
+"""Test the user settings store."""
+
+import threading
+import time
+
+from win_caffeine import screen_lock
+from win_caffeine import store
+
+
+class CountingBacking:
+    """Backing keeping saved values in memory."""
+
+    def __init__(self) -> None:
+        self.saves: list[dict] = []
+        self.saved = threading.Event()
+
+    def load(self) -> dict:
+        return {}
+
+    def save(self, values: dict):
+        self.saves.append(values)
+        self.saved.set()
+
+
+class FakeQSettings:
+    """QSettings keeping every value as a string, like INI files do."""
+
+    def __init__(self, values: dict) -> None:
+        self.values = values
+        self.synced = 0
+
+    def allKeys(self) -> list[str]:
+        return list(self.values)
+
+    def value(self, key: str):
+        return self.values[key]
+
+    def setValue(self, key: str, value):
+        self.values[key] = str(value)
+
+    def sync(self):
+        self.synced += 1
+
+
+def test_model_settings_round_trip_through_the_json_file(tmp_path):
+    """Values come back typed from another store on the same file."""
+    path = tmp_path / "config" / "settings.json"
+    first = store.SettingsStore(store.JsonFile(str(path)))
+    model = screen_lock.Model()
+    model.set_strategy(2)
+    model.duration_minutes = 45
+    model.is_auto_interval = True
+    model.save_settings(first)
+    first.beginGroup("WindowSettings")
+    first.setValue("window_pos", (10, 20))
+    first.endGroup()
+    first.flush()
+
+    second = store.SettingsStore(store.JsonFile(str(path)))
+    loaded = screen_lock.Model()
+    loaded.load_settings(second)
+    assert (loaded.strategy.ndx, loaded.duration_minutes) == (2, 45)
+    assert loaded.is_auto_interval is True
+    assert second.value("WindowSettings/window_pos", (0, 0)) == (10, 20)
+    assert second.value("ModelSettings/missing", 7) == 7
+    assert [p.name for p in path.parent.iterdir()] == [path.name]
+
+
+def test_rapid_changes_coalesce_into_one_write():
+    """A burst of changes is saved once, unchanged values are not saved."""
+    backing = CountingBacking()
+    settings_store = store.SettingsStore(backing, delay_seconds=0.05)
+    for minutes in range(100):
+        settings_store.setValue("ModelSettings/duration_minutes", minutes)
+    assert backing.saved.wait(5)
+    settings_store.setValue("ModelSettings/duration_minutes", 99)
+    settings_store.flush()
+    assert backing.saves == [{"ModelSettings/duration_minutes": 99}]
+
+
+class SlowBacking(CountingBacking):
+    """Backing noting writes that overlap, like concurrent QSettings writes."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.writing = 0
+        self.overlaps = 0
+
+    def save(self, values: dict):
+        self.writing += 1
+        self.overlaps += self.writing > 1
+        time.sleep(0.05)
+        super().save(values)
+        self.writing -= 1
+
+
+def test_flushes_from_many_threads_do_not_overlap():
+    """Flushes, e.g. of the timer and the GUI thread, write one at a time."""
+    backing = SlowBacking()
+    settings_store = store.SettingsStore(backing, delay_seconds=60)
+    key = "ModelSettings/duration_minutes"
+
+    def change(minutes: int):
+        settings_store.setValue(key, minutes)
+        settings_store.flush()
+
+    threads = [threading.Thread(target=change, args=(n,)) for n in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert backing.overlaps == 0
+    # The last write is the newest value.
+    assert backing.saves[-1] == {key: settings_store.value(key)}
+
+
+def test_qsettings_backing_reads_strings_typed():
+    """String values of QSettings are converted to the type of the default."""
+    qsettings = FakeQSettings(
+        {
+            "ModelSettings/duration_checked": "true",
+            "ModelSettings/duration_minutes": "30",
+            "ModelSettings/strategy_index": "1",
+        }
+    )
+    settings_store = store.SettingsStore(store.QSettingsBacking(qsettings))
+    model = screen_lock.Model()
+    model.load_settings(settings_store)
+    assert model.is_duration_checked is True
+    assert model.duration_minutes == 30
+    assert model.strategy.ndx == 1
+
+    model.interval_seconds = 90
+    model.save_settings(settings_store)
+    settings_store.flush()
+    assert qsettings.values["ModelSettings/refresh_interval_seconds"] == "90"
+    assert qsettings.synced == 1
+
+
+def test_legacy_qsettings_are_imported_once(tmp_path):
+    """A missing JSON file is seeded from QSettings, an existing one is kept."""
+    path = tmp_path / "settings.json"
+    legacy = store.QSettingsBacking(
+        FakeQSettings({"ModelSettings/duration_minutes": "30"})
+    )
+    settings_store = store.SettingsStore(store.JsonFile(str(path)))
+    assert store.import_legacy(settings_store, legacy)
+    assert settings_store.value("ModelSettings/duration_minutes", 0) == 30
+
+    settings_store.setValue("ModelSettings/duration_minutes", 45)
+    settings_store.flush()
+    reopened = store.SettingsStore(store.JsonFile(str(path)))
+    assert not store.import_legacy(reopened, legacy)
+    assert reopened.value("ModelSettings/duration_minutes", 0) == 45
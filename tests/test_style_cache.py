@@ -0,0 +1,58 @@
+"""Test the theme style cache."""
+
+from win_caffeine import style_cache
+
+
+class Builder:
+    """Counts the style builds."""
+
+    def __init__(self, stylesheet: str) -> None:
+        self.stylesheet = stylesheet
+        self.builds = 0
+
+    def __call__(self) -> style_cache.Style:
+        self.builds += 1
+        return style_cache.Style(self.stylesheet, [["Active", "Link", "#ff8ab4f8"]])
+
+
+def test_styles_are_built_once_per_theme_and_version(tmp_path):
+    """Later runs read the style, a new library version rebuilds it."""
+    build = Builder("QWidget { color: #e4e7eb; }")
+    cache = style_cache.StyleCache("qdarktheme-2.1.0-qt-5.15.2", str(tmp_path))
+    style = cache.get("dark", build)
+    assert cache.get("dark", build) is style
+
+    next_run = style_cache.StyleCache("qdarktheme-2.1.0-qt-5.15.2", str(tmp_path))
+    assert next_run.get("dark", build) == style
+    assert build.builds == 1
+    assert style.palette == [["Active", "Link", "#ff8ab4f8"]]
+
+    upgraded = style_cache.StyleCache("qdarktheme-2.2.0-qt-5.15.2", str(tmp_path))
+    upgraded.get("dark", build)
+    assert build.builds == 2
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "style-dark-qdarktheme-2.1.0-qt-5.15.2.json",
+        "style-dark-qdarktheme-2.2.0-qt-5.15.2.json",
+    ]
+
+
+def test_styles_with_missing_icons_or_bad_files_are_rebuilt(tmp_path):
+    """Icon files the stylesheet refers to must still exist."""
+    icon = tmp_path / "icons" / "arrow_upward_e4e7eb_0.svg"
+    icon.parent.mkdir()
+    icon.write_text("<svg/>")
+    build = Builder(f"QCheckBox::indicator {{ image: url({icon.as_posix()}); }}")
+    directory = str(tmp_path / "cache")
+    style_cache.StyleCache("v1", directory).get("light", build)
+    style_cache.StyleCache("v1", directory).get("light", build)
+    assert build.builds == 1
+
+    icon.unlink()
+    style_cache.StyleCache("v1", directory).get("light", build)
+    assert build.builds == 2
+
+    cache = style_cache.StyleCache("v1", directory)
+    with open(cache.path("light"), "w") as f:
+        f.write("{")
+    cache.get("light", build)
+    assert build.builds == 3
@@ -0,0 +1,54 @@
+"""Test process exit notification."""
+
+import os
+import pathlib
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from win_caffeine import watch
+
+ROOT = pathlib.Path(__file__).parent.parent
+
+
+def sleeper(seconds: float) -> subprocess.Popen:
+    command = [sys.executable, "-c", f"import time; time.sleep({seconds})"]
+    return subprocess.Popen(command)
+
+
+def test_exit_is_noticed_without_polling():
+    """The blocking wait returns within milliseconds of the exit."""
+    process = sleeper(0.3)
+    exited = threading.Event()
+    threading.Thread(target=lambda: (watch.wait_pid(process.pid), exited.set())).start()
+    assert not exited.wait(0.1)
+    assert exited.wait(2)
+    assert process.wait() == 0
+
+    assert not watch.pid_exists(process.pid)
+    with pytest.raises(ProcessLookupError):
+        watch.wait_pid(process.pid)
+
+
+def test_cli_wraps_command(tmp_path):
+    """`cli -- COMMAND` holds while the command runs and returns its exit code."""
+    env = dict(os.environ, TMP=str(tmp_path), TEMP=str(tmp_path), TMPDIR=str(tmp_path))
+    # Keeps the session history out of the user state directory.
+    env.update(XDG_STATE_HOME=str(tmp_path), LOCALAPPDATA=str(tmp_path))
+    env["PYTHONPATH"] = os.pathsep.join([str(ROOT / "src"), env.get("PYTHONPATH", "")])
+    command = [sys.executable, "-c", "import time; time.sleep(0.2); exit(3)"]
+    started = time.monotonic()
+    proc = subprocess.run(
+        [sys.executable, str(ROOT / "win-caffeine.py"), "cli", "-s", "NumLock", "--"]
+        + command,
+        capture_output=True,
+        text=True,
+        env=env,
+        timeout=30,
+    )
+    assert proc.returncode == 3
+    assert "ended" in proc.stderr
+    assert time.monotonic() - started < 5
@@ -1,69 +1,138 @@
 """win_coffeine implementation."""
 import argparse
+import contextlib
+import importlib
 import os
 import sys
 import logging
-import tempfile
-from contextlib import contextmanager
 
+from win_caffeine import control
+from win_caffeine import history
+from win_caffeine import instance
+from win_caffeine import metrics
 from win_caffeine import settings
 from win_caffeine import screen_lock
-from win_caffeine import gui
-from win_caffeine import cli
 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+# Subcommand modules, imported on demand so `cli` and `stop` never load Qt.
+SUBCOMMANDS = dict(gui="win_caffeine.gui", cli="win_caffeine.cli")
+# Subcommands sent to the running instance over the control socket.
+CONTROL_COMMANDS = ["stop", "status", "extend", "set-strategy", "acquire", "release"]
+# Subcommands run locally, without an instance.
+LOCAL_COMMANDS = dict(history=history.run)
+
 
 def stop():
     """Stop application."""
-    # get pid
-    tempdir = tempfile.gettempdir()
-    lock_name = f"{settings.APP_NAME}.lock"
-    lockfile = os.sep.join([tempdir, lock_name])
-    if os.path.isfile(lockfile):
-        with open(lockfile, "r") as f:
-            pid = int(f.read())
-
-        # Kill process
-        try:
-            os.kill(pid, 9)
-            logger.info("Process %s terminated.", pid)
-        except OSError as e:
-            logger.error("Failed to terminate process.", exc_info=e)
-
-        # cleanup
-        os.remove(lockfile)
-    else:
+    try:
+        response = control.request(
+            "stop",
+            timeout=settings.STOP_TIMEOUT_SECONDS + settings.CONTROL_TIMEOUT_SECONDS,
+        )
+    except ConnectionError:
         logger.info("Could not find running processes to stop.")
+        return 1
+    except OSError as e:
+        logger.error("Could not stop the running process: %s", e)
+        return 1
+    if not response["stopped"]:
+        logger.error("Process %s did not confirm the stop.", response["pid"])
+        return 1
+    logger.info("Process %s stopped.", response["pid"])
+    return 0
+
+
+def send_command(args) -> int:
+    """Sends a control command to the running instance."""
+    params = {
+        "status": {},
+        "extend": dict(minutes=args.duration),
+        "set-strategy": dict(strategy=args.strategy),
+        "acquire": dict(minutes=args.duration, owner=f"pid {os.getppid()}"),
+        "release": dict(lease=args.lease),
+    }[args.subcommand]
+    try:
+        response = control.request(args.subcommand, **params)
+    except ConnectionError:
+        logger.info("Could not find running processes.")
+        return 1
+    except OSError as e:
+        logger.error("%s failed: %s", args.subcommand, e)
+        return 1
+    except control.ControlError as e:
+        logger.error("%s failed: %s", args.subcommand, e)
+        return 1
+    for key, value in response.items():
+        print(f"{key}: {value}")
+    return 0
+
+
+def handoff(args) -> bool:
+    """Hands the launch arguments over to a running instance.
+
+    Returns:
+        True if a running instance took them.
+    """
+    try:
+        response = control.request(
+            "handoff",
+            subcommand=args.subcommand,
+            duration=args.duration,
+            interval=args.interval,
+            auto_interval=args.auto_interval,
+            strategy=args.strategy,
+        )
+    except ConnectionError:
+        return False
+    except (OSError, control.ControlError) as e:
+        logger.error("Running instance rejected the launch: %s", e)
+        return True
+    logger.info("Handed over to running process %s.", response["pid"])
+    return True
 
 
-@contextmanager
-def single_instance():
-    """Ensure single app instance."""
-    tempdir = tempfile.gettempdir()
-    lock_name = f"{settings.APP_NAME}.lock"
-    lockfile = os.sep.join([tempdir, lock_name])
-    if os.path.isfile(lockfile):
-        logger.error("Another instance is already running.")
-        sys.exit(0)
+def hold_while(args) -> int | None:
+    """Holds a lease of the running instance until the hold condition ends.
 
-    with open(lockfile, "w") as f:
-        f.write(str(os.getpid()))
+    Returns:
+        Exit code, None if no instance is running.
+    """
+    from win_caffeine import cli
 
+    owner = cli.describe_condition(args)
     try:
-        yield
+        lease = control.request("acquire", owner=owner)["lease"]
+    except ConnectionError:
+        return None
+    except (OSError, control.ControlError) as e:
+        logger.error("Running instance rejected the lease: %s", e)
+        return 1
+    logger.info("Holding lease %s of the running instance.", lease)
+    try:
+        condition = cli.hold_condition(args)
+        return (condition() or 0) if condition else 0
+    except (OSError, ValueError) as e:
+        logger.error("Cannot hold %s: %s", owner, e)
+        return 1
     finally:
-        os.remove(lockfile)
+        try:
+            control.request("release", lease=lease)
+        except (OSError, control.ControlError) as e:
+            logger.error("Could not release lease %s: %s", lease, e)
 
 
-def main():
-    """Main function."""
-    usage = f"{settings.APP_NAME} SUBCOMMAND [FLAGS]"
+def build_parser() -> argparse.ArgumentParser:
+    """Builds the command line parser."""
+    usage = f"{settings.APP_NAME} SUBCOMMAND [FLAGS] [-- COMMAND ...]"
     parser = argparse.ArgumentParser(prog=settings.APP_NAME, usage=usage)
 
     parser.add_argument(
-        "subcommand", type=str, choices=["gui", "cli", "stop"], help="SUBCOMMAND"
+        "subcommand",
+        type=str,
+        choices=[*SUBCOMMANDS, *CONTROL_COMMANDS, *LOCAL_COMMANDS],
+        help="SUBCOMMAND",
     )
 
     parser.add_argument(
@@ -81,6 +150,13 @@ def main():
         help="Refresh interval (seconds)",
     )
 
+    parser.add_argument(
+        "-a",
+        "--auto-interval",
+        action="store_true",
+        help="Derive the refresh interval from the OS lock timeout",
+    )
+
     parser.add_argument(
         "-s",
         "--strategy",
@@ -90,16 +166,146 @@ def main():
         help="Suspend strategy",
     )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        "--days",
+        type=int,
+        default=settings.HISTORY_STATS_DAYS,
+        help="Days of session history to summarize (history)",
+    )
 
-    if args.subcommand == "stop":
-        stop()
-        return 0
+    parser.add_argument(
+        "-l",
+        "--lease",
+        type=int,
+        help="Lease to release",
+    )
+
+    parser.add_argument(
+        "-p",
+        "--while-pid",
+        type=int,
+        help="Hold while the process runs (cli)",
+    )
+
+    parser.add_argument(
+        "--until-exists",
+        metavar="PATH",
+        help="Hold until the file exists (cli)",
+    )
+
+    parser.add_argument(
+        "--while-growing",
+        metavar="PATH",
+        help="Hold while the file is written to (cli)",
+    )
+
+    parser.add_argument(
+        "--while-active",
+        nargs="?",
+        const="",
+        metavar="THRESHOLDS",
+        help="Hold while CPU, disk or network are busy, e.g. cpu=20,net=1e5 (cli)",
+    )
+
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        metavar="PORT",
+        help="Serve metrics on http://127.0.0.1:PORT/metrics and /metrics.json",
+    )
+
+    parser.add_argument(
+        "--metrics-file",
+        metavar="PATH",
+        help="Keep a Prometheus textfile of the metrics current",
+    )
+
+    parser.add_argument(
+        "--power",
+        nargs="?",
+        const="",
+        metavar="POLICY",
+        help="Follow the power source, e.g. min=20,stretch=2,resume (cli)",
+    )
+
+    parser.add_argument(
+        "--schedule",
+        nargs="*",
+        metavar="RULE",
+        help='Hold during recurring windows, e.g. "mon-fri 08:00-18:00", '
+        "defaults to the configured ones (cli)",
+    )
+
+    return parser
+
+
+def parse_args(parser: argparse.ArgumentParser, argv: list[str]) -> argparse.Namespace:
+    """Parses the arguments, everything after `--` is the command (cli).
+
+    Exits through `parser.error` on conflicting flags.
+    """
+    command: list[str] = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, command = argv[:split], argv[split:]
+        del command[0]
+    args = parser.parse_args(argv)
+    args.command = command
+    conditions = [
+        args.command,
+        args.while_pid,
+        args.until_exists,
+        args.while_growing,
+        args.while_active is not None,
+    ]
+    args.holds_condition = any(conditions)
+    if args.holds_condition and args.subcommand != "cli":
+        parser.error("hold conditions need the cli subcommand")
+    if len([condition for condition in conditions if condition]) > 1:
+        parser.error("only one hold condition can be given")
+    if args.schedule is not None and (args.subcommand != "cli" or args.holds_condition):
+        parser.error("schedules need the cli subcommand and no hold condition")
+    if args.power is not None and (
+        args.subcommand != "cli" or args.schedule is not None
+    ):
+        parser.error("power policies need the cli subcommand and no schedule")
+    return args
 
-    with single_instance():
+
+def run_instance(args) -> int:
+    """Runs the gui or cli as the single instance."""
+    with instance.single_instance():
         # choose GUI, CLI or stop
-        subcommand = dict(gui=gui.run, cli=cli.run).get(args.subcommand)
-        return subcommand(args)
+        subcommand = importlib.import_module(SUBCOMMANDS[args.subcommand])
+        screen_lock.model.session_history = history.History()
+        with contextlib.ExitStack() as stack:
+            try:
+                stack.enter_context(
+                    metrics.exporting(args.metrics_port, args.metrics_file)
+                )
+            except OSError as e:
+                logger.error("Cannot export metrics: %s", e)
+                return 1
+            return subcommand.run(args)
+
+
+def main():
+    """Main function."""
+    args = parse_args(build_parser(), sys.argv[1:])
+    if args.subcommand == "stop":
+        return stop()
+    if args.subcommand in CONTROL_COMMANDS:
+        return send_command(args)
+    if args.subcommand in LOCAL_COMMANDS:
+        return LOCAL_COMMANDS[args.subcommand](args)
+
+    if args.holds_condition:
+        returncode = hold_while(args)
+        if returncode is not None:
+            return returncode
+    elif args.schedule is None and handoff(args):
+        return 0
+    return run_instance(args)
 
 
 if __name__ == "__main__":